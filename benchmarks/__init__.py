@@ -0,0 +1,3 @@
+"""
+Benchmark suite of the psepy solver entry points, see benchmarks.runner.
+"""
@@ -0,0 +1,124 @@
+"""
+Benchmark cases of the solver entry points.
+
+Every case is a setup function that builds the inputs of one size, with a fixed seed, and
+returns the call to time. Caching is disabled in every call, so that repeated calls
+measure the solvers and not the Q cache.
+
+The import cases time a cold start: a fresh interpreter importing one module.
+"""
+import subprocess
+import sys
+from typing import Callable, Dict, List, NamedTuple, Tuple
+import numpy as np
+from psepy import (
+    agg_machines,
+    agg_machines_batch,
+    P_function_two_machine_bernoulli,
+    aggregation_of_bernoulli_lines,
+    performance_measure_multiply_machine_bernoulli,
+    performance_measure_two_machine_batch,
+    performance_measure_multiply_machine_bernoulli_batch,
+    aggregation_of_bernoulli_lines_decomposed
+)
+
+PROFILES = ['quick', 'full']
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[..., Callable[[], object]]
+    # sizes of each profile; the sizes of 'quick' are a subset of those of 'full'
+    sizes: Dict[str, List[tuple]]
+
+    def ids(self, profile: str) -> List[Tuple[str, tuple]]:
+        return [(f"{self.name}[{'x'.join(str(s) for s in size)}]", size) for size in self.sizes[profile]]
+
+
+def _import(module: str):
+    command = [sys.executable, "-c", f"import {module}"]
+    return lambda: subprocess.run(command, check=True)
+
+
+def _line(M: int, seed: int = 0) -> Tuple[list, list]:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.7, 0.95, M).tolist(), rng.integers(2, 10, M - 1).tolist()
+
+
+def _lines(K: int, M: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.7, 0.95, (K, M)), rng.integers(2, 10, (K, M - 1))
+
+
+def _machines(shape, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(1, 2, shape), rng.uniform(10, 100, shape), rng.uniform(1, 10, shape)
+
+
+def _agg_machines(mode: str):
+    def setup(S: int):
+        c, T_up, T_down = (a.tolist() for a in _machines(S))
+        return lambda: agg_machines(S, c, T_up, T_down, mode)
+    return setup
+
+
+def _P_function(N: int):
+    return lambda: P_function_two_machine_bernoulli(0.9, 0.8, N, cache=False)
+
+
+def _aggregation(M: int):
+    p, N = _line(M)
+    return lambda: aggregation_of_bernoulli_lines(p, M, N, cache=False)
+
+
+def _performance_measure(M: int):
+    p, N = _line(M)
+    return lambda: performance_measure_multiply_machine_bernoulli(p, M, N, 1.0, cache=False)
+
+
+def _two_machine_batch(K: int):
+    rng = np.random.default_rng(0)
+    p1, p2, N = rng.uniform(0.7, 0.95, K), rng.uniform(0.7, 0.95, K), rng.integers(1, 50, K)
+    return lambda: performance_measure_two_machine_batch(p1, p2, N)
+
+
+def _line_batch(K: int, M: int):
+    p, N = _lines(K, M)
+    return lambda: performance_measure_multiply_machine_bernoulli_batch(p, N)
+
+
+def _agg_machines_batch(K: int, S: int):
+    c, T_up, T_down = _machines((K, S))
+    return lambda: agg_machines_batch(c, T_up, T_down, 'consecutive dependent')
+
+
+def _decomposed(M: int, segments: int, workers: int):
+    p, N = _line(M)
+    return lambda: aggregation_of_bernoulli_lines_decomposed(p, N, segments, workers=workers)
+
+
+CASES = [
+    Case("import", _import,
+         {'quick': [("psepy",), ("psepy.scalar",)], 'full': [("psepy",), ("psepy.scalar",), ("psepy.core",)]}),
+    Case("agg_machines_parallel", _agg_machines('parallel'),
+         {'quick': [(10,), (1000,)], 'full': [(10,), (1000,), (10000,)]}),
+    Case("agg_machines_consecutive", _agg_machines('consecutive dependent'),
+         {'quick': [(10,), (1000,)], 'full': [(10,), (1000,), (10000,)]}),
+    Case("P_function_two_machine_bernoulli", _P_function,
+         {'quick': [(10,), (10000,)], 'full': [(10,), (10000,), (1000000,)]}),
+    Case("aggregation_of_bernoulli_lines", _aggregation,
+         {'quick': [(10,), (100,)], 'full': [(10,), (100,), (1000,)]}),
+    Case("performance_measure_multiply_machine_bernoulli", _performance_measure,
+         {'quick': [(10,), (100,)], 'full': [(10,), (100,), (1000,)]}),
+    Case("performance_measure_two_machine_batch", _two_machine_batch,
+         {'quick': [(10000,)], 'full': [(10000,), (1000000,)]}),
+    Case("performance_measure_multiply_machine_bernoulli_batch", _line_batch,
+         {'quick': [(100, 10)], 'full': [(100, 10), (1000, 10), (10000, 5)]}),
+    Case("agg_machines_batch", _agg_machines_batch,
+         {'quick': [(1000, 10)], 'full': [(1000, 10), (100, 10000)]}),
+    # scaling of one long line with the number of segments, then with the number of workers
+    Case("aggregation_of_bernoulli_lines_decomposed", _decomposed,
+         {'quick': [(100, 10, 1), (100, 10, 2)],
+          'full': [(100, 10, 1), (100, 10, 2), (1000, 10, 1), (1000, 40, 1), (1000, 100, 1),
+                   (1000, 40, 2), (1000, 40, 4)]}),
+]
@@ -0,0 +1,138 @@
+"""
+Runner of the benchmark suite: times the cases, records baselines and compares runs.
+
+Every benchmark is timed with timeit: the number of loops is calibrated so that one
+measurement takes at least 0.2 seconds (one call for the slow sizes), then `repeat`
+measurements are taken. The seconds per call of the fastest measurement ('best') are
+compared, as it is the least affected by other load on the machine; the median is
+recorded too.
+
+    python -m benchmarks                          # quick profile, print the timings
+    python -m benchmarks --profile full --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json --threshold 1.25
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import timeit
+from typing import Dict, List, Optional
+import numpy as np
+from .cases import CASES, PROFILES
+
+# ratio of the current to the baseline time above which a benchmark is a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+def run_benchmarks(profile: str = 'quick', pattern: Optional[str] = None, repeat: int = 5,
+                   verbose: bool = False) -> Dict[str, dict]:
+    """
+    Time the benchmarks of `profile` whose id matches the regular expression `pattern`.
+
+    Returns:
+        dict: {id: {"best", "median", "loops", "repeat"}}, times in seconds per call
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Parameter 'profile' must be in {PROFILES}")
+    if not isinstance(repeat, int) or repeat <= 0:
+        raise ValueError(f"Parameter 'repeat' must be a positive integer, got {repeat}")
+    results = {}
+    for case in CASES:
+        for name, size in case.ids(profile):
+            if pattern is not None and not re.search(pattern, name):
+                continue
+            timer = timeit.Timer(case.setup(*size))
+            loops, _ = timer.autorange()
+            times = [t/loops for t in timer.repeat(repeat, loops)]
+            results[name] = {"best": min(times), "median": statistics.median(times), "loops": loops, "repeat": repeat}
+            if verbose:
+                print(f"{name:<72} {_format_time(min(times)):>10}", flush=True)
+    return results
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor(), "system": platform.system()}
+
+
+def save_baseline(path: str, results: Dict[str, dict], profile: str) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"profile": profile, "environment": environment(), "results": results}, file, indent=2)
+        file.write("\n")
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float = REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    Compare the best times of a run with a baseline.
+
+    A benchmark is a 'regression' when it is more than `threshold` times slower than the
+    baseline and 'improved' when it is more than `threshold` times faster; benchmarks
+    missing from the baseline are 'new'.
+
+    Returns:
+        list[dict]: One row per benchmark of the run, {"name", "baseline", "current", "ratio", "status"}
+    """
+    if threshold <= 1:
+        raise ValueError(f"Parameter 'threshold' must be greater than 1, got {threshold}")
+    rows = []
+    for name, result in results.items():
+        current = result["best"]
+        if name not in baseline:
+            rows.append({"name": name, "baseline": None, "current": current, "ratio": None, "status": "new"})
+            continue
+        ratio = current/baseline[name]["best"]
+        status = "regression" if ratio > threshold else "improved" if ratio < 1/threshold else "ok"
+        rows.append({"name": name, "baseline": baseline[name]["best"], "current": current, "ratio": ratio, "status": status})
+    return rows
+
+
+def _format_time(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds/scale:.3g} {unit}"
+    return f"{seconds/1e-9:.3g} ns"
+
+
+def report(rows: List[dict]) -> str:
+    """The comparison as a plain text table, regressions listed at the end"""
+    width = max([len(row["name"]) for row in rows] + [9])
+    lines = [f"{'benchmark':<{width}} {'baseline':>10} {'current':>10} {'ratio':>7}  status"]
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}"
+        lines.append(f"{row['name']:<{width}} {_format_time(row['baseline']):>10} "
+                     f"{_format_time(row['current']):>10} {ratio:>7}  {row['status']}")
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    lines.append("")
+    lines.append(f"{len(regressions)} regression(s)" + (": " + ", ".join(regressions) if regressions else ""))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks of the psepy solvers")
+    parser.add_argument("--profile", choices=PROFILES, default='quick', help="sizes to run (default: quick)")
+    parser.add_argument("--filter", dest="pattern", help="run only the benchmarks whose id matches this regex")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per benchmark (default: 5)")
+    parser.add_argument("--save", metavar="PATH", help="record the timings as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the timings with a baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"slowdown ratio flagged as a regression (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.profile, args.pattern, args.repeat, verbose=True)
+    if args.save:
+        save_baseline(args.save, results, args.profile)
+    if args.compare:
+        rows = compare(results, load_baseline(args.compare), args.threshold)
+        print()
+        print(report(rows))
+        return int(any(row["status"] == "regression" for row in rows))
+    return 0
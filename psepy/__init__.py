@@ -15,31 +15,192 @@ Basic usage:
 For more information, please see: https://github.com/yourusername/psepy
 """
 
-from .core import (
-    agg_machines,
-    P_function_two_machine_bernoulli,
-    Q_function,
-    performance_measure_two_machine,
-    aggregation_of_bernoulli_lines,
-    performance_measure_multiply_machine_bernoulli
-)
-
-from .machine_aggregator import MachineAggregator
-from .bernoulli_line import BernoulliLine
-from .validators import InputValidator
+import importlib
+from typing import TYPE_CHECKING
 
 __version__ = "0.1.0"
 __author__ = "Your Name"
 __license__ = "MIT"
 
-__all__ = [
-    "agg_machines",
-    "P_function_two_machine_bernoulli",
-    "Q_function",
-    "performance_measure_two_machine",
-    "aggregation_of_bernoulli_lines",
-    "performance_measure_multiply_machine_bernoulli",
-    "MachineAggregator",
-    "BernoulliLine",
-    "InputValidator",
-]
+# public names and the submodules defining them; a submodule is imported when one of its
+# names is first accessed, so that `import psepy` itself does not import NumPy
+_LAZY_IMPORTS = {
+    "agg_machines": "core",
+    "P_function_two_machine_bernoulli": "scalar",
+    "Q_function_bernoulli": "scalar",
+    "performance_measure_two_machine": "scalar",
+    "aggregation_of_bernoulli_lines": "core",
+    "performance_measure_multiply_machine_bernoulli": "core",
+    "Q_function_bernoulli_batch": "batch",
+    "performance_measure_two_machine_batch": "batch",
+    "aggregation_of_bernoulli_lines_batch": "batch",
+    "performance_measure_multiply_machine_bernoulli_batch": "batch",
+    "agg_machines_batch": "batch",
+    "aggregation_of_bernoulli_lines_decomposed": "decomposition",
+    "performance_measure_multiply_machine_bernoulli_decomposed": "decomposition",
+    "LineResult": "results",
+    "LineResultBatch": "results",
+    "LRUCache": "cache",
+    "enable_cache": "cache",
+    "disable_cache": "cache",
+    "get_cache": "cache",
+    "ResultCache": "result_cache",
+    "Instrumentation": "instrumentation",
+    "SolveRecord": "instrumentation",
+    "instrument": "instrumentation",
+    "enable_instrumentation": "instrumentation",
+    "disable_instrumentation": "instrumentation",
+    "get_instrumentation": "instrumentation",
+    "buffer_distribution": "distribution",
+    "buffer_distribution_summary": "distribution",
+    "LineModel": "models",
+    "BernoulliModel": "models",
+    "GeometricModel": "models",
+    "ExponentialModel": "models",
+    "performance_measure_two_machine_model": "models",
+    "aggregation_of_lines_batch": "models",
+    "performance_measure_lines_batch": "models",
+    "performance_measure_geometric_line": "models",
+    "performance_measure_exponential_line": "models",
+    "allocate_buffers": "optimization",
+    "buffers_for_target": "optimization",
+    "BufferAllocation": "optimization",
+    "simulate_bernoulli_line": "simulation",
+    "TransientLine": "transient",
+    "TransientResult": "transient",
+    "transient_analysis": "transient",
+    "bottleneck_analysis": "sensitivity",
+    "BottleneckAnalysis": "sensitivity",
+    "ColumnStore": "storage",
+    "write_lines": "storage",
+    "read_lines": "storage",
+    "append_results": "storage",
+    "read_results": "storage",
+    "solve_line_store": "storage",
+    "sweep_multiply_machine_bernoulli": "sweep",
+    "sweep_agg_machines": "sweep",
+    "SolverService": "service",
+    "LocalClient": "service",
+    "BernoulliAggregationEngine": "aggregation",
+    "AggregationResult": "aggregation",
+    "PlantNode": "plant",
+    "Machine": "plant",
+    "MachineGroup": "plant",
+    "ParallelGroup": "plant",
+    "SerialGroup": "plant",
+    "MachineAggregator": "machine_aggregator",
+    "BernoulliLine": "bernoulli_line",
+    "InputValidator": "validators",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+_SUBMODULES = {
+    "aggregation", "batch", "bernoulli_line", "cache", "constants", "core", "decomposition", "distribution",
+    "instrumentation", "machine_aggregator", "models", "optimization", "plant", "result_cache",
+    "results", "scalar", "sensitivity", "service", "simulation", "storage", "sweep", "transient", "validators"
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(f".{_LAZY_IMPORTS[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
+
+
+if TYPE_CHECKING:
+    from .scalar import (
+        P_function_two_machine_bernoulli,
+        Q_function_bernoulli,
+        performance_measure_two_machine
+    )
+
+    from .core import (
+        agg_machines,
+        aggregation_of_bernoulli_lines,
+        performance_measure_multiply_machine_bernoulli
+    )
+
+    from .batch import (
+        Q_function_bernoulli_batch,
+        performance_measure_two_machine_batch,
+        aggregation_of_bernoulli_lines_batch,
+        performance_measure_multiply_machine_bernoulli_batch,
+        agg_machines_batch
+    )
+
+    from .decomposition import (
+        aggregation_of_bernoulli_lines_decomposed,
+        performance_measure_multiply_machine_bernoulli_decomposed
+    )
+
+    from .results import LineResult, LineResultBatch
+
+    from .cache import (
+        LRUCache,
+        enable_cache,
+        disable_cache,
+        get_cache
+    )
+    from .result_cache import ResultCache
+
+    from .instrumentation import (
+        Instrumentation,
+        SolveRecord,
+        instrument,
+        enable_instrumentation,
+        disable_instrumentation,
+        get_instrumentation
+    )
+
+    from .distribution import buffer_distribution, buffer_distribution_summary
+
+    from .models import (
+        LineModel,
+        BernoulliModel,
+        GeometricModel,
+        ExponentialModel,
+        performance_measure_two_machine_model,
+        aggregation_of_lines_batch,
+        performance_measure_lines_batch,
+        performance_measure_geometric_line,
+        performance_measure_exponential_line
+    )
+
+    from .optimization import allocate_buffers, buffers_for_target, BufferAllocation
+
+    from .simulation import simulate_bernoulli_line
+    from .transient import TransientLine, TransientResult, transient_analysis
+
+    from .sensitivity import bottleneck_analysis, BottleneckAnalysis
+
+    from .storage import (
+        ColumnStore,
+        write_lines,
+        read_lines,
+        append_results,
+        read_results,
+        solve_line_store
+    )
+
+    from .sweep import (
+        sweep_multiply_machine_bernoulli,
+        sweep_agg_machines
+    )
+
+    from .service import SolverService, LocalClient
+
+    from .aggregation import BernoulliAggregationEngine, AggregationResult
+    from .plant import PlantNode, Machine, MachineGroup, ParallelGroup, SerialGroup
+    from .machine_aggregator import MachineAggregator
+    from .bernoulli_line import BernoulliLine
+    from .validators import InputValidator
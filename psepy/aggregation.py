@@ -0,0 +1,301 @@
+import numbers
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from .cache import LRUCache, resolve_cache
+from .constants import AGGREGATION_METHODS, CONVERGENCE_THRESHOLD, MAX_ITERATIONS
+from .scalar import Q_function_bernoulli, _Q
+from .instrumentation import current_record, instrumented
+
+# lower bound of extrapolated p^f / p^b, keeps Q away from 0/0
+_FLOOR = 1e-12
+
+
+class AggregationResult(NamedTuple):
+    p_f: np.ndarray
+    p_b: np.ndarray
+    iterations: int
+    residual: float
+    converged: bool
+    method: str
+
+
+class BernoulliAggregationEngine:
+    """
+    Array-backed forward/backward aggregation of a Bernoulli line.
+
+    The engine owns preallocated NumPy buffers for p^f, p^b and their previous
+    iterates, p^f and p^b being the two rows of one (2, M) array. Each iteration
+    updates p^f and p^b in place (Gauss-Seidel order, as in
+    aggregation_of_bernoulli_lines), optionally followed by an acceleration step, and
+    convergence is checked with one max-abs-diff over both buffers. An engine can
+    be reused for any number of lines with the same number of machines M.
+    """
+
+    def __init__(self, M: int):
+        if not isinstance(M, numbers.Integral) or M <= 1:
+            raise ValueError(f"Parameter 'M' must be an integer greater than 1, got {M}")
+        self.M = int(M)
+        self._state = np.empty((2, self.M))
+        self._previous = np.empty((2, self.M))
+        self._diff = np.empty((2, self.M))
+        self.p_f, self.p_b = self._state
+        self._p_f_prev, self._p_b_prev = self._previous
+        self.iterations = 0
+        self.residual = np.inf
+        self.converged = False
+
+    def _check_line(self, p: Iterable[float], N: Iterable[int]) -> Tuple[list, list]:
+        p = np.asarray(p, dtype=float).tolist()
+        N = [int(n) for n in N]
+        if len(p) != self.M:
+            raise ValueError(f"Parameter 'p' must have length of {self.M}")
+        if len(N) != self.M - 1:
+            raise ValueError(f"Parameter 'N' must have length of {self.M - 1}")
+        return p, N
+
+    def _sweep(self, p: list, N: list, cache: Union[LRUCache, bool], omega: float = 1.0) -> float:
+        """
+        One backward pass over p^b followed by one forward pass over p^f, in place. Returns
+        the max-abs-diff between the new and the previous p^f and p^b.
+
+        The pass runs on Python floats, which are much cheaper to index and update one at a
+        time than NumPy scalars, and writes p^f and p^b back to the buffers at the end.
+        With omega != 1 every update is over-relaxed, x <- x + omega*(x_GS - x), and kept
+        within [0, p_i], the range of the exact update.
+        """
+        Q = _Q if cache is False else lambda p1, p2, n: Q_function_bernoulli(p1, p2, n, cache)
+        p_f, p_b = self._state.tolist()
+        M = self.M
+        downstream = p_b[M - 1]
+        if omega == 1.0:
+            for i in range(M - 2, -1, -1):
+                downstream = p_b[i] = p[i]*(1 - Q(downstream, p_f[i], N[i]))
+            upstream = p_f[0]
+            for i in range(1, M):
+                upstream = p_f[i] = p[i]*(1 - Q(upstream, p_b[i], N[i - 1]))
+        else:
+            for i in range(M - 2, -1, -1):
+                target = p[i]*(1 - Q(downstream, p_f[i], N[i]))
+                old = p_b[i]
+                downstream = p_b[i] = min(max(old + omega*(target - old), _FLOOR), p[i])
+            upstream = p_f[0]
+            for i in range(1, M):
+                target = p[i]*(1 - Q(upstream, p_b[i], N[i - 1]))
+                old = p_f[i]
+                upstream = p_f[i] = min(max(old + omega*(target - old), _FLOOR), p[i])
+        self.p_f[:] = p_f
+        self.p_b[:] = p_b
+        diff = self._diff
+        np.subtract(self._state, self._previous, out=diff)
+        np.abs(diff, out=diff)
+        return float(diff.max())
+
+    def _extrapolate(self, x: np.ndarray, upper: np.ndarray) -> None:
+        """Write an extrapolated iterate x back into p^f and p^b, clipped into [0, p]"""
+        np.clip(x, _FLOOR, upper, out=x)
+        self.p_f[1:] = x[:self.M - 1]
+        self.p_b[:-1] = x[self.M - 1:]
+
+    @instrumented("BernoulliAggregationEngine.solve")
+    def solve(
+        self,
+        p: Iterable[float],
+        N: Iterable[int],
+        tol: float = CONVERGENCE_THRESHOLD,
+        max_iter: int = MAX_ITERATIONS,
+        method: str = 'gauss-seidel',
+        relaxation: float = 1.2,
+        depth: int = 5,
+        p_f0: Optional[Union[list, np.ndarray]] = None,
+        p_b0: Optional[Union[list, np.ndarray]] = None,
+        cache: Union[LRUCache, bool, None] = None
+    ) -> AggregationResult:
+        """
+        Run the aggregation procedure until p^f and p^b change by less than tol in one
+        sweep, or until max_iter sweeps have been made.
+
+        Methods:
+            'gauss-seidel': the plain backward/forward recursion of aggregation_of_bernoulli_lines
+            'sor': successive over-relaxation of every update with factor `relaxation`
+            'aitken': vector Aitken delta-squared (Irons-Tuck) extrapolation every third sweep
+            'anderson': Anderson mixing over the last `depth` sweeps
+
+        All methods converge to the same fixed point, but they are not faster in general.
+        Aitken and Anderson only pay off when the residual decays geometrically, as on
+        nearly balanced lines with large buffers (100 machines with p = 0.9 and N = 50:
+        225 plain sweeps, 58 with 'aitken', 29 with 'anderson'). On lines of unequal
+        machines the residual of the recursion stalls on a plateau before it collapses,
+        the extrapolations are undone by the safeguards and these methods take as many
+        sweeps as, or more than, 'gauss-seidel'; there 'sor' roughly halves the sweeps
+        of long lines.
+
+        Parameters:
+            p (Iterable[float]): The probability of each machine working at any time
+            N (Iterable[int]): The maximum capacity of the buffer between each machine
+            tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+            max_iter (int, optional): Maximum number of sweeps. Defaults to MAX_ITERATIONS.
+            method (str, optional): One of AGGREGATION_METHODS. Defaults to 'gauss-seidel'.
+            relaxation (float, optional): Over-relaxation factor of 'sor', in (0, 2). Defaults to 1.2.
+            depth (int, optional): Number of previous sweeps mixed by 'anderson'. Defaults to 5.
+            p_f0, p_b0 (array, optional): Initial p^f and p^b. Default to p.
+            cache (LRUCache, optional): Cache for the Q function evaluations. None uses the
+                process-wide cache if it is enabled, True enables and uses it, False disables caching.
+
+        Returns:
+            AggregationResult: p^f and p^b (copies), number of sweeps, final residual and
+            whether the residual dropped below tol
+        """
+        if method not in AGGREGATION_METHODS:
+            raise ValueError(f"Parameter 'method' must be in {AGGREGATION_METHODS}")
+        if not isinstance(max_iter, int) or max_iter <= 0:
+            raise ValueError(f"Parameter 'max_iter' must be a positive integer, got {max_iter}")
+        if method == 'sor' and not 0 < relaxation < 2:
+            raise ValueError(f"Parameter 'relaxation' must be in (0, 2), got {relaxation}")
+        if method == 'anderson' and (not isinstance(depth, int) or depth <= 0):
+            raise ValueError(f"Parameter 'depth' must be a positive integer, got {depth}")
+        record = current_record()
+        p, N = self._check_line(p, N)
+        # resolved once per run so that the sweeps do not look the cache up per call
+        cache = resolve_cache(cache) or False
+        if record is not None:
+            record.use_cache(cache)
+            record.lap("validation")
+        self.p_f[:] = p if p_f0 is None else p_f0
+        self.p_b[:] = p if p_b0 is None else p_b0
+        # boundary conditions
+        self.p_f[0] = p[0]
+        self.p_b[-1] = p[-1]
+
+        omega = relaxation if method == 'sor' else 1.0
+        # p^f[1:] and p^b[:-1] are the unknowns of the fixed-point problem x = G(x)
+        upper = np.concatenate([p[1:], p[:-1]])
+        history_x, history_g = [], []
+        # plain iterate replaced by the last extrapolation, restored if the extrapolation does not pay off
+        saved = None
+        cooldown = 0
+        last_residual = np.inf
+        # extrapolation is abandoned if the residual has not improved on its best for `patience` sweeps
+        extrapolate = method in ('aitken', 'anderson')
+        best, best_residual, since_best = None, np.inf, 0
+        patience = 10*max(depth, 3)
+
+        self.iterations = 0
+        self.residual = np.inf
+        self.converged = False
+        while self.iterations < max_iter:
+            np.copyto(self._previous, self._state)
+            try:
+                self.residual = self._sweep(p, N, cache, omega)
+            except (OverflowError, ZeroDivisionError):
+                if method == 'gauss-seidel' or (method == 'sor' and omega == 1.0):
+                    raise
+                self.residual = np.inf
+            self.iterations += 1
+            if record is not None:
+                record.iteration(self.residual)
+            if self.residual < tol:
+                self.converged = True
+                break
+
+            # safeguards: an accelerated step that increases the residual is undone
+            if method == 'sor' and omega != 1.0 and not self.residual < last_residual:
+                np.copyto(self.p_f, self._p_f_prev)
+                np.copyto(self.p_b, self._p_b_prev)
+                omega = 1 + (omega - 1)/2 if omega - 1 > 0.01 else 1.0
+                continue
+            if saved is not None:
+                saved_f, saved_b, saved_residual = saved
+                saved = None
+                if not self.residual < 10*saved_residual:
+                    self.p_f[:], self.p_b[:] = saved_f, saved_b
+                    self.residual = saved_residual
+                    history_x.clear()
+                    history_g.clear()
+                    cooldown = 2*depth
+                    continue
+            if not np.isfinite(self.residual):
+                break
+            last_residual = self.residual
+            if not extrapolate:
+                continue
+            if self.residual < best_residual:
+                best, best_residual, since_best = (self.p_f.copy(), self.p_b.copy()), self.residual, 0
+            else:
+                since_best += 1
+                if since_best > patience:
+                    self.p_f[:], self.p_b[:] = best
+                    self.residual = best_residual
+                    extrapolate = False
+                    continue
+            if cooldown:
+                cooldown -= 1
+                continue
+
+            x = None
+            if method == 'aitken':
+                history_g.append(np.concatenate([self.p_f[1:], self.p_b[:-1]]))
+                if len(history_g) == 3:
+                    x = _aitken(*history_g)
+                    history_g.clear()
+            elif method == 'anderson':
+                history_x.append(np.concatenate([self._p_f_prev[1:], self._p_b_prev[:-1]]))
+                history_g.append(np.concatenate([self.p_f[1:], self.p_b[:-1]]))
+                if len(history_g) > depth + 1:
+                    del history_x[0], history_g[0]
+                if len(history_g) > 1:
+                    x = _anderson(history_x, history_g)
+                    if x is None:
+                        del history_x[:-1], history_g[:-1]
+            if x is not None:
+                saved = (self.p_f.copy(), self.p_b.copy(), self.residual)
+                self._extrapolate(x, upper)
+        if record is not None:
+            record.converged = self.converged
+            record.lap("aggregation")
+        return AggregationResult(
+            self.p_f.copy(), self.p_b.copy(), self.iterations, self.residual, self.converged, method
+        )
+
+    def run(self, p: Iterable[float], N: Iterable[int], tol: float = CONVERGENCE_THRESHOLD, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Like solve(), but raise RuntimeError if the procedure does not converge.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: p^f and p^b. Both are the engine's own buffers,
+            copy them if the engine is going to be reused.
+        """
+        result = self.solve(p, N, tol, **kwargs)
+        if not result.converged:
+            raise RuntimeError(
+                f"Aggregation did not converge after {result.iterations} iterations "
+                f"(residual {result.residual:.3g}, tolerance {tol:.3g})"
+            )
+        return self.p_f, self.p_b
+
+
+def _aitken(x0: np.ndarray, x1: np.ndarray, x2: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Vector Aitken delta-squared (Irons-Tuck) extrapolation of three successive iterates.
+    Returns None if the second differences vanish.
+    """
+    first = x2 - x1
+    second = x2 - 2*x1 + x0
+    denominator = second @ second
+    if denominator < 1e-30:
+        return None
+    return x2 - (first @ second)/denominator*first
+
+
+def _anderson(history_x: list, history_g: list) -> Optional[np.ndarray]:
+    """
+    Anderson mixing: combine the last sweeps G(x_j) with the weights that minimize the
+    least-squares norm of the combined residual G(x_j) - x_j. Returns None if the
+    least-squares problem is degenerate.
+    """
+    G = np.array(history_g)
+    F = G - np.array(history_x)
+    dF = np.diff(F, axis=0)
+    dG = np.diff(G, axis=0)
+    gamma, *_ = np.linalg.lstsq(dF.T, F[-1], rcond=None)
+    x = G[-1] - gamma @ dG
+    return x if np.all(np.isfinite(x)) else None
@@ -0,0 +1,376 @@
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+from .constants import (
+    CONVERGENCE_THRESHOLD,
+    MAX_ITERATIONS,
+    UNIT_MAPPING,
+    VALID_MODES,
+    VALID_TIME_UNITS,
+    VALID_PRODUCTION_UNITS
+)
+from .instrumentation import current_record, instrumented
+from .results import LineResultBatch
+
+ArrayLike = Union[float, int, list, np.ndarray]
+
+
+def _broadcast_inputs(p1: ArrayLike, p2: ArrayLike, N: ArrayLike) -> tuple:
+    """Convert p1, p2 and N to float arrays broadcast against each other"""
+    return np.broadcast_arrays(
+        np.asarray(p1, dtype=float),
+        np.asarray(p2, dtype=float),
+        np.asarray(N, dtype=float)
+    )
+
+
+def _Q_kernel(p1: np.ndarray, p2: np.ndarray, N: np.ndarray) -> np.ndarray:
+    """
+    Compute Q(p_1, p_2, N) element-wise.
+
+    Q is evaluated through alpha^N when alpha < 1 and through beta^N = alpha^{-N}
+    when alpha > 1, so that large buffers never produce inf/inf. The p1 == p2 case
+    is selected with a mask.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+        alpha = p1*(1 - p2)/(p2*(1 - p1))
+        upper = alpha > 1
+        # gamma^N is alpha^N below 1 and beta^N = alpha^{-N} above 1
+        gamma_N = np.where(upper, 1/alpha, alpha)**N
+        ratio = p1/p2
+        Q = (1 - p1)*(1 - alpha)*np.where(upper, gamma_N/(gamma_N - ratio), 1/(1 - ratio*gamma_N))
+        Q_equal = (1 - p1)/(N + 1 - p1)
+    return np.where(p1 == p2, Q_equal, Q)
+
+
+def _two_machine_terms(p1: np.ndarray, p2: np.ndarray, N: np.ndarray) -> tuple:
+    """
+    Compute Q(p_1, p_2, N), Q(p_2, p_1, N) and WIP of a two-machine Bernoulli line
+    element-wise, in one pass.
+
+    The two directions share the single power gamma^N, since alpha(p_2, p_1) = beta =
+    1/alpha(p_1, p_2), with gamma = min(alpha, beta) as in _Q_kernel: each form is
+    multiplied through by gamma^N where it would otherwise contain gamma^{-N}.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Q(p_1, p_2, N), Q(p_2, p_1, N) and WIP
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+        q1 = 1 - p1
+        q2 = 1 - p2
+        # beta is not 1/alpha: 1 - beta must be as accurate as 1 - alpha when alpha is close to 1
+        alpha = p1*q2/(p2*q1)
+        beta = p2*q1/(p1*q2)
+        upper = alpha > 1
+        gamma_N = np.where(upper, beta, alpha)**N
+        one_gamma_N = 1 - gamma_N
+        one_alpha = 1 - alpha
+        one_beta = 1 - beta
+        r_12 = p1/p2
+        r_21 = p2/p1
+        starve = q1*one_alpha
+        block = q2*one_beta
+        # alpha > 1: gamma = beta, alpha <= 1: gamma = alpha
+        Q_starve = np.where(upper, starve*gamma_N/(gamma_N - r_12), starve/(1 - r_12*gamma_N))
+        Q_block = np.where(upper, block/(1 - r_21*gamma_N), block*gamma_N/(gamma_N - r_21))
+        WIP = np.where(upper, p1/(p2*gamma_N - p1)*(beta*one_gamma_N/one_beta - N),
+                       p1/(p2 - p1*gamma_N)*(one_gamma_N/one_alpha - N*gamma_N))
+        equal = p1 == p2
+        if equal.any():
+            Q_equal = q1/(N + 1 - p1)
+            Q_starve = np.where(equal, Q_equal, Q_starve)
+            Q_block = np.where(equal, Q_equal, Q_block)
+            WIP = np.where(equal, N*(N + 1)/(2*(N + 1 - p1)), WIP)
+    return Q_starve, Q_block, WIP
+
+
+def Q_function_bernoulli_batch(p1: ArrayLike, p2: ArrayLike, N: ArrayLike) -> np.ndarray:
+    """
+    Vectorized version of Q_function_bernoulli.
+
+    p1, p2 and N may be scalars or arrays of any broadcastable shapes; the result
+    has the broadcast shape and is computed in one NumPy pass, with the p1 == p2
+    branch handled by a mask.
+
+    Parameters:
+    p1 (ArrayLike): The probability of machine 1 working at any given time
+    p2 (ArrayLike): The probability of machine 2 working at any given time
+    N (ArrayLike): The maximum capacity of the buffer between the two machines
+
+    Returns:
+    np.ndarray: The probability of the buffer being empty
+    """
+    return _Q_kernel(*_broadcast_inputs(p1, p2, N))
+
+
+def performance_measure_two_machine_batch(
+    p1: ArrayLike,
+    p2: ArrayLike,
+    N: ArrayLike,
+    rounded: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of performance_measure_two_machine.
+
+    p1, p2 and N may be scalars or arrays of any broadcastable shapes. All measures
+    are returned as arrays of the broadcast shape.
+
+    PR = p_2(1 - Q(p_1, p_2, N))
+    WIP = \\sum_{i=0}^{N}iP_i
+    BL_1 = p_1Q(p_2, p_1, N)
+    ST_2 = p_2Q(p_1, p_2, N)
+
+    Parameters:
+    p1 (ArrayLike): The probability of machine 1 working at any given time
+    p2 (ArrayLike): The probability of machine 2 working at any given time
+    N (ArrayLike): The maximum capacity of the buffer between the two machines
+    rounded (bool, optional): Round PR, BL_1 and ST_2 to four decimals and WIP to two
+        decimals, like performance_measure_two_machine. Defaults to True.
+
+    Returns:
+    dict: Arrays of the production rate(PR), work-in-process(WIP),
+    blockages of machine 1(BL_1) and starvations of machine 2(ST_2).
+    """
+    p1, p2, N = _broadcast_inputs(p1, p2, N)
+    Q_12, Q_21, WIP = _two_machine_terms(p1, p2, N)
+    PR = p2*(1 - Q_12)
+    BL_1 = p1*Q_21
+    ST_2 = p2*Q_12
+    if rounded:
+        PR, BL_1, ST_2 = np.round(PR, 4), np.round(BL_1, 4), np.round(ST_2, 4)
+        WIP = np.round(WIP, 2)
+    return {"PR": PR, "WIP": WIP, "BL_1": BL_1, "ST_2": ST_2}
+
+
+def _line_batch_inputs(p: ArrayLike, N: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert p to a (K, M) float array and N to a matching (K, M - 1) array"""
+    p = np.atleast_2d(np.asarray(p, dtype=float))
+    if p.ndim != 2 or p.shape[1] < 2:
+        raise ValueError(f"Parameter 'p' must be a (K, M) array with M > 1, got shape {p.shape}")
+    K, M = p.shape
+    N = np.asarray(N)
+    try:
+        N = np.broadcast_to(N, (K, M - 1)).astype(float)
+    except ValueError:
+        raise ValueError(f"Parameter 'N' must be broadcastable to shape {(K, M - 1)}, got shape {N.shape}")
+    return p, N
+
+
+def _aggregate_lines(p: np.ndarray, N: np.ndarray, tol: float, p_f0: Optional[np.ndarray],
+                     p_b0: Optional[np.ndarray], max_iter: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    aggregation_of_bernoulli_lines_batch on validated inputs, also returning the number of sweeps per line.
+    The recursion is the model-independent engine of models.py, run with Bernoulli machines.
+    """
+    from .models import BERNOULLI, _aggregate_model_lines  # Import here to avoid circular imports
+    initial = []
+    for value in (p_f0, p_b0):
+        if value is not None:
+            value = np.asarray(value, dtype=float)
+            if value.shape != p.shape:
+                raise ValueError(f"Initial p^f and p^b must have shape {p.shape}")
+            value = value[:, :, None]
+        initial.append(value)
+    p_f, p_b, sweeps = _aggregate_model_lines(BERNOULLI, p[:, :, None], N, tol, *initial, max_iter)
+    return p_f[:, :, 0], p_b[:, :, 0], sweeps
+
+
+@instrumented("aggregation_of_bernoulli_lines_batch")
+def aggregation_of_bernoulli_lines_batch(
+    p: ArrayLike,
+    N: ArrayLike,
+    tol: float = CONVERGENCE_THRESHOLD,
+    p_f0: Optional[np.ndarray] = None,
+    p_b0: Optional[np.ndarray] = None,
+    max_iter: int = MAX_ITERATIONS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the recursive aggregation procedure of aggregation_of_bernoulli_lines for K lines
+    of the same length M at once.
+
+    Each backward/forward step updates one column of the (K, M) p^f and p^b arrays for
+    all lines that are still iterating. A line whose p^f and p^b change by less than tol
+    is dropped from the working set, so converged lines cost no further work.
+
+    Parameters:
+        p (ArrayLike): (K, M) array, the probability of each machine working at any time
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        p_f0, p_b0 (np.ndarray, optional): (K, M) initial p^f and p^b. Default to p.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Raises:
+        RuntimeError: If some lines have not converged after max_iter iterations
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (K, M) arrays of p^f and p^b
+    """
+    p, N = _line_batch_inputs(p, N)
+    p_f, p_b, _ = _aggregate_lines(p, N, tol, p_f0, p_b0, max_iter)
+    return p_f, p_b
+
+
+def _line_metrics(p: np.ndarray, p_f: np.ndarray, p_b: np.ndarray, N: np.ndarray) -> tuple:
+    """
+    Compute WIP, BL and ST of (K, M) lines from converged p^f and p^b, for all buffers
+    in one vectorized pass of _two_machine_terms.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (K, M - 1) WIP, (K, M) BL and (K, M) ST
+    """
+    upstream = p_f[:, :-1]
+    downstream = p_b[:, 1:]
+    Q_starve, Q_block, WIP = _two_machine_terms(upstream, downstream, N)
+    BL = np.zeros_like(p)
+    ST = np.zeros_like(p)
+    BL[:, :-1] = p[:, :-1]*Q_block
+    ST[:, 1:] = p[:, 1:]*Q_starve
+    return WIP, BL, ST
+
+
+@instrumented("performance_measure_multiply_machine_bernoulli_batch")
+def performance_measure_multiply_machine_bernoulli_batch(
+    p: ArrayLike,
+    N: ArrayLike,
+    t: ArrayLike = 1.0,
+    rounded: bool = True,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS,
+    as_result: bool = False
+) -> Union[Dict[str, np.ndarray], LineResultBatch]:
+    """
+    Vectorized version of performance_measure_multiply_machine_bernoulli for K lines of
+    the same length M.
+
+    The lines are aggregated with aggregation_of_bernoulli_lines_batch and the measures
+    are computed for all lines and buffers at once, from the unrounded p^f and p^b.
+
+    Parameters:
+        p (ArrayLike): (K, M) array, the probability of each machine working at any time
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        t (ArrayLike, optional): The time period of the system, scalar or (K,). Defaults to 1.0.
+        rounded (bool, optional): Round PR, BL, ST, TP, p^f and p^b to four decimals and WIP and
+            TotalWIP to two decimals. Defaults to True.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+        as_result (bool, optional): Return the unrounded measures as a LineResultBatch, which
+            rounds on export. Defaults to False.
+
+    Returns:
+        dict or LineResultBatch: Arrays p (K, M), pf (K, M), pb (K, M), N (K, M - 1), ST (K, M), BL (K, M),
+        WIP (K, M - 1), PR (K,), TotalWIP (K,) and TP (K,)
+    """
+    record = current_record()
+    p, N = _line_batch_inputs(p, N)
+    if record is not None:
+        record.lap("validation")
+    p_f, p_b = aggregation_of_bernoulli_lines_batch(p, N, tol, max_iter=max_iter)
+    if record is not None:
+        record.lap("aggregation")
+    WIP, BL, ST = _line_metrics(p, p_f, p_b, N)
+    if record is not None:
+        record.lap("metrics")
+    if as_result:
+        result = LineResultBatch()
+        result.append(p, p_f, p_b, N, ST, BL, WIP, t)
+        return result
+    PR = p_b[:, 0].copy()
+    TotalWIP = WIP.sum(axis=1)
+    TP = PR/np.asarray(t, dtype=float)
+    if rounded:
+        p_f, p_b, PR, BL, ST, TP = (np.round(x, 4) for x in (p_f, p_b, PR, BL, ST, TP))
+        WIP, TotalWIP = np.round(WIP, 2), np.round(TotalWIP, 2)
+    return {"p": p, "pf": p_f, "pb": p_b, "ST": ST, "BL": BL, "N": N,
+            "WIP": WIP, "PR": PR, "TotalWIP": TotalWIP, "TP": TP}
+
+
+def _agg_machines_kernel(c: np.ndarray, T_up: np.ndarray, T_down: np.ndarray, mode: str) -> tuple:
+    """
+    Aggregate the machines along the last axis of c, T_up and T_down (in parts/sec and seconds).
+
+    In parallel mode every machine i is weighted by the leave-one-out product
+    prod_{j != i}(1/T_up_j + 1/T_down_j). The common factor prod_j(1/T_up_j + 1/T_down_j)
+    cancels between the numerators and the denominator of the aggregated times, so the
+    weights are computed as 1/(1/T_up_i + 1/T_down_i): O(S) and free of the underflow of
+    the full products for large S.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: c_agg, T_up_agg and T_down_agg, unrounded
+    """
+    S = c.shape[-1]
+    if mode == 'parallel':
+        weight = 1/(1/T_up + 1/T_down)
+        T_up_agg = np.sum(c/T_down*weight, axis=-1)
+        T_down_agg = np.sum(c/T_up*weight, axis=-1)
+        T_agg_denominator = np.sum(weight/(T_up*T_down), axis=-1)
+        c_agg = np.sum(c, axis=-1)
+        coef = S/c_agg/T_agg_denominator
+        return c_agg, T_up_agg*coef, T_down_agg*coef
+    product_term = np.prod(T_up/(T_up + T_down), axis=-1)
+    mean_term = np.mean(T_up + T_down, axis=-1)
+    c_agg = np.min(c, axis=-1)
+    return c_agg, mean_term*product_term, mean_term*(1 - product_term)
+
+
+def _agg_batch_inputs(c, T_up, T_down, mode: str, c_unit: str, T_up_unit: str,
+                      T_down_unit: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Validate the arguments of agg_machines_batch and convert c, T_up and T_down to (K, S) float arrays"""
+    c, T_up, T_down = (np.atleast_2d(np.asarray(x, dtype=float)) for x in (c, T_up, T_down))
+    if c.ndim != 2 or c.shape != T_up.shape or c.shape != T_down.shape:
+        raise ValueError("Parameters 'c', 'T_up' and 'T_down' must be (K, S) arrays of the same shape")
+    if c.shape[1] == 0:
+        raise ValueError("Parameter S must be positive integer valued")
+    for param, value in (('c', c), ('T_up', T_up), ('T_down', T_down)):
+        if not np.all(np.isfinite(value) & (value > 0)):
+            raise ValueError(f"Parameter '{param}' must contain positive numeric values")
+    for param, value, expected_range in (('mode', mode, VALID_MODES),
+                                         ('c_unit', c_unit, VALID_PRODUCTION_UNITS),
+                                         ('T_up_unit', T_up_unit, VALID_TIME_UNITS),
+                                         ('T_down_unit', T_down_unit, VALID_TIME_UNITS)):
+        if value not in expected_range:
+            raise ValueError(f"Parameter '{param}' must be in {expected_range}")
+    return c, T_up, T_down
+
+
+def agg_machines_batch(
+    c: ArrayLike,
+    T_up: ArrayLike,
+    T_down: ArrayLike,
+    mode: str = 'parallel',
+    c_unit: str = 'parts/sec',
+    T_up_unit: str = 'seconds',
+    T_down_unit: str = 'seconds',
+    rounded: bool = True,
+    validate: bool = True
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized version of agg_machines for K cells of S machines each.
+
+    Parameters:
+        c (ArrayLike): (K, S) array of machine capacities, a 1-D array is a single cell
+        T_up (ArrayLike): (K, S) array of up times
+        T_down (ArrayLike): (K, S) array of down times
+        mode (str, optional): parallel or consecutive dependent. Defaults to 'parallel'.
+        c_unit (str, optional): Unit of c. Defaults to 'parts/sec'.
+        T_up_unit (str, optional): Unit of T_up. Defaults to 'seconds'.
+        T_down_unit (str, optional): Unit of T_down. Defaults to 'seconds'.
+        rounded (bool, optional): Round the results to four decimals like agg_machines. Defaults to True.
+        validate (bool, optional): Check the arguments, False for already validated grids. Defaults to True.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (K,) arrays c_agg, T_up_agg and T_down_agg,
+        in the units of the inputs
+    """
+    if validate:
+        c, T_up, T_down = _agg_batch_inputs(c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit)
+    else:
+        c, T_up, T_down = (np.atleast_2d(np.asarray(x, dtype=float)) for x in (c, T_up, T_down))
+
+    c_agg, T_up_agg, T_down_agg = _agg_machines_kernel(
+        c*UNIT_MAPPING[c_unit], T_up*UNIT_MAPPING[T_up_unit], T_down*UNIT_MAPPING[T_down_unit], mode
+    )
+    c_agg = c_agg/UNIT_MAPPING[c_unit]
+    T_up_agg = T_up_agg/UNIT_MAPPING[T_up_unit]
+    T_down_agg = T_down_agg/UNIT_MAPPING[T_down_unit]
+    if rounded:
+        c_agg, T_up_agg, T_down_agg = np.round(c_agg, 4), np.round(T_up_agg, 4), np.round(T_down_agg, 4)
+    return c_agg, T_up_agg, T_down_agg
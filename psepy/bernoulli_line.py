@@ -1,9 +1,44 @@
-from typing import List, Dict, Union
+from typing import Iterable, List, Dict, Optional, Union
+import numpy as np
+from .aggregation import BernoulliAggregationEngine
+from .batch import _line_metrics
+from .distribution import buffer_distribution
+from .results import LineResult
 from .validators import InputValidator
 
 class BernoulliLine:
-    def __init__(self):
+    """
+    Bernoulli line model.
+
+    Without arguments it is a calculator for two-machine lines. Given the machine
+    probabilities p and buffer capacities N it also keeps the converged p^f and p^b of
+    the line, so that after set_p / set_N / update the aggregation is warm-started from
+    the previous fixed point instead of from p. Keyword arguments such as tol, max_iter
+    and method are passed to BernoulliAggregationEngine.solve. validate=False skips the
+    checks of p and N, for lines taken from an already validated batch.
+    """
+
+    def __init__(
+        self,
+        p: Optional[Iterable[float]] = None,
+        N: Optional[Iterable[int]] = None,
+        t: float = 1.0,
+        validate: bool = True,
+        **solver_options
+    ):
         self.validator = InputValidator()
+        self.t = t
+        self.solver_options = solver_options
+        self.result = None
+        self._p = None
+        self._N = None
+        self._engine = None
+        self._p_f = None
+        self._p_b = None
+        self._solved = False
+        self.iterations = 0
+        if p is not None or N is not None:
+            self.set_line(p, N, validate)
 
     def calculate_buffer_probabilities(self, p1: float, p2: float, N: int) -> List[float]:
         """Calculate probability of buffer states for two-machine Bernoulli line"""
@@ -26,6 +61,111 @@ class BernoulliLine:
 
     def _different_probability_case(self, p1: float, p2: float, N: int) -> List[float]:
         """Calculate buffer probabilities when p1 is not equal to p2"""
-        alpha = p1*(1 - p2)/(p2*(1 - p1))
-        P_0 = (1 - p2)/(1 - p2 + sum([alpha**i for i in range(1, N + 1)]))
-        return [P_0] + [alpha**i/(1 - p2)*P_0 for i in range(1, N + 1)] 
\ No newline at end of file
+        return buffer_distribution(p1, p2, N)
+
+    # Multi-machine line state
+
+    def _validate_p(self, value: float, index: int) -> float:
+        self.validator.validate_probability(value, f"p[{index}]")
+        return float(value)
+
+    def _validate_N(self, value: int, index: int) -> int:
+        if isinstance(value, np.integer):
+            value = int(value)
+        self.validator.validate_positive_int(value, f"N[{index}]")
+        return value
+
+    def _require_line(self) -> None:
+        if self._p is None:
+            raise ValueError("The line is not defined, call set_line(p, N) first")
+
+    def set_line(self, p: Iterable[float], N: Iterable[int], validate: bool = True) -> None:
+        """Define the line; the next solve starts from scratch"""
+        if p is None or N is None:
+            raise ValueError("Parameters 'p' and 'N' must both be given")
+        if validate:
+            p = self.validator.validate_probability_array(p, "p", (None,))
+            N = self.validator.validate_positive_int_array(N, "N", (None,))
+            if len(p) < 2:
+                raise ValueError("A line must have at least two machines")
+            if len(N) != len(p) - 1:
+                raise ValueError(f"Parameter 'N' must have length of {len(p) - 1}")
+            p, N = p.tolist(), N.tolist()
+        else:
+            p, N = [float(value) for value in p], [int(value) for value in N]
+        self._p = p
+        self._N = N
+        self._engine = BernoulliAggregationEngine(len(p))
+        self._p_f = None
+        self._p_b = None
+        self._solved = False
+
+    @property
+    def M(self) -> int:
+        self._require_line()
+        return len(self._p)
+
+    @property
+    def p(self) -> List[float]:
+        self._require_line()
+        return list(self._p)
+
+    @property
+    def N(self) -> List[int]:
+        self._require_line()
+        return list(self._N)
+
+    def set_p(self, index: int, value: float) -> None:
+        """Change the probability of machine `index`, keeping the converged state for a warm start"""
+        self._require_line()
+        self._p[index] = self._validate_p(value, index)
+        self._solved = False
+
+    def set_N(self, index: int, value: int) -> None:
+        """Change the capacity of buffer `index`, keeping the converged state for a warm start"""
+        self._require_line()
+        self._N[index] = self._validate_N(value, index)
+        self._solved = False
+
+    def update(self, p: Optional[Dict[int, float]] = None, N: Optional[Dict[int, int]] = None) -> None:
+        """Change several parameters at once, given as {index: value} mappings"""
+        for index, value in (p or {}).items():
+            self.set_p(index, value)
+        for index, value in (N or {}).items():
+            self.set_N(index, value)
+
+    def solve(self) -> None:
+        """Aggregate the line, warm-started from the last converged p^f and p^b if there are any"""
+        self._require_line()
+        if self._solved:
+            return
+        self.result = self._engine.solve(self._p, self._N, p_f0=self._p_f, p_b0=self._p_b, **self.solver_options)
+        if not self.result.converged:
+            raise RuntimeError(
+                f"Aggregation did not converge after {self.result.iterations} iterations "
+                f"(residual {self.result.residual:.3g})"
+            )
+        self._p_f = self.result.p_f
+        self._p_b = self.result.p_b
+        self.iterations = self.result.iterations
+        self._solved = True
+
+    @property
+    def p_f(self) -> np.ndarray:
+        self.solve()
+        return self._p_f.copy()
+
+    @property
+    def p_b(self) -> np.ndarray:
+        self.solve()
+        return self._p_b.copy()
+
+    def performance(self) -> Dict[str, Union[float, list]]:
+        """
+        Performance measures of the line, in the format of performance_measure_multiply_machine_bernoulli.
+        """
+        self.solve()
+        p = np.asarray(self._p, dtype=float)[None, :]
+        N = np.asarray(self._N, dtype=float)[None, :]
+        WIP, BL, ST = _line_metrics(p, self._p_f[None, :], self._p_b[None, :], N)
+        return LineResult(p[0], self._p_f, self._p_b, self._N, ST[0], BL[0], WIP[0], self.t).to_dict()
@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Union
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits/total if total else 0.0
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used memo for the two-machine formulas.
+
+    Entries are keyed on (function name, p1, p2, N) with p1 and p2 rounded to
+    `decimals` decimals, and the function is evaluated at the rounded arguments, so a
+    cached result never depends on which caller populated the entry. When the cache
+    holds `maxsize` entries, the least recently used one is evicted.
+    """
+
+    def __init__(self, maxsize: int = 65536, decimals: int = 12):
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError(f"Parameter 'maxsize' must be a positive integer, got {maxsize}")
+        if not isinstance(decimals, int) or decimals < 0:
+            raise ValueError(f"Parameter 'decimals' must be a non-negative integer, got {decimals}")
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, name: str, func: Callable, p1: float, p2: float, N: int):
+        """
+        Return func(p1, p2, N) for the quantized arguments, computing it on a miss.
+
+        func is called with cache=False so that it does not consult any cache itself.
+        Mutable results (lists and dicts) are returned as copies.
+        """
+        p1 = round(p1, self.decimals)
+        p2 = round(p2, self.decimals)
+        key = (name, p1, p2, N)
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if value is None:
+            value = func(p1, p2, N, cache=False)
+            with self._lock:
+                self.misses += 1
+                self._data[key] = value
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return value.copy() if isinstance(value, (list, dict)) else value
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._data), self.maxsize)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the statistics"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        # an empty cache is still a cache
+        return True
+
+
+_process_cache: Optional[LRUCache] = None
+
+
+def enable_cache(maxsize: int = 65536, decimals: int = 12) -> LRUCache:
+    """Install a process-wide cache used by every call that does not pass its own cache"""
+    global _process_cache
+    _process_cache = LRUCache(maxsize, decimals)
+    return _process_cache
+
+
+def disable_cache() -> None:
+    """Remove the process-wide cache"""
+    global _process_cache
+    _process_cache = None
+
+
+def get_cache() -> Optional[LRUCache]:
+    """Return the process-wide cache, or None if caching is disabled"""
+    return _process_cache
+
+
+def resolve_cache(cache: Union[LRUCache, bool, None]) -> Optional[LRUCache]:
+    """
+    Resolve the `cache` argument of the solver functions.
+
+    None selects the process-wide cache (if enabled), True the process-wide cache,
+    enabling it with the default settings if needed, False disables caching for the
+    call and an LRUCache instance is used as is.
+    """
+    if cache is None:
+        return _process_cache
+    if cache is False:
+        return None
+    if cache is True:
+        return _process_cache or enable_cache()
+    if not isinstance(cache, LRUCache):
+        raise TypeError(f"Parameter 'cache' must be an LRUCache, None, True or False, got {type(cache).__name__}")
+    return cache
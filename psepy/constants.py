@@ -16,4 +16,10 @@ VALID_TIME_UNITS = ['seconds', 'minutes', 'hours']
 VALID_PRODUCTION_UNITS = ['parts/sec', 'parts/min', 'parts/hour']
 
 # Convergence threshold for iterative calculations
-CONVERGENCE_THRESHOLD = 1e-6 
\ No newline at end of file
+CONVERGENCE_THRESHOLD = 1e-6
+
+# Iteration cap and acceleration methods of the Bernoulli line aggregation
+MAX_ITERATIONS = 10000
+AGGREGATION_METHODS = ['gauss-seidel', 'sor', 'aitken', 'anderson'] 
+# Search methods of the buffer allocation optimizer
+OPTIMIZATION_METHODS = ['greedy', 'exact']
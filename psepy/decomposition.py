@@ -0,0 +1,255 @@
+"""
+Domain decomposition of the aggregation of long Bernoulli lines.
+
+The line is split into `segments` contiguous cores. Segment s is swept on a window that
+covers its core, `overlap` more machines on each side and one ghost machine at each end;
+all windows have the same length, so the windows of a worker are swept together as one
+batch of lines by the engine of aggregation_of_bernoulli_lines_batch. The ghost machines
+carry the boundary values of the neighbours: the first machine of a window is the
+forward-aggregated p^f of that machine and the last one the backward-aggregated p^b, so
+a window is an ordinary Bernoulli line whose first p^f and last p^b are held fixed, like
+the boundary conditions p^f_1 = p_1 and p^b_M = p_M of the full line.
+
+Every round, each window makes one backward/forward sweep from the state of the previous
+round and writes the p^f and p^b of its core into the state of the next round; the
+boundary values exchanged between neighbours are therefore one round old. One sweep per
+round keeps the rounds close to the sweeps of the sequential recursion, which converges
+the slow global modes of the fixed point; solving the segments to convergence between
+exchanges instead makes the boundary values oscillate between neighbours. The iteration
+stops when p^f and p^b change by less than tol in one round, the criterion of
+aggregation_of_bernoulli_lines.
+
+A round costs one sweep of a window, O(M/segments) vectorized steps, instead of O(M)
+scalar steps. With workers > 1 the windows are split between worker processes that
+keep the state in shared memory, double buffered (round r reads one copy and writes the
+other), and meet at a barrier after every round. A round only reads the state of the
+previous one, so the result depends on the segments and the overlap but not on the
+number of workers.
+"""
+import multiprocessing
+import os
+import threading
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+from .batch import _line_metrics
+from .constants import CONVERGENCE_THRESHOLD, MAX_ITERATIONS
+from .instrumentation import current_record, instrumented
+from .models import BERNOULLI, _sweep_model_lines
+from .results import LineResult
+from .sweep import _SharedArrays, _attach, _detach
+from .validators import InputValidator
+
+
+def _windows(M: int, segments: int, overlap: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Cores [a, b) of the segments and first machines lo of their windows of common length L.
+    A window is shifted inwards at the ends of the line, where it needs no ghost machine.
+    """
+    bounds = np.linspace(0, M, segments + 1).round().astype(np.int64)
+    a, b = bounds[:-1], bounds[1:]
+    L = min(int((b - a).max()) + 2 + 2*overlap, M)
+    lo = np.clip(a - 1 - overlap, 0, M - L)
+    return lo, a, b, L
+
+
+class _Windows:
+    """The windows of one worker, swept as a batch of K lines of length L"""
+
+    def __init__(self, p: np.ndarray, N: np.ndarray, lo: np.ndarray, a: np.ndarray, b: np.ndarray, L: int):
+        self.positions = lo[:, None] + np.arange(L)
+        self.x = p[self.positions][:, :, None]
+        self.N = N[self.positions[:, :-1]]
+        core = (self.positions >= a[:, None]) & (self.positions < b[:, None])
+        self.rows, self.cols = np.nonzero(core)
+        self.core = self.positions[core]
+
+    def sweep(self, src: np.ndarray, dst: np.ndarray) -> float:
+        """One sweep of every window from the (2, M) p^f, p^b state src; writes the cores into dst"""
+        x_f = src[0][self.positions][:, :, None]
+        x_b = src[1][self.positions][:, :, None]
+        # ghost machines: at the ends of the line they are the first and last machines
+        self.x[:, 0] = x_f[:, 0]
+        self.x[:, -1] = x_b[:, -1]
+        _sweep_model_lines(BERNOULLI, self.x, self.N, x_f, x_b)
+        change = 0.0
+        for side, values in enumerate((x_f, x_b)):
+            values = values[self.rows, self.cols, 0]
+            # np.maximum, unlike max, propagates NaN
+            change = np.maximum(change, np.abs(values - src[side][self.core]).max())
+            dst[side][self.core] = values
+        return float(change)
+
+
+class _NoSharedArrays(_SharedArrays):
+    """_SharedArrays in private memory, for a single worker"""
+
+    def create(self, name: str, shape: tuple, dtype=float, data: Optional[np.ndarray] = None) -> np.ndarray:
+        array = np.empty(shape, dtype=dtype)
+        if data is not None:
+            array[...] = data
+        self.arrays[name] = array
+        return array
+
+
+def _rounds(windows: _Windows, state: np.ndarray, change: np.ndarray, worker: int,
+            barrier: Optional[threading.Barrier], tol: float, max_iter: int, record=None) -> int:
+    """
+    Sweep the windows round after round until the change of the whole state is below tol.
+    state is the (2, 2, M) double buffer, change the (2, workers) changes of the rounds.
+
+    Returns:
+        int: The number of rounds, 0 if the state did not converge in max_iter rounds. A
+        NaN change also ends the rounds, in every worker at the same round.
+    """
+    for r in range(max_iter):
+        change[r % 2, worker] = windows.sweep(state[r % 2], state[1 - r % 2])
+        if barrier is not None:
+            barrier.wait()
+        # the changes of round r are only overwritten in round r + 2, after the next barrier
+        residual = change[r % 2].max()
+        if record is not None:
+            record.iteration(residual)
+        if not residual >= tol:
+            return r + 1
+    return 0
+
+
+def _worker(spec: dict, barrier, worker: int, lo: np.ndarray, a: np.ndarray, b: np.ndarray, L: int,
+            tol: float, max_iter: int) -> None:
+    blocks, arrays = _attach(spec)
+    try:
+        windows = _Windows(arrays["p"], arrays["N"], lo, a, b, L)
+        _rounds(windows, arrays["state"], arrays["change"], worker, barrier, tol, max_iter)
+    except BaseException:
+        # release the other workers instead of leaving them at the barrier
+        barrier.abort()
+        raise
+    finally:
+        _detach(blocks, arrays)
+
+
+@instrumented("aggregation_of_bernoulli_lines_decomposed")
+def aggregation_of_bernoulli_lines_decomposed(
+    p: Iterable[float],
+    N: Iterable[int],
+    segments: Optional[int] = None,
+    overlap: int = 0,
+    workers: Optional[int] = 1,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The aggregation of aggregation_of_bernoulli_lines for one long line, by domain
+    decomposition into segments swept in parallel; see the module docstring.
+
+    Parameters:
+        p (Iterable[float]): The probability of each machine working at any time
+        N (Iterable[int]): The maximum capacity of the buffer between each machine
+        segments (int, optional): Number of segments. Defaults to one per 64 machines.
+        overlap (int, optional): Machines of the neighbouring segments swept with each segment,
+            besides its ghost machines. Defaults to 0.
+        workers (int, optional): Number of processes sharing the segments, None uses os.cpu_count().
+            Defaults to 1.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of rounds. Defaults to MAX_ITERATIONS.
+
+    Raises:
+        ValueError: If p^f or p^b become NaN or infinite, on degenerate machines
+        RuntimeError: If p^f and p^b have not converged after max_iter rounds
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: p^f and p^b, arrays of length M
+    """
+    record = current_record()
+    p = InputValidator.validate_probability_array(p, "p", (None,))
+    M = p.size
+    if M < 2:
+        raise ValueError("A line must have at least two machines")
+    N = InputValidator.validate_positive_int_array(N, "N", (M - 1,)).astype(float)
+    if segments is None:
+        segments = max(1, M//64)
+    InputValidator.validate_positive_int(segments, "segments")
+    if segments > M:
+        raise ValueError(f"Parameter 'segments' must not exceed the number of machines {M}, got {segments}")
+    if not isinstance(overlap, int) or overlap < 0:
+        raise ValueError(f"Parameter 'overlap' must be a non-negative integer, got {overlap}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    InputValidator.validate_positive_int(workers, "workers")
+    InputValidator.validate_positive_int(max_iter, "max_iter")
+    workers = min(workers, segments)
+    lo, a, b, L = _windows(M, segments, overlap)
+    shares = np.array_split(np.arange(segments), workers)
+    if record is not None:
+        record.lap("validation")
+
+    with _SharedArrays() if workers > 1 else _NoSharedArrays() as shared:
+        shared.create("p", (M,), data=p)
+        shared.create("N", (M - 1,), data=N)
+        state = shared.create("state", (2, 2, M), data=p)
+        change = shared.create("change", (2, workers))
+        barrier, processes = None, []
+        if workers > 1:
+            context = multiprocessing.get_context()
+            barrier = context.Barrier(workers)
+            for worker, share in enumerate(shares[1:], 1):
+                process = context.Process(
+                    target=_worker, args=(shared.spec(), barrier, worker, lo[share], a[share], b[share], L, tol, max_iter),
+                    daemon=True
+                )
+                process.start()
+                processes.append(process)
+        try:
+            # the calling process sweeps the first share of the windows
+            windows = _Windows(p, N, lo[shares[0]], a[shares[0]], b[shares[0]], L)
+            rounds = _rounds(windows, state, change, 0, barrier, tol, max_iter, record)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("A worker process of the decomposition failed") from None
+        except BaseException:
+            if barrier is not None:
+                barrier.abort()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+        if not rounds:
+            if record is not None:
+                record.converged = False
+            raise RuntimeError(f"Aggregation did not converge after {max_iter} rounds")
+        p_f, p_b = state[rounds % 2].copy()
+    if not (np.all(np.isfinite(p_f)) and np.all(np.isfinite(p_b))):
+        if record is not None:
+            record.converged = False
+        raise ValueError("Aggregation produced non-finite machine parameters; the line has degenerate machines")
+    if record is not None:
+        record.converged = True
+        record.lap("aggregation")
+    return p_f, p_b
+
+
+@instrumented("performance_measure_multiply_machine_bernoulli_decomposed")
+def performance_measure_multiply_machine_bernoulli_decomposed(
+    p: Iterable[float],
+    N: Iterable[int],
+    t: float = 1.0,
+    segments: Optional[int] = None,
+    overlap: int = 0,
+    workers: Optional[int] = 1,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS,
+    as_result: bool = False,
+    rounded: bool = True
+) -> Union[dict, LineResult]:
+    """
+    performance_measure_multiply_machine_bernoulli for one long line, aggregated with
+    aggregation_of_bernoulli_lines_decomposed. Returns the same dict, or a LineResult.
+    """
+    p_f, p_b = aggregation_of_bernoulli_lines_decomposed(p, N, segments, overlap, workers, tol, max_iter)
+    p_a = np.asarray(p, dtype=float)[None, :]
+    N_a = np.asarray(N, dtype=float)[None, :]
+    WIP, BL, ST = _line_metrics(p_a, p_f[None, :], p_b[None, :], N_a)
+    result = LineResult(p_a[0], p_f, p_b, N_a[0].astype(int), ST[0], BL[0], WIP[0], t)
+    record = current_record()
+    if record is not None:
+        record.lap("metrics")
+    return result if as_result else result.to_dict(rounded)
@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import numpy as np
+from .scalar import _LogDistribution as _ScalarLogDistribution
+
+DISTRIBUTION_OUTPUTS = ['list', 'array', 'stream']
+
+
+class _LogDistribution(_ScalarLogDistribution):
+    """Buffer distribution of a two-machine Bernoulli line in log space, see psepy.scalar"""
+
+    def array(self) -> np.ndarray:
+        if self.empty:
+            P = np.zeros(self.N + 1)
+            P[0] = 1.0
+            return P
+        P = np.arange(-self.top, self.N + 1 - self.top, dtype=float)
+        P *= self.t
+        P -= self.log_Z
+        P[0] = self.log_P(0)
+        return np.exp(P, out=P)
+
+
+def buffer_distribution(
+    p1: float,
+    p2: float,
+    N: int,
+    output: str = 'list'
+) -> Union[List[float], np.ndarray, Iterator[float]]:
+    """
+    Probability of the buffer between two Bernoulli machines holding 0..N parts.
+
+    Same distribution as P_function_two_machine_bernoulli,
+    P_0 = (1 - p_2)/(1 - p_2 + \\alpha + \\ldots + \\alpha^N), P_i = \\alpha^i/(1 - p_2) P_0,
+    computed in log space: the normalizer uses the closed form of the geometric series
+    and every P_i is exp(i log(alpha) - log Z), so large N and alpha > 1 neither
+    overflow nor cost more than one pass.
+
+    Parameters:
+    p1 (float): The probability of machine 1 working at any given time
+    p2 (float): The probability of machine 2 working at any given time
+    N (int): The maximum capacity of the buffer between the two machines
+    output (str, optional): 'list', 'array' for a NumPy array, or 'stream' for a generator
+    yielding P_0..P_N one at a time. Defaults to 'list'.
+
+    Returns:
+    list, np.ndarray or generator: The probability of the buffer being 0-N at any given time
+    """
+    if output not in DISTRIBUTION_OUTPUTS:
+        raise ValueError(f"Parameter 'output' must be in {DISTRIBUTION_OUTPUTS}")
+    distribution = _LogDistribution(p1, p2, N)
+    if output == 'stream':
+        return distribution.stream()
+    P = distribution.array()
+    return P if output == 'array' else P.tolist()
+
+
+def buffer_distribution_summary(
+    p1: float,
+    p2: float,
+    N: int,
+    tail: Optional[Iterable[int]] = None
+) -> Dict[str, Union[float, Dict[int, float]]]:
+    """
+    Summary statistics of the buffer distribution, without building the distribution.
+
+    Parameters:
+    p1 (float): The probability of machine 1 working at any given time
+    p2 (float): The probability of machine 2 working at any given time
+    N (int): The maximum capacity of the buffer between the two machines
+    tail (Iterable[int], optional): Levels k for which P(n >= k) is returned
+
+    Returns:
+    dict: P0 and PN, the probabilities of an empty and of a full buffer, mean, the
+    expected buffer level, and tail, a {k: P(n >= k)} mapping
+    """
+    distribution = _LogDistribution(p1, p2, N)
+    return {
+        "P0": distribution.P0(),
+        "PN": distribution.tail(distribution.N),
+        "mean": distribution.mean(),
+        "tail": {int(k): distribution.tail(int(k)) for k in (tail or ())}
+    }
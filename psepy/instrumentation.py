@@ -0,0 +1,214 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class SolveRecord:
+    """
+    What one top-level solve spent: seconds per stage, sweeps with their residuals,
+    convergence and Q cache hits and misses.
+
+    Stages are timed as laps: lap(name) adds the time since the previous lap (or the start)
+    to the stage `name`. Solvers called by another solver add to the record of the outer
+    one, so a record always describes a whole call.
+    """
+
+    __slots__ = ("solver", "stages", "iterations", "residuals", "converged", "cache_hits",
+                 "cache_misses", "duration", "_trace", "_cache", "_cache_start", "_start", "_last",
+                 "_depth", "_token", "_collector")
+
+    def __init__(self, solver: str, collector: "Instrumentation"):
+        self.solver = solver
+        self.stages: Dict[str, float] = {}
+        self.iterations = 0
+        self.residuals: List[float] = []
+        self.converged: Optional[bool] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.duration = 0.0
+        self._trace = collector.trace_residuals
+        self._collector = collector
+        self._cache = None
+        self._depth = 0
+        self._token = None
+        self._start = self._last = time.perf_counter()
+
+    def use_cache(self, cache) -> None:
+        """Count the hits and misses of `cache` (an LRUCache) from now on"""
+        if cache and self._cache is None:
+            self._cache = cache
+            self._cache_start = (cache.hits, cache.misses)
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def iteration(self, residual: float) -> None:
+        self.iterations += 1
+        if self._trace:
+            self.residuals.append(float(residual))
+
+    def _finish(self) -> None:
+        self.duration = time.perf_counter() - self._start
+        if self._cache is not None:
+            self.cache_hits = self._cache.hits - self._cache_start[0]
+            self.cache_misses = self._cache.misses - self._cache_start[1]
+        self._collector._add(self)
+
+    def to_dict(self) -> dict:
+        return {"solver": self.solver, "duration": self.duration, "stages": dict(self.stages),
+                "iterations": self.iterations, "residuals": list(self.residuals), "converged": self.converged,
+                "cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
+
+    def __repr__(self):
+        return (f"SolveRecord({self.solver!r}, duration={self.duration:.3g}, "
+                f"iterations={self.iterations}, converged={self.converged})")
+
+
+class Instrumentation:
+    """
+    Collector of SolveRecords.
+
+    Keeps the last `keep` records, calls the registered callbacks with every finished record
+    and aggregates counters per solver: solves, failed (unconverged) solves, iterations,
+    cache hits and misses, total seconds and seconds per stage.
+    """
+
+    def __init__(self, trace_residuals: bool = True, keep: int = 1000):
+        if not isinstance(keep, int) or keep < 0:
+            raise ValueError(f"Parameter 'keep' must be a non-negative integer, got {keep}")
+        self.trace_residuals = trace_residuals
+        self.records = deque(maxlen=keep)
+        self._callbacks: List[Callable[[SolveRecord], None]] = []
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[SolveRecord], None]) -> None:
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[SolveRecord], None]) -> None:
+        self._callbacks.remove(callback)
+
+    def _add(self, record: SolveRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            counters = self._counters.setdefault(record.solver, {
+                "solves": 0, "unconverged": 0, "iterations": 0, "cache_hits": 0, "cache_misses": 0, "seconds": 0.0
+            })
+            counters["solves"] += 1
+            counters["unconverged"] += record.converged is False
+            counters["iterations"] += record.iterations
+            counters["cache_hits"] += record.cache_hits
+            counters["cache_misses"] += record.cache_misses
+            counters["seconds"] += record.duration
+            for stage, seconds in record.stages.items():
+                counters[f"seconds_{stage}"] = counters.get(f"seconds_{stage}", 0.0) + seconds
+        for callback in self._callbacks:
+            callback(record)
+
+    def counters(self) -> Dict[str, Dict[str, float]]:
+        """Aggregated counters, {solver: {counter: value}}"""
+        with self._lock:
+            return {solver: dict(counters) for solver, counters in self._counters.items()}
+
+    def export(self, prefix: str = "psepy") -> str:
+        """The counters in the Prometheus text format, one sample per solver and counter"""
+        lines = []
+        for solver, counters in sorted(self.counters().items()):
+            for name, value in counters.items():
+                if name.startswith("seconds_"):
+                    lines.append(f'{prefix}_stage_seconds_total{{solver="{solver}",stage="{name[8:]}"}} {value}')
+                else:
+                    lines.append(f'{prefix}_{name}_total{{solver="{solver}"}} {value}')
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self._counters.clear()
+
+
+_collector: Optional[Instrumentation] = None
+_current: ContextVar = ContextVar("psepy_solve_record", default=None)
+
+
+class _Solve:
+    """Context of one solve: opens a SolveRecord, or joins the one of the enclosing solve"""
+
+    __slots__ = ("record",)
+
+    def __init__(self, solver: str, collector: Instrumentation):
+        record = _current.get()
+        if record is None:
+            record = SolveRecord(solver, collector)
+            record._token = _current.set(record)
+        record._depth += 1
+        self.record = record
+
+    def __enter__(self) -> SolveRecord:
+        return self.record
+
+    def __exit__(self, *exc) -> None:
+        record = self.record
+        record._depth -= 1
+        if record._depth == 0:
+            _current.reset(record._token)
+            record._finish()
+
+
+def instrumented(solver: str) -> Callable:
+    """
+    Decorator of the solvers: while instrumentation is enabled every call is recorded
+    under `solver`; while it is disabled the wrapper costs one global lookup.
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            collector = _collector
+            if collector is None:
+                return func(*args, **kwargs)
+            with _Solve(solver, collector):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_record() -> Optional[SolveRecord]:
+    """The SolveRecord of the running solve, None when instrumentation is disabled"""
+    return None if _collector is None else _current.get()
+
+
+def enable_instrumentation(trace_residuals: bool = True, keep: int = 1000) -> Instrumentation:
+    """Install a process-wide collector that records every solve"""
+    global _collector
+    _collector = Instrumentation(trace_residuals, keep)
+    return _collector
+
+
+def disable_instrumentation() -> None:
+    """Remove the process-wide collector"""
+    global _collector
+    _collector = None
+
+
+def get_instrumentation() -> Optional[Instrumentation]:
+    """Return the process-wide collector, or None if instrumentation is disabled"""
+    return _collector
+
+
+@contextmanager
+def instrument(trace_residuals: bool = True, keep: int = 1000) -> Iterator[Instrumentation]:
+    """Record the solves of a block with a fresh collector, then restore the previous one"""
+    global _collector
+    previous = _collector
+    collector = Instrumentation(trace_residuals, keep)
+    _collector = collector
+    try:
+        yield collector
+    finally:
+        _collector = previous
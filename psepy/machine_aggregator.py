@@ -16,8 +16,9 @@ class MachineAggregator:
         mode: str = 'parallel',
         c_unit: str = 'parts/sec',
         T_up_unit: str = 'seconds',
-        T_down_unit: str = 'seconds'
+        T_down_unit: str = 'seconds',
+        validate: bool = True
     ) -> Tuple[float, float, float]:
-        """Aggregating machines for structural modeling"""
+        """Aggregating machines for structural modeling; validate=False skips the checks of pre-validated inputs"""
         from .core import agg_machines  # Import here to avoid circular imports
-        return agg_machines(S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit) 
\ No newline at end of file
+        return agg_machines(S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit, validate) 
\ No newline at end of file
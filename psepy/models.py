@@ -0,0 +1,622 @@
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+from .batch import ArrayLike, _Q_kernel, _two_machine_terms
+from .constants import (
+    CONVERGENCE_THRESHOLD,
+    MAX_ITERATIONS,
+    UNIT_MAPPING,
+    VALID_TIME_UNITS,
+    VALID_PRODUCTION_UNITS
+)
+from .instrumentation import current_record, instrumented
+
+# phases of a pair of machines: index 2a + b, a and b the states (0 down, 1 up) of machines 1 and 2
+_PHASES = 4
+# phase columns of a slot that moves the buffer of a geometric pair up, down or nowhere
+_UP = np.array([0., 0., 1., 0.])
+_DOWN = np.array([0., 1., 0., 0.])
+_STAY = np.array([1., 0., 0., 1.])
+# at level 0 machine 2 cannot take, at level N machine 1 puts only if machine 2 takes
+_UP_EMPTY = np.array([0., 0., 1., 1.])
+_STAY_EMPTY = np.array([1., 1., 0., 0.])
+_STAY_FULL = np.array([1., 0., 1., 1.])
+# rescale the level sums of the geometric pair above this magnitude
+_RESCALE = 1e150
+
+
+class LineModel:
+    """
+    Reliability model of the machines of a serial line, as seen by the aggregation engine.
+
+    A machine is described by the `parameters` of the model, along the last axis of a
+    (..., n) array. A model supplies the efficiency of its machines, the measures of a
+    two-machine line, and the degradation of a machine by a blocking or starvation
+    probability Q, with efficiency(degrade(x, Q)) = efficiency(x)(1 - Q). Everything
+    else, the forward/backward recursion, batching, warm starts and convergence, is
+    shared by all models.
+    """
+
+    name = ""
+    parameters: Tuple[str, ...] = ()
+    # buffer capacities may be fractional
+    continuous = False
+
+    def check(self, x: np.ndarray) -> None:
+        """Raise ValueError if some machine parameters are outside the model"""
+        raise NotImplementedError
+
+    def efficiency(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def degrade(self, x: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def two_machine(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> tuple:
+        """
+        Measures of two-machine lines, element-wise over the leading axes.
+
+        Returns:
+            tuple[np.ndarray, ...]: PR, the probability Q_starve = ST_2/e_2 of the downstream
+            machine being starved, Q_block = BL_1/e_1 of the upstream machine being blocked, and WIP
+        """
+        raise NotImplementedError
+
+    def starvation(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> np.ndarray:
+        return self.two_machine(upstream, downstream, N)[1]
+
+    def blocking(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> np.ndarray:
+        return self.two_machine(upstream, downstream, N)[2]
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class BernoulliModel(LineModel):
+    """Bernoulli machines, x = (p,): up with probability p in every cycle, independently"""
+
+    name = "bernoulli"
+    parameters = ("p",)
+
+    def check(self, x: np.ndarray) -> None:
+        if not np.all((x >= 0) & (x <= 1)):
+            raise ValueError("Parameter 'p' must be between 0 and 1")
+
+    def efficiency(self, x: np.ndarray) -> np.ndarray:
+        return x[..., 0]
+
+    def degrade(self, x: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        return x*(1 - Q)[..., None]
+
+    def two_machine(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> tuple:
+        p1, p2 = upstream[..., 0], downstream[..., 0]
+        Q_starve, Q_block, WIP = _two_machine_terms(p1, p2, N)
+        return p2*(1 - Q_starve), Q_starve, Q_block, WIP
+
+    def starvation(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> np.ndarray:
+        return _Q_kernel(upstream[..., 0], downstream[..., 0], N)
+
+    def blocking(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> np.ndarray:
+        return _Q_kernel(downstream[..., 0], upstream[..., 0], N)
+
+
+def _geometric_pair(P1: np.ndarray, R1: np.ndarray, P2: np.ndarray, R2: np.ndarray, N: int) -> tuple:
+    """
+    Exact measures of K two-machine geometric lines with the same buffer capacity N.
+
+    The line is the Markov chain of the buffer level h and the machine states. In a cycle
+    the machines change state first; then machine 2 takes a part if it is up and h > 0, and
+    machine 1 puts one if it is up and the buffer is not full, or full and machine 2 takes
+    (blocked before service). Levels are removed from the top with the matrix recursion
+    R_{N-1} = U(I - S_N)^{-1}, R_{h-1} = U(I - S_h - R_h D)^{-1} over the 4x4 blocks of the
+    moves up (U), down (D) and nowhere (S), so that pi_{h+1} = pi_h R_h, while the sums
+    sum_{j>=h} pi_j = pi_h T_h and sum_{j>=h} j pi_j = pi_h W_h are accumulated along the
+    way. pi_0 is the null vector of I - S_0 - R_0 D. Cost O(N) 4x4 products per line.
+    """
+    K = P1.shape[0]
+    m1 = np.stack([np.stack([1 - R1, R1], -1), np.stack([P1, 1 - P1], -1)], -2)
+    m2 = np.stack([np.stack([1 - R2, R2], -1), np.stack([P2, 1 - P2], -1)], -2)
+    # S[(a, b), (a', b')] = m1[a, a'] m2[b, b']
+    S = (m1[:, :, None, :, None]*m2[:, None, :, None, :]).reshape(K, _PHASES, _PHASES)
+    I = np.eye(_PHASES)
+    up, down, stay = S*_UP, S*_DOWN, S*_STAY
+    up_empty = S*_UP_EMPTY
+
+    # T and W are kept divided by the same factor, `scale` is the matching multiple of I
+    scale = np.ones(K)
+    T = np.broadcast_to(I, S.shape).copy()
+    W = N*T
+    R = (up_empty if N == 1 else up) @ np.linalg.inv(I - S*_STAY_FULL)
+    for h in range(N - 1, 0, -1):
+        T = scale[:, None, None]*I + R @ T
+        W = (h*scale)[:, None, None]*I + R @ W
+        size = np.abs(T).max(axis=(1, 2))
+        large = size > _RESCALE
+        if large.any():
+            factor = np.where(large, size, 1.0)
+            T /= factor[:, None, None]
+            W /= factor[:, None, None]
+            scale /= factor
+        R = (up_empty if h == 1 else up) @ np.linalg.inv(I - stay - R @ down)
+    T = scale[:, None, None]*I + R @ T
+    W = R @ W
+
+    A = I - S*_STAY_EMPTY - R @ down
+    # pi_0 A = 0, normalized to sum 1 by a column of ones; the columns of A sum to 0
+    A[:, :, -1] = 1.0
+    pi_0 = np.linalg.solve(np.swapaxes(A, 1, 2), np.broadcast_to(I[:, -1:], (K, _PHASES, 1)))[:, :, 0]
+    mass = np.einsum('ki,kij->k', pi_0, T)
+    levels = np.einsum('ki,kij->kj', pi_0, T) - scale[:, None]*pi_0
+    # machine 2 is up in the next cycle with probability m2[b, 1], b = phase % 2
+    take = np.tile(m2[:, :, 1], (1, 2))
+    PR = np.einsum('kj,kj->k', levels, take)/mass
+    WIP = np.einsum('ki,kij->k', pi_0, W)/mass
+    e1, e2 = R1/(P1 + R1), R2/(P2 + R2)
+    # rounding leaves |Q| ~ 1e-15 where a machine is never starved or blocked
+    return PR, np.clip(1 - PR/e2, 0, 1), np.clip(1 - PR/e1, 0, 1), WIP
+
+
+class GeometricModel(LineModel):
+    """
+    Geometric machines, x = (P, R): an up machine goes down with probability P and a down
+    machine comes back up with probability R in every cycle, so that e = R/(P + R). As in
+    the geometric model of production systems engineering, P + R <= 1.
+    """
+
+    name = "geometric"
+    parameters = ("P", "R")
+
+    def check(self, x: np.ndarray) -> None:
+        P, R = x[..., 0], x[..., 1]
+        if not np.all((P > 0) & (R > 0) & (P + R <= 1)):
+            raise ValueError("Parameters 'P' and 'R' must be positive with P + R <= 1")
+
+    def efficiency(self, x: np.ndarray) -> np.ndarray:
+        return x[..., 1]/(x[..., 0] + x[..., 1])
+
+    def degrade(self, x: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        P, R = x[..., 0], x[..., 1]
+        return np.stack([P + R*Q, R*(1 - Q)], axis=-1)
+
+    def two_machine(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> tuple:
+        upstream, downstream, N = _broadcast_pairs(upstream, downstream, N)
+        shape = N.shape
+        upstream, downstream, N = upstream.reshape(-1, 2), downstream.reshape(-1, 2), N.reshape(-1)
+        results = tuple(np.empty(N.size) for _ in range(4))
+        # one level recursion per distinct capacity
+        for capacity in np.unique(N):
+            rows = np.flatnonzero(N == capacity)
+            values = _geometric_pair(upstream[rows, 0], upstream[rows, 1],
+                                     downstream[rows, 0], downstream[rows, 1], int(capacity))
+            for result, value in zip(results, values):
+                result[rows] = value
+        return tuple(result.reshape(shape) for result in results)
+
+
+def _expm1_ratio(w: np.ndarray) -> np.ndarray:
+    """(e^w - 1)/w, 1 at w = 0"""
+    zero = w == 0
+    safe = np.where(zero, 1.0, w)
+    return np.where(zero, 1.0, np.expm1(safe)/safe)
+
+
+def _moment_ratio(w: np.ndarray) -> np.ndarray:
+    """(e^w(w - 1) + 1)/w^2 = integral of s e^(ws) over [0, 1], for w <= 0"""
+    small = np.abs(w) < 1e-3
+    safe = np.where(small, 1.0, w)
+    series = 0.5 + w/3 + w*w/8 + w**3/30
+    return np.where(small, series, (np.exp(safe)*(safe - 1) + 1)/(safe*safe))
+
+
+class ExponentialModel(LineModel):
+    """
+    Synchronous exponential machines, x = (lambda, mu): up times are exponential with rate
+    lambda and down times with rate mu, so that e = mu/(lambda + mu), and every machine
+    processes at the same rate c. Buffer capacities are given in units of production time,
+    N/c.
+    """
+
+    name = "exponential"
+    parameters = ("lambda", "mu")
+    continuous = True
+
+    def check(self, x: np.ndarray) -> None:
+        if not np.all(np.isfinite(x) & (x > 0)):
+            raise ValueError("Parameters 'lambda' and 'mu' must be positive")
+
+    def efficiency(self, x: np.ndarray) -> np.ndarray:
+        return x[..., 1]/(x[..., 0] + x[..., 1])
+
+    def degrade(self, x: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        lam, mu = x[..., 0], x[..., 1]
+        return np.stack([lam + mu*Q, mu*(1 - Q)], axis=-1)
+
+    def two_machine(self, upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> tuple:
+        """
+        Exact solution of the fluid model of the pair. Inside the buffer the densities of
+        the phases (up, down) and (down, up) coincide and are proportional to e^(zx), with
+        z = -(lambda_1 + lambda_2 + mu_1 + mu_2)(lambda_1 mu_2 - lambda_2 mu_1)/((lambda_1 + lambda_2)(mu_1 + mu_2)),
+        and the probability masses of the empty and full buffer follow from the balance at
+        the boundaries. The exponential is anchored at x = 0 for z <= 0 and at x = N for
+        z > 0, so nothing overflows for large N. Q_starve is the closed form
+        (1 - e_1)(1 - phi)/(1 - phi e^(zN)), phi = e_1(1 - e_2)/(e_2(1 - e_1)).
+        """
+        lam1, mu1 = upstream[..., 0], upstream[..., 1]
+        lam2, mu2 = downstream[..., 0], downstream[..., 1]
+        L, U = lam1 + lam2, mu1 + mu2
+        e1, e2 = mu1/(lam1 + mu1), mu2/(lam2 + mu2)
+        coupling = 1/L + 1/U
+        # density at 0 per unit of mass of the starved phase, and at N per unit of the blocked phase
+        c_empty = lam2*mu1*coupling
+        c_full = lam1*mu2*coupling
+        z = lam2*mu2/L - (lam1 + mu2) + mu1*lam1/U + c_empty
+        anchored = z > 0
+        zN = np.where(anchored, -z*N, z*N)
+        with np.errstate(over='ignore', under='ignore'):
+            # starved and blocked masses, relative to the density at the anchor over c_empty
+            starved = np.exp(np.where(anchored, -z*N, 0.0))
+            blocked = c_empty/c_full*np.exp(np.where(anchored, 0.0, z*N))
+        I0 = N*_expm1_ratio(zN)
+        I1 = np.where(anchored, N*I0 - N*N*_moment_ratio(zN), N*N*_moment_ratio(zN))
+        density = c_empty*(2 + U/L + L/U)
+        blocked_total = blocked*(1 + mu2/L + lam1/U)
+        mass = starved*(1 + mu1/L + lam2/U) + blocked_total + density*I0
+        ST = starved/mass
+        BL = blocked/mass
+        WIP = (N*blocked_total + density*I1)/mass
+        return e2 - ST, ST/e2, BL/e1, WIP
+
+
+def _broadcast_pairs(upstream: np.ndarray, downstream: np.ndarray, N: np.ndarray) -> tuple:
+    """Broadcast (..., n) machines and (...) capacities against each other"""
+    shape = np.broadcast_shapes(upstream.shape[:-1], downstream.shape[:-1], np.shape(N))
+    n = upstream.shape[-1]
+    return (np.broadcast_to(upstream, shape + (n,)), np.broadcast_to(downstream, shape + (n,)),
+            np.broadcast_to(N, shape))
+
+
+BERNOULLI = BernoulliModel()
+GEOMETRIC = GeometricModel()
+EXPONENTIAL = ExponentialModel()
+MODELS: Dict[str, LineModel] = {model.name: model for model in (BERNOULLI, GEOMETRIC, EXPONENTIAL)}
+
+
+def _resolve_model(model: Union[str, LineModel]) -> LineModel:
+    if isinstance(model, LineModel):
+        return model
+    if model not in MODELS:
+        raise ValueError(f"Parameter 'model' must be a LineModel or in {list(MODELS)}")
+    return MODELS[model]
+
+
+def _check_capacities(model: LineModel, N: np.ndarray) -> None:
+    if not np.all(N > 0):
+        raise ValueError("Parameter 'N' must contain positive values")
+    if not model.continuous and not np.all(N == np.round(N)):
+        raise ValueError(f"Parameter 'N' must contain integers for {model.name} machines")
+
+
+def _model_line_inputs(model: LineModel, x: ArrayLike, N: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert x to a (K, M, n) float array and N to a matching (K, M - 1) array"""
+    n = len(model.parameters)
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 2:
+        x = x[None]
+    if x.ndim != 3 or x.shape[1] < 2 or x.shape[2] != n:
+        raise ValueError(f"Parameter 'x' must be a (K, M, {n}) array with M > 1, got shape {x.shape}")
+    K, M, _ = x.shape
+    model.check(x)
+    N = np.asarray(N)
+    try:
+        N = np.broadcast_to(N, (K, M - 1)).astype(float)
+    except ValueError:
+        raise ValueError(f"Parameter 'N' must be broadcastable to shape {(K, M - 1)}, got shape {N.shape}")
+    _check_capacities(model, N)
+    return x, N
+
+
+def _sweep_model_lines(model: LineModel, x: np.ndarray, N: np.ndarray, x_f: np.ndarray, x_b: np.ndarray) -> None:
+    """
+    One backward pass over x_b followed by one forward pass over x_f of (K, M, n) lines, in place.
+    Backward, machine i is degraded by its blocking in the pair (x^f_i, x^b_{i+1}); forward,
+    by its starvation in the pair (x^f_{i-1}, x^b_i).
+    """
+    M = x.shape[1]
+    for i in range(M - 2, -1, -1):
+        x_b[:, i] = model.degrade(x[:, i], model.blocking(x_f[:, i], x_b[:, i + 1], N[:, i]))
+    for i in range(1, M):
+        x_f[:, i] = model.degrade(x[:, i], model.starvation(x_f[:, i - 1], x_b[:, i], N[:, i - 1]))
+
+
+def _aggregate_model_lines(model: LineModel, x: np.ndarray, N: np.ndarray, tol: float,
+                           x_f0: Optional[np.ndarray], x_b0: Optional[np.ndarray],
+                           max_iter: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Forward/backward aggregation of K lines of M machines of any model, on validated (K, M, n)
+    machines and (K, M - 1) capacities, also returning the number of sweeps per line.
+
+    Every iteration is one _sweep_model_lines. A line whose parameters change by less than
+    tol is dropped from the working set; a line whose parameters become NaN or infinite
+    raises ValueError.
+    """
+    K, M, _ = x.shape
+    x_f = x.copy() if x_f0 is None else np.array(x_f0, dtype=float)
+    x_b = x.copy() if x_b0 is None else np.array(x_b0, dtype=float)
+    if x_f.shape != x.shape or x_b.shape != x.shape:
+        raise ValueError(f"Initial forward and backward machines must have shape {x.shape}")
+    # boundary conditions
+    x_f[:, 0] = x[:, 0]
+    x_b[:, -1] = x[:, -1]
+
+    record = current_record()
+    active = np.arange(K)
+    x_a, N_a, x_f_a, x_b_a = x, N, x_f, x_b
+    iterations = 0
+    sweeps = np.zeros(K, dtype=int)
+    while active.size:
+        if iterations == max_iter:
+            if record is not None:
+                record.converged = False
+            raise RuntimeError(f"Aggregation of {active.size} of {K} lines did not converge after {max_iter} iterations")
+        iterations += 1
+        sweeps[active] += 1
+        x_f_prev = x_f_a.copy()
+        x_b_prev = x_b_a.copy()
+        _sweep_model_lines(model, x_a, N_a, x_f_a, x_b_a)
+        residual = np.maximum(np.abs(x_f_a - x_f_prev).max(axis=(1, 2)), np.abs(x_b_a - x_b_prev).max(axis=(1, 2)))
+        if record is not None:
+            record.iteration(residual.max())
+        finite = np.isfinite(residual)
+        if not finite.all():
+            if record is not None:
+                record.converged = False
+            raise ValueError(
+                f"Aggregation of lines {active[~finite].tolist()} produced non-finite machine parameters; "
+                f"the lines have degenerate machines"
+            )
+        running = residual >= tol
+        if running.all():
+            continue
+        # write back, then shrink the working set to the lines that are still iterating
+        x_f[active] = x_f_a
+        x_b[active] = x_b_a
+        active = active[running]
+        x_a, N_a, x_f_a, x_b_a = x[active], N[active], x_f_a[running], x_b_a[running]
+    if record is not None:
+        record.converged = True
+    return x_f, x_b, sweeps
+
+
+def _model_line_metrics(model: LineModel, x: np.ndarray, x_f: np.ndarray, x_b: np.ndarray, N: np.ndarray) -> tuple:
+    """
+    Compute PR, WIP, BL and ST of (K, M) lines from converged forward and backward machines.
+
+    Returns:
+        tuple[np.ndarray, ...]: (K,) PR, (K, M - 1) WIP, (K, M) BL and (K, M) ST
+    """
+    _, Q_starve, Q_block, WIP = model.two_machine(x_f[:, :-1], x_b[:, 1:], N)
+    e = model.efficiency(x)
+    BL = np.zeros_like(e)
+    ST = np.zeros_like(e)
+    BL[:, :-1] = e[:, :-1]*Q_block
+    ST[:, 1:] = e[:, 1:]*Q_starve
+    return model.efficiency(x_b[:, 0]), WIP, BL, ST
+
+
+def performance_measure_two_machine_model(
+    model: Union[str, LineModel],
+    x1: ArrayLike,
+    x2: ArrayLike,
+    N: ArrayLike,
+    rounded: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Measures of two-machine lines of any model, like performance_measure_two_machine_batch.
+
+    Parameters:
+    model (str or LineModel): 'bernoulli', 'geometric', 'exponential' or a LineModel
+    x1 (ArrayLike): (..., n) parameters of machine 1, in the order of model.parameters
+    x2 (ArrayLike): (..., n) parameters of machine 2
+    N (ArrayLike): The maximum capacity of the buffer, broadcast against the machines
+    rounded (bool, optional): Round PR, BL_1 and ST_2 to four decimals and WIP to two. Defaults to True.
+
+    Returns:
+    dict: Arrays of the production rate(PR), work-in-process(WIP),
+    blockages of machine 1(BL_1) and starvations of machine 2(ST_2).
+    """
+    model = _resolve_model(model)
+    x1, x2 = np.asarray(x1, dtype=float), np.asarray(x2, dtype=float)
+    for value in (x1, x2):
+        if value.ndim == 0 or value.shape[-1] != len(model.parameters):
+            raise ValueError(f"Machines must be given as (..., {len(model.parameters)}) arrays of {model.parameters}")
+        model.check(value)
+    N = np.asarray(N, dtype=float)
+    _check_capacities(model, N)
+    x1, x2, N = _broadcast_pairs(x1, x2, N)
+    PR, Q_starve, Q_block, WIP = model.two_machine(x1, x2, N)
+    BL_1 = model.efficiency(x1)*Q_block
+    ST_2 = model.efficiency(x2)*Q_starve
+    if rounded:
+        PR, BL_1, ST_2 = np.round(PR, 4), np.round(BL_1, 4), np.round(ST_2, 4)
+        WIP = np.round(WIP, 2)
+    return {"PR": PR, "WIP": WIP, "BL_1": BL_1, "ST_2": ST_2}
+
+
+@instrumented("aggregation_of_lines_batch")
+def aggregation_of_lines_batch(
+    model: Union[str, LineModel],
+    x: ArrayLike,
+    N: ArrayLike,
+    tol: float = CONVERGENCE_THRESHOLD,
+    x_f0: Optional[np.ndarray] = None,
+    x_b0: Optional[np.ndarray] = None,
+    max_iter: int = MAX_ITERATIONS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Recursive aggregation of K lines of M machines of any model at once, with the working-set
+    shrinking and warm starts of aggregation_of_bernoulli_lines_batch.
+
+    Parameters:
+        model (str or LineModel): 'bernoulli', 'geometric', 'exponential' or a LineModel
+        x (ArrayLike): (K, M, n) machine parameters in the order of model.parameters, (M, n) for one line
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        x_f0, x_b0 (np.ndarray, optional): (K, M, n) initial forward and backward machines. Default to x.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Raises:
+        RuntimeError: If some lines have not converged after max_iter iterations
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (K, M, n) forward and backward aggregated machines
+    """
+    model = _resolve_model(model)
+    x, N = _model_line_inputs(model, x, N)
+    x_f, x_b, _ = _aggregate_model_lines(model, x, N, tol, x_f0, x_b0, max_iter)
+    return x_f, x_b
+
+
+@instrumented("performance_measure_lines_batch")
+def performance_measure_lines_batch(
+    model: Union[str, LineModel],
+    x: ArrayLike,
+    N: ArrayLike,
+    rounded: bool = True,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS
+) -> Dict[str, np.ndarray]:
+    """
+    Measures of K lines of M machines of any model, like
+    performance_measure_multiply_machine_bernoulli_batch. PR is the efficiency of the first
+    backward aggregated machine, ST_i = e_i Q_starve and BL_i = e_i Q_block in the pairs
+    (x^f_{i-1}, x^b_i) and (x^f_i, x^b_{i+1}).
+
+    Parameters:
+        model (str or LineModel): 'bernoulli', 'geometric', 'exponential' or a LineModel
+        x (ArrayLike): (K, M, n) machine parameters in the order of model.parameters, (M, n) for one line
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        rounded (bool, optional): Round PR, BL, ST and e to four decimals and WIP and TotalWIP
+            to two decimals. Defaults to True.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Returns:
+        dict: Arrays x (K, M, n), xf (K, M, n), xb (K, M, n), e (K, M), N (K, M - 1), ST (K, M),
+        BL (K, M), WIP (K, M - 1), PR (K,) and TotalWIP (K,)
+    """
+    record = current_record()
+    model = _resolve_model(model)
+    x, N = _model_line_inputs(model, x, N)
+    if record is not None:
+        record.lap("validation")
+    x_f, x_b, _ = _aggregate_model_lines(model, x, N, tol, None, None, max_iter)
+    if record is not None:
+        record.lap("aggregation")
+    PR, WIP, BL, ST = _model_line_metrics(model, x, x_f, x_b, N)
+    if record is not None:
+        record.lap("metrics")
+    e = model.efficiency(x)
+    TotalWIP = WIP.sum(axis=1)
+    if rounded:
+        PR, BL, ST, e = (np.round(v, 4) for v in (PR, BL, ST, e))
+        WIP, TotalWIP = np.round(WIP, 2), np.round(TotalWIP, 2)
+    return {"x": x, "xf": x_f, "xb": x_b, "e": e, "ST": ST, "BL": BL, "N": N,
+            "WIP": WIP, "PR": PR, "TotalWIP": TotalWIP}
+
+
+def performance_measure_geometric_line(
+    P: ArrayLike,
+    R: ArrayLike,
+    N: ArrayLike,
+    rounded: bool = True,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS
+) -> Dict[str, np.ndarray]:
+    """
+    Measures of geometric lines, see performance_measure_lines_batch.
+
+    Parameters:
+        P (ArrayLike): (K, M) or (M,) breakdown probability of each machine per cycle
+        R (ArrayLike): (K, M) or (M,) repair probability of each machine per cycle
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        rounded (bool, optional): Round the measures like performance_measure_lines_batch. Defaults to True.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Returns:
+        dict: The measures of performance_measure_lines_batch, PR in parts per cycle
+    """
+    x = np.stack(np.broadcast_arrays(np.asarray(P, dtype=float), np.asarray(R, dtype=float)), axis=-1)
+    return performance_measure_lines_batch(GEOMETRIC, x, N, rounded, tol, max_iter)
+
+
+def performance_measure_exponential_line(
+    c: ArrayLike,
+    T_up: ArrayLike,
+    T_down: ArrayLike,
+    N: ArrayLike,
+    c_unit: str = 'parts/sec',
+    T_up_unit: str = 'seconds',
+    T_down_unit: str = 'seconds',
+    rounded: bool = True,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS
+) -> Dict[str, np.ndarray]:
+    """
+    Measures of synchronous exponential lines, whose machines are given as agg_machines
+    returns them: capacity c, mean up time T_up and mean down time T_down. The outputs of
+    agg_machines or agg_machines_batch can be passed in only when all cells of a line have
+    the same capacity c; lines of cells with different capacities are asynchronous and
+    are rejected.
+
+    With lambda = 1/T_up and mu = 1/T_down, the line is solved as an exponential line with
+    buffers of N/c units of production time; PR is the fraction of time the last machine
+    produces and TP = c PR the throughput.
+
+    Parameters:
+        c (ArrayLike): (K, M) or (M,) capacity of each machine; all machines of a line must have
+            the same capacity
+        T_up (ArrayLike): (K, M) or (M,) mean up time of each machine
+        T_down (ArrayLike): (K, M) or (M,) mean down time of each machine
+        N (ArrayLike): (K, M - 1) array, or anything broadcastable to it, of buffer capacities in parts
+        c_unit (str, optional): Unit of c. Defaults to 'parts/sec'.
+        T_up_unit (str, optional): Unit of T_up. Defaults to 'seconds'.
+        T_down_unit (str, optional): Unit of T_down. Defaults to 'seconds'.
+        rounded (bool, optional): Round the measures like performance_measure_lines_batch and TP
+            to four decimals. Defaults to True.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Raises:
+        ValueError: If the machines of a line have different capacities (asynchronous line)
+
+    Returns:
+        dict: The measures of performance_measure_lines_batch, WIP and TotalWIP in parts, and
+        TP (K,) in c_unit
+    """
+    for param, value, expected_range in (('c_unit', c_unit, VALID_PRODUCTION_UNITS),
+                                         ('T_up_unit', T_up_unit, VALID_TIME_UNITS),
+                                         ('T_down_unit', T_down_unit, VALID_TIME_UNITS)):
+        if value not in expected_range:
+            raise ValueError(f"Parameter '{param}' must be in {expected_range}")
+    c, T_up, T_down = (np.atleast_2d(np.asarray(v, dtype=float)) for v in (c, T_up, T_down))
+    c, T_up, T_down = np.broadcast_arrays(c, T_up, T_down)
+    for param, value in (('c', c), ('T_up', T_up), ('T_down', T_down)):
+        if not np.all(np.isfinite(value) & (value > 0)):
+            raise ValueError(f"Parameter '{param}' must contain positive numeric values")
+    if not np.all(c == c[:, :1]):
+        raise ValueError("All machines of an exponential line must have the same capacity 'c'; "
+                         "asynchronous lines are not supported")
+    rate = c[:, 0]*UNIT_MAPPING[c_unit]
+    x = np.stack([1/(T_up*UNIT_MAPPING[T_up_unit]), 1/(T_down*UNIT_MAPPING[T_down_unit])], axis=-1)
+    # buffers in seconds of production
+    N_parts = np.broadcast_to(np.asarray(N, dtype=float), (c.shape[0], c.shape[1] - 1))
+    result = performance_measure_lines_batch(EXPONENTIAL, x, N_parts/rate[:, None], False, tol, max_iter)
+    result["N"] = N_parts
+    result["WIP"] = result["WIP"]*rate[:, None]
+    result["TotalWIP"] = result["WIP"].sum(axis=1)
+    result["TP"] = result["PR"]*c[:, 0]
+    if rounded:
+        for name in ("PR", "BL", "ST", "e", "TP"):
+            result[name] = np.round(result[name], 4)
+        result["WIP"], result["TotalWIP"] = np.round(result["WIP"], 2), np.round(result["TotalWIP"], 2)
+    return result
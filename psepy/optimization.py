@@ -0,0 +1,256 @@
+import itertools
+import math
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from .batch import _aggregate_lines, _line_metrics
+from .constants import CONVERGENCE_THRESHOLD, MAX_ITERATIONS, OPTIMIZATION_METHODS
+from .validators import InputValidator
+
+
+class BufferAllocation(NamedTuple):
+    N: List[int]
+    PR: float
+    TotalWIP: float
+    solves: int
+    sweeps: int
+
+
+class _LineEvaluator:
+    """
+    Evaluates buffer allocations of one line in batches, warm-started from given p^f and
+    p^b, and counts the aggregations (solves) and sweeps spent.
+    """
+
+    def __init__(self, p: np.ndarray, tol: float, max_iter: int):
+        self.p = p
+        self.tol = tol
+        self.max_iter = max_iter
+        self.solves = 0
+        self.sweeps = 0
+
+    def __call__(self, N: np.ndarray, p_f0: Optional[np.ndarray] = None,
+                 p_b0: Optional[np.ndarray] = None, wip: bool = False) -> tuple:
+        K = N.shape[0]
+        p = np.broadcast_to(self.p, (K, self.p.size))
+        if p_f0 is not None:
+            p_f0, p_b0 = np.broadcast_to(p_f0, p.shape), np.broadcast_to(p_b0, p.shape)
+        p_f, p_b, sweeps = _aggregate_lines(p, N.astype(float), self.tol, p_f0, p_b0, self.max_iter)
+        self.solves += K
+        self.sweeps += int(sweeps.sum())
+        WIP = _line_metrics(p, p_f, p_b, N.astype(float))[0].sum(axis=1) if wip else None
+        return p_b[:, 0], WIP, p_f, p_b
+
+
+def _check_inputs(p: Iterable[float], N_min: int, N_max: Optional[int], method: str) -> np.ndarray:
+    if method not in OPTIMIZATION_METHODS:
+        raise ValueError(f"Parameter 'method' must be in {OPTIMIZATION_METHODS}")
+    p = list(p)
+    if len(p) < 2:
+        raise ValueError("A line must have at least two machines")
+    InputValidator.validate_probability_array(p, "p", (None,))
+    InputValidator.validate_positive_int(N_min, "N_min")
+    if N_max is not None:
+        InputValidator.validate_positive_int(N_max, "N_max")
+        if N_max < N_min:
+            raise ValueError(f"Parameter 'N_max' must not be less than N_min, got {N_max}")
+    return np.array(p, dtype=float)
+
+
+def _check_candidates(count: int, max_candidates: int) -> None:
+    if count > max_candidates:
+        raise ValueError(
+            f"The exact search would evaluate {count} allocations, more than max_candidates={max_candidates}; "
+            f"use method='greedy'"
+        )
+
+
+def _neighbours(N: np.ndarray, N_max: Optional[int]) -> np.ndarray:
+    """Allocations with one more unit of capacity in one buffer"""
+    candidates = N + np.eye(N.size, dtype=int)
+    if N_max is not None:
+        candidates = candidates[candidates.max(axis=1) <= N_max]
+    return candidates
+
+
+def _compositions(total: int, parts: int, N_min: int, N_max: Optional[int]):
+    """All allocations of `total` units into `parts` buffers of N_min..N_max units, in lexicographic order"""
+    if parts == 1:
+        if N_min <= total and (N_max is None or total <= N_max):
+            yield (total,)
+        return
+    upper = total - N_min*(parts - 1)
+    if N_max is not None:
+        upper = min(upper, N_max)
+    for head in range(N_min, upper + 1):
+        for tail in _compositions(total - head, parts - 1, N_min, N_max):
+            yield (head,) + tail
+
+
+def allocate_buffers(
+    p: Iterable[float],
+    budget: int,
+    method: str = 'greedy',
+    N_min: int = 1,
+    N_max: Optional[int] = None,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS,
+    chunk_size: int = 4096,
+    max_candidates: int = 10**6
+) -> BufferAllocation:
+    """
+    Distribute a total buffer capacity over the buffers of a Bernoulli line so that PR is maximal.
+
+    'greedy' starts from N_min everywhere and adds the capacity one unit at a time to the
+    buffer with the largest gain in PR. The candidates of a step differ from the current
+    allocation in one buffer, so they are aggregated in one batch warm-started from the
+    converged p^f and p^b of the current allocation and need only a few sweeps each.
+    'exact' evaluates every allocation with the batch solver, warm-started from the
+    greedy optimum, and is meant for short lines.
+
+    Parameters:
+        p (Iterable[float]): The probability of each machine working at any time
+        budget (int): Total buffer capacity, sum(N)
+        method (str, optional): 'greedy' or 'exact'. Defaults to 'greedy'.
+        N_min (int, optional): Minimum capacity of every buffer. Defaults to 1.
+        N_max (int, optional): Maximum capacity of every buffer. Defaults to no limit.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+        chunk_size (int, optional): Number of allocations per batch of the exact search. Defaults to 4096.
+        max_candidates (int, optional): Largest number of allocations the exact search may evaluate.
+
+    Returns:
+        BufferAllocation: N, its PR and TotalWIP, unrounded, and the number of line
+        aggregations (solves) and sweeps spent
+    """
+    p = _check_inputs(p, N_min, N_max, method)
+    InputValidator.validate_positive_int(budget, "budget")
+    buffers = p.size - 1
+    if budget < N_min*buffers:
+        raise ValueError(f"Parameter 'budget' must be at least {N_min*buffers}, got {budget}")
+    if N_max is not None and budget > N_max*buffers:
+        raise ValueError(f"Parameter 'budget' must be at most {N_max*buffers}, got {budget}")
+    evaluate = _LineEvaluator(p, tol, max_iter)
+
+    N = np.full((1, buffers), N_min)
+    PR, _, p_f, p_b = evaluate(N)
+    for _ in range(budget - N_min*buffers):
+        candidates = _neighbours(N[0], N_max)
+        PR, _, p_f_c, p_b_c = evaluate(candidates, p_f[0], p_b[0])
+        best = int(np.argmax(PR))
+        N, p_f, p_b = candidates[best:best + 1], p_f_c[best:best + 1], p_b_c[best:best + 1]
+
+    if method == 'exact':
+        extra = budget - N_min*buffers
+        _check_candidates(math.comb(extra + buffers - 1, buffers - 1), max_candidates)
+        best_PR, best_N = -np.inf, None
+        allocations = _compositions(budget, buffers, N_min, N_max)
+        while True:
+            chunk = np.array(list(itertools.islice(allocations, chunk_size)), dtype=int)
+            if chunk.size == 0:
+                break
+            PR, *_ = evaluate(chunk, p_f[0], p_b[0])
+            k = int(np.argmax(PR))
+            if PR[k] > best_PR:
+                best_PR, best_N = PR[k], chunk[k:k + 1]
+        N = best_N
+
+    PR, WIP, *_ = evaluate(N, p_f[0], p_b[0], wip=True)
+    return BufferAllocation(N[0].tolist(), float(PR[0]), float(WIP[0]), evaluate.solves, evaluate.sweeps)
+
+
+def buffers_for_target(
+    p: Iterable[float],
+    target_PR: float,
+    method: str = 'greedy',
+    N_min: int = 1,
+    N_max: Optional[int] = None,
+    tol: float = CONVERGENCE_THRESHOLD,
+    max_iter: int = MAX_ITERATIONS,
+    chunk_size: int = 4096,
+    max_candidates: int = 10**6
+) -> BufferAllocation:
+    """
+    Find buffer capacities for which the line reaches target_PR with the least total WIP.
+
+    'greedy' starts from N_min everywhere and adds one unit of capacity at a time to the
+    buffer with the largest gain in PR per unit of additional WIP, with the same warm-started
+    batch evaluation as allocate_buffers, until PR reaches the target, and then takes back
+    single units as long as the target is still met. 'exact' evaluates
+    every allocation with capacities N_min..N_max (N_max is required) and is meant for
+    short lines.
+
+    Parameters:
+        p (Iterable[float]): The probability of each machine working at any time
+        target_PR (float): Required production rate, less than min(p)
+        method (str, optional): 'greedy' or 'exact'. Defaults to 'greedy'.
+        N_min (int, optional): Minimum capacity of every buffer. Defaults to 1.
+        N_max (int, optional): Maximum capacity of every buffer. Defaults to no limit for 'greedy'.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+        chunk_size (int, optional): Number of allocations per batch of the exact search. Defaults to 4096.
+        max_candidates (int, optional): Largest number of allocations the exact search may evaluate.
+
+    Raises:
+        ValueError: If the target cannot be reached
+
+    Returns:
+        BufferAllocation: N, its PR and TotalWIP, unrounded, and the number of line
+        aggregations (solves) and sweeps spent
+    """
+    p = _check_inputs(p, N_min, N_max, method)
+    if not isinstance(target_PR, (float, int)) or not 0 < target_PR < p.min():
+        raise ValueError(f"Parameter 'target_PR' must be positive and less than min(p) = {p.min()}, got {target_PR}")
+    if method == 'exact' and N_max is None:
+        raise ValueError("Parameter 'N_max' is required by the exact search")
+    buffers = p.size - 1
+    evaluate = _LineEvaluator(p, tol, max_iter)
+
+    if method == 'greedy':
+        N = np.full((1, buffers), N_min)
+        PR, WIP, p_f, p_b = evaluate(N, wip=True)
+        while PR[0] < target_PR:
+            candidates = _neighbours(N[0], N_max)
+            if candidates.size == 0:
+                raise ValueError(f"The target PR {target_PR} cannot be reached with N_max={N_max}")
+            PR_c, WIP_c, p_f_c, p_b_c = evaluate(candidates, p_f[0], p_b[0], wip=True)
+            gain = PR_c - PR[0]
+            if gain.max() <= 0:
+                raise ValueError(f"The target PR {target_PR} cannot be reached, PR stalls at {PR[0]}")
+            cost = np.maximum(WIP_c - WIP[0], 1e-12)
+            best = int(np.argmax(np.where(gain > 0, gain/cost, -np.inf)))
+            N, p_f, p_b = candidates[best:best + 1], p_f_c[best:best + 1], p_b_c[best:best + 1]
+            PR, WIP = PR_c[best:best + 1], WIP_c[best:best + 1]
+        # the additions overshoot: take back single units while the target is still met
+        while True:
+            candidates = N[0] - np.eye(buffers, dtype=int)
+            candidates = candidates[candidates.min(axis=1) >= N_min]
+            if candidates.size == 0:
+                break
+            PR_c, WIP_c, p_f_c, p_b_c = evaluate(candidates, p_f[0], p_b[0], wip=True)
+            feasible = np.flatnonzero(PR_c >= target_PR)
+            if feasible.size == 0:
+                break
+            best = feasible[np.argmin(WIP_c[feasible])]
+            N, p_f, p_b = candidates[best:best + 1], p_f_c[best:best + 1], p_b_c[best:best + 1]
+            PR, WIP = PR_c[best:best + 1], WIP_c[best:best + 1]
+        return BufferAllocation(N[0].tolist(), float(PR[0]), float(WIP[0]), evaluate.solves, evaluate.sweeps)
+
+    _check_candidates((N_max - N_min + 1)**buffers, max_candidates)
+    # warm start shared by all allocations
+    _, _, p_f, p_b = evaluate(np.full((1, buffers), N_min))
+    best: Tuple[float, float, Optional[np.ndarray]] = (np.inf, np.inf, None)
+    allocations = itertools.product(range(N_min, N_max + 1), repeat=buffers)
+    while True:
+        chunk = np.array(list(itertools.islice(allocations, chunk_size)), dtype=int)
+        if chunk.size == 0:
+            break
+        PR, WIP, *_ = evaluate(chunk, p_f[0], p_b[0], wip=True)
+        feasible = np.flatnonzero(PR >= target_PR)
+        if feasible.size:
+            k = feasible[np.argmin(WIP[feasible])]
+            if WIP[k] < best[0]:
+                best = (WIP[k], PR[k], chunk[k])
+    WIP, PR, N = best
+    if N is None:
+        raise ValueError(f"The target PR {target_PR} cannot be reached with N_max={N_max}")
+    return BufferAllocation(N.tolist(), float(PR), float(WIP), evaluate.solves, evaluate.sweeps)
@@ -0,0 +1,165 @@
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from .batch import _agg_machines_kernel
+from .constants import UNIT_MAPPING, VALID_MODES, VALID_PRODUCTION_UNITS, VALID_TIME_UNITS
+
+
+class PlantNode:
+    """
+    Node of a plant structure: a machine or a group of nodes aggregated with agg_machines.
+
+    Every node caches its aggregated (c, T_up, T_down) in parts/sec and seconds. Changing
+    a machine invalidates the caches on its path to the root only, so re-evaluating the
+    plant recomputes that path and reuses every other subtree.
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.parent = None
+        self._result = None
+
+    def invalidate(self) -> None:
+        """Drop the cached result of this node and of all its ancestors"""
+        self._result = None
+        node = self.parent
+        while node is not None and node._result is not None:
+            node._result = None
+            node = node.parent
+
+    def _aggregate(self) -> Tuple[float, float, float]:
+        raise NotImplementedError
+
+    def evaluate(
+        self,
+        c_unit: str = 'parts/sec',
+        T_up_unit: str = 'seconds',
+        T_down_unit: str = 'seconds'
+    ) -> Tuple[float, float, float]:
+        """
+        Aggregate the subtree bottom-up, reusing the cached results of unchanged subtrees.
+
+        Returns:
+            tuple: c_agg, T_up_agg and T_down_agg of the subtree, unrounded, in the requested units
+        """
+        if c_unit not in VALID_PRODUCTION_UNITS:
+            raise ValueError(f"Parameter 'c_unit' must be in {VALID_PRODUCTION_UNITS}")
+        for param, value in (('T_up_unit', T_up_unit), ('T_down_unit', T_down_unit)):
+            if value not in VALID_TIME_UNITS:
+                raise ValueError(f"Parameter '{param}' must be in {VALID_TIME_UNITS}")
+        c, T_up, T_down = self._evaluate()
+        return c/UNIT_MAPPING[c_unit], T_up/UNIT_MAPPING[T_up_unit], T_down/UNIT_MAPPING[T_down_unit]
+
+    def _evaluate(self) -> Tuple[float, float, float]:
+        if self._result is None:
+            self._result = self._aggregate()
+        return self._result
+
+
+class Machine(PlantNode):
+    """A single machine with capacity c, mean up time T_up and mean down time T_down"""
+
+    def __init__(
+        self,
+        c: float,
+        T_up: float,
+        T_down: float,
+        c_unit: str = 'parts/sec',
+        T_up_unit: str = 'seconds',
+        T_down_unit: str = 'seconds',
+        name: Optional[str] = None
+    ):
+        super().__init__(name)
+        self.c = self.T_up = self.T_down = None
+        self.set(c, T_up, T_down, c_unit, T_up_unit, T_down_unit)
+
+    def set(
+        self,
+        c: Optional[float] = None,
+        T_up: Optional[float] = None,
+        T_down: Optional[float] = None,
+        c_unit: str = 'parts/sec',
+        T_up_unit: str = 'seconds',
+        T_down_unit: str = 'seconds'
+    ) -> None:
+        """Change some of the machine parameters; parameters left as None are kept"""
+        values = {}
+        for param, value, unit, valid_units in (('c', c, c_unit, VALID_PRODUCTION_UNITS),
+                                                ('T_up', T_up, T_up_unit, VALID_TIME_UNITS),
+                                                ('T_down', T_down, T_down_unit, VALID_TIME_UNITS)):
+            if value is None:
+                continue
+            if unit not in valid_units:
+                raise ValueError(f"Unit of '{param}' must be in {valid_units}")
+            if not isinstance(value, (float, int)) or isinstance(value, bool):
+                raise TypeError(f"Parameter '{param}' must be numeric, got {type(value).__name__}")
+            if not value > 0:
+                raise ValueError(f"Parameter '{param}' must be positive, got {value}")
+            values[param] = value*UNIT_MAPPING[unit]
+        for param, value in values.items():
+            setattr(self, param, value)
+        self.invalidate()
+
+    def _evaluate(self) -> Tuple[float, float, float]:
+        return self.c, self.T_up, self.T_down
+
+    def __repr__(self):
+        return f"Machine(c={self.c}, T_up={self.T_up}, T_down={self.T_down}, name={self.name!r})"
+
+
+class MachineGroup(PlantNode):
+    """
+    Group of nodes aggregated with agg_machines in the given mode. Abstract: use
+    ParallelGroup or SerialGroup, or a subclass that sets `mode` to one of VALID_MODES.
+    """
+
+    mode = None
+
+    def __init__(self, children: Iterable[PlantNode] = (), name: Optional[str] = None):
+        if self.mode not in VALID_MODES:
+            raise TypeError(f"{type(self).__name__} must set 'mode' to one of {VALID_MODES}, got {self.mode!r}")
+        super().__init__(name)
+        self.children: List[PlantNode] = []
+        self.evaluations = 0
+        for child in children:
+            self.add(child)
+
+    def add(self, child: PlantNode) -> None:
+        if not isinstance(child, PlantNode):
+            raise TypeError(f"Children must be PlantNode instances, got {type(child).__name__}")
+        if child.parent is not None:
+            raise ValueError(f"Node {child.name!r} already belongs to a group")
+        node = self
+        while node is not None:
+            if node is child:
+                raise ValueError("A group cannot contain itself")
+            node = node.parent
+        child.parent = self
+        self.children.append(child)
+        self.invalidate()
+
+    def remove(self, child: PlantNode) -> None:
+        self.children.remove(child)
+        child.parent = None
+        self.invalidate()
+
+    def _aggregate(self) -> Tuple[float, float, float]:
+        if not self.children:
+            raise ValueError(f"Group {self.name!r} has no machines")
+        c, T_up, T_down = np.array([child._evaluate() for child in self.children]).T
+        self.evaluations += 1
+        return tuple(float(x) for x in _agg_machines_kernel(c, T_up, T_down, self.mode))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.children!r}, name={self.name!r})"
+
+
+class ParallelGroup(MachineGroup):
+    """Nodes working in parallel"""
+
+    mode = 'parallel'
+
+
+class SerialGroup(MachineGroup):
+    """Consecutive dependent nodes"""
+
+    mode = 'consecutive dependent'
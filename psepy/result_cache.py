@@ -0,0 +1,304 @@
+"""
+Persistent, content-addressed cache of solver results in an SQLite database.
+
+An entry is keyed by the SHA-256 hash of a canonical encoding of the call: the solver
+name, SOLVER_VERSION, the package version, the solver options that change the result
+(tol, method, mode, units) and the inputs as little-endian float64 and int64 bytes, so
+equal configurations hit whatever container and dtype they are passed in. Lines keep
+their unrounded measures (p, pf, pb, N, ST, BL, WIP and t packed in one float64 blob)
+and are rounded on read, like LineResult.
+
+The database runs in WAL mode, so readers never wait for a writer, and every write is
+a BEGIN IMMEDIATE transaction, so worker processes sharing one file serialize their
+writes; each process (and each fork) opens its own connection. When the cache holds
+more than maxsize entries, the least recently used ones are evicted in the transaction
+that inserted the new entries.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+import numpy as np
+from . import __version__
+from .batch import ArrayLike, performance_measure_multiply_machine_bernoulli_batch, _line_batch_inputs
+from .cache import CacheStats, LRUCache
+from .constants import CONVERGENCE_THRESHOLD, MAX_ITERATIONS
+from .results import LINE_FIELDS, LineResult, LineResultBatch
+
+# part of every key: bump it when a change of the solvers changes their results
+SOLVER_VERSION = 1
+
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, value BLOB NOT NULL, accessed REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('entries', 0);
+COMMIT;
+"""
+# keys per statement, below the SQLite limit of host parameters
+_CHUNK = 500
+
+
+def _pack_lines(result: LineResultBatch) -> np.ndarray:
+    """(K, 7M - 1) float64 rows of the stored fields of every line"""
+    return np.column_stack([result.column(name).reshape(len(result), -1) for name in LINE_FIELDS])
+
+
+def _unpack_lines(rows: np.ndarray) -> LineResultBatch:
+    M = (rows.shape[1] + 1)//7
+    widths = {"p": M, "pf": M, "pb": M, "N": M - 1, "ST": M, "BL": M, "WIP": M - 1, "t": 1}
+    fields, start = {}, 0
+    for name in LINE_FIELDS:
+        fields[name] = rows[:, start:start + widths[name]]
+        start += widths[name]
+    fields["t"] = fields["t"][:, 0]
+    result = LineResultBatch()
+    result.append(**fields)
+    return result
+
+
+def _pack_line(result: LineResult) -> bytes:
+    return np.concatenate([np.ravel(getattr(result, name)) for name in LINE_FIELDS]).astype("<f8").tobytes()
+
+
+def _unpack_line(value: bytes) -> LineResult:
+    result = _unpack_lines(np.frombuffer(value, dtype="<f8")[None, :])[0]
+    result.N = result.N.astype(int)
+    return result
+
+
+class ResultCache:
+    """
+    Persistent cache of performance_measure_multiply_machine_bernoulli and agg_machines
+    results in the SQLite database at `path`; see the module docstring.
+
+    The solver methods take the arguments of the functions they cache and compute and
+    store the missing results. The cache may be shared by threads and, since it reopens
+    its connection after a fork or unpickling, passed to worker processes.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], maxsize: int = 1_000_000, timeout: float = 60.0):
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError(f"Parameter 'maxsize' must be a positive integer, got {maxsize}")
+        self.path = os.fspath(path)
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            # autocommit mode: transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        return {"path": self.path, "maxsize": self.maxsize, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    # Keys
+
+    @staticmethod
+    def key(name: str, options: Sequence, *arrays: np.ndarray) -> bytes:
+        """Digest of a call: solver name, versions, options and the canonical bytes of the inputs"""
+        digest = hashlib.sha256(repr((name, SOLVER_VERSION, __version__, tuple(options))).encode())
+        for array in arrays:
+            array = np.asarray(array)
+            # + 0.0 turns -0.0 into 0.0
+            array = array.astype("<i8") if array.dtype.kind in "biu" else array.astype("<f8") + 0.0
+            digest.update(repr(array.shape).encode())
+            digest.update(array.tobytes())
+        return digest.digest()
+
+    # Storage
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Stored values of the keys that are present, marking them as recently used"""
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start:start + _CHUNK]
+                marks = ",".join("?"*len(chunk))
+                found.update(connection.execute(f"SELECT key, value FROM entries WHERE key IN ({marks})", chunk))
+            if found:
+                hit = list(found)
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    for start in range(0, len(hit), _CHUNK):
+                        chunk = hit[start:start + _CHUNK]
+                        marks = ",".join("?"*len(chunk))
+                        connection.execute(f"UPDATE entries SET accessed = ? WHERE key IN ({marks})", [time.time()] + chunk)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.rollback()
+                    raise
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Store the (key, value) pairs, then evict the least recently used entries above maxsize"""
+        now = time.time()
+        rows = [(key, value, now) for key, value in items]
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                added = connection.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?, ?)", rows).rowcount
+                size = connection.execute("UPDATE meta SET value = value + ? WHERE name = 'entries' RETURNING value",
+                                          (added,)).fetchone()[0]
+                if size > self.maxsize:
+                    evicted = connection.execute(
+                        "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed, rowid LIMIT ?)",
+                        (size - self.maxsize,)
+                    ).rowcount
+                    connection.execute("UPDATE meta SET value = value - ? WHERE name = 'entries'", (evicted,))
+                    self.evictions += evicted
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.rollback()
+                raise
+
+    # Solvers
+
+    def performance_measure_multiply_machine_bernoulli(
+        self,
+        p: list[float],
+        M: int,
+        N: list[int],
+        t: float,
+        tol: float = CONVERGENCE_THRESHOLD,
+        max_iter: int = MAX_ITERATIONS,
+        method: str = 'gauss-seidel',
+        as_result: bool = False,
+        rounded: bool = True,
+        cache: Union[LRUCache, bool, None] = None
+    ) -> Union[dict, LineResult]:
+        """performance_measure_multiply_machine_bernoulli, computed only if not stored"""
+        from .core import performance_measure_multiply_machine_bernoulli  # Import here to avoid circular imports
+        key = self.key("performance_measure_multiply_machine_bernoulli", (tol, method, float(t)),
+                       np.asarray(p, dtype=float), np.asarray(N, dtype=np.int64))
+        value = self.get_many([key]).get(key)
+        if value is None:
+            result = performance_measure_multiply_machine_bernoulli(p, M, N, t, cache, tol, max_iter, method, as_result=True)
+            self.put_many([(key, _pack_line(result))])
+        else:
+            result = _unpack_line(value)
+        return result if as_result else result.to_dict(rounded)
+
+    def performance_measure_multiply_machine_bernoulli_batch(
+        self,
+        p: ArrayLike,
+        N: ArrayLike,
+        t: ArrayLike = 1.0,
+        rounded: bool = True,
+        tol: float = CONVERGENCE_THRESHOLD,
+        max_iter: int = MAX_ITERATIONS,
+        as_result: bool = False
+    ) -> Union[Dict[str, np.ndarray], LineResultBatch]:
+        """
+        performance_measure_multiply_machine_bernoulli_batch, solving only the lines that are
+        not stored, in one batch. Returns the same dict or LineResultBatch.
+        """
+        p, N = _line_batch_inputs(p, N)
+        K, M = p.shape
+        t = np.broadcast_to(np.asarray(t, dtype=float), (K,))
+        N_int = N.astype(np.int64)
+        name = "performance_measure_multiply_machine_bernoulli_batch"
+        keys = [self.key(name, (tol, float(t[k])), p[k], N_int[k]) for k in range(K)]
+        found = self.get_many(keys)
+        rows = np.empty((K, 7*M - 1))
+        missing = [k for k, key in enumerate(keys) if key not in found]
+        for k, key in enumerate(keys):
+            if key in found:
+                rows[k] = np.frombuffer(found[key], dtype="<f8")
+        if missing:
+            solved = _pack_lines(performance_measure_multiply_machine_bernoulli_batch(
+                p[missing], N[missing], t[missing], tol=tol, max_iter=max_iter, as_result=True
+            ))
+            rows[missing] = solved
+            # a configuration repeated in the batch is stored once
+            self.put_many(dict((keys[k], row.tobytes()) for k, row in zip(missing, solved)).items())
+        result = _unpack_lines(rows)
+        if as_result:
+            return result
+        keys = ("p", "pf", "pb", "ST", "BL", "N", "WIP", "PR", "TotalWIP", "TP")
+        return {key: result.column(key, rounded) for key in keys}
+
+    def agg_machines(
+        self,
+        S: int,
+        c: Iterable[Union[float, int]],
+        T_up: Iterable[Union[float, int]],
+        T_down: Iterable[Union[float, int]],
+        mode='parallel',
+        c_unit='parts/sec',
+        T_up_unit='seconds',
+        T_down_unit='seconds'
+    ) -> tuple:
+        """agg_machines, computed only if not stored"""
+        from .core import _check_agg_machines, agg_machines  # Import here to avoid circular imports
+        c, T_up, T_down = _check_agg_machines(S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit)
+        key = self.key("agg_machines", (mode, c_unit, T_up_unit, T_down_unit), c, T_up, T_down)
+        value = self.get_many([key]).get(key)
+        if value is None:
+            result = agg_machines(S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit, validate=False)
+            self.put_many([(key, np.array(result, dtype="<f8").tobytes())])
+            return result
+        return tuple(np.frombuffer(value, dtype="<f8"))
+
+    # Maintenance
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self), self.maxsize)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the statistics"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM entries")
+                connection.execute("UPDATE meta SET value = 0 WHERE name = 'entries'")
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.rollback()
+                raise
+            self.hits = self.misses = self.evictions = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT value FROM meta WHERE name = 'entries'").fetchone()[0]
+
+    def __bool__(self) -> bool:
+        # an empty cache is still a cache
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
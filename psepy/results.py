@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, Iterator, List, Union
+import numpy as np
+
+# decimals of the rounded output, as in performance_measure_multiply_machine_bernoulli
+ROUNDING = {"pf": 4, "pb": 4, "ST": 4, "BL": 4, "PR": 4, "TP": 4, "WIP": 2, "TotalWIP": 2}
+# stored columns, per line: p, pf, pb, ST and BL have M entries, N and WIP M - 1
+LINE_FIELDS = ("p", "pf", "pb", "N", "ST", "BL", "WIP", "t")
+# columns derived from the stored ones
+DERIVED_FIELDS = ("PR", "TotalWIP", "TP")
+
+
+def _round(name: str, value, rounded: bool):
+    if rounded and name in ROUNDING:
+        # the method is np.round without its dispatch overhead, which dominates for short lines
+        return np.float64(value).round(ROUNDING[name]) if isinstance(value, float) else value.round(ROUNDING[name])
+    return value
+
+
+class LineResult:
+    """
+    Performance measures of one Bernoulli line, stored unrounded in NumPy arrays.
+
+    PR, TotalWIP and TP are derived on access, and rounding is only applied when a
+    measure is read through `result[name]` or to_dict(), which give the values and the
+    dict format of performance_measure_multiply_machine_bernoulli. The arrays may be
+    views into a LineResultBatch.
+    """
+
+    __slots__ = LINE_FIELDS
+
+    def __init__(self, p, pf, pb, N, ST, BL, WIP, t: float = 1.0):
+        self.p = np.asarray(p, dtype=float)
+        self.pf = np.asarray(pf, dtype=float)
+        self.pb = np.asarray(pb, dtype=float)
+        self.N = np.asarray(N)
+        self.ST = np.asarray(ST, dtype=float)
+        self.BL = np.asarray(BL, dtype=float)
+        self.WIP = np.asarray(WIP, dtype=float)
+        self.t = float(t)
+
+    @property
+    def M(self) -> int:
+        return self.p.size
+
+    @property
+    def PR(self) -> float:
+        return float(self.pb[0])
+
+    @property
+    def TotalWIP(self) -> float:
+        return float(self.WIP.sum())
+
+    @property
+    def TP(self) -> float:
+        return self.PR/self.t
+
+    def get(self, name: str, rounded: bool = False):
+        """Measure `name`, rounded like the dict output if `rounded`"""
+        if name not in LINE_FIELDS and name not in DERIVED_FIELDS:
+            raise KeyError(name)
+        value = _round(name, getattr(self, name), rounded)
+        return float(value) if name in DERIVED_FIELDS else value
+
+    def _export(self, name: str, rounded: bool):
+        value = self.get(name, rounded)
+        if name == "N":
+            return [int(n) for n in value]
+        return value if isinstance(value, float) else value.tolist()
+
+    def __getitem__(self, name: str):
+        return self._export(name, rounded=True)
+
+    def to_dict(self, rounded: bool = True) -> Dict[str, Union[float, list]]:
+        """The measures in the format of performance_measure_multiply_machine_bernoulli"""
+        keys = ("p", "pf", "pb", "ST", "BL", "N", "WIP", "PR", "TotalWIP", "TP")
+        return {key: self._export(key, rounded) for key in keys}
+
+    def __repr__(self):
+        return f"LineResult(M={self.M}, PR={self.PR:.4f}, TotalWIP={self.TotalWIP:.2f})"
+
+
+class LineResultBatch:
+    """
+    Columnar container of the results of many lines with the same number of machines M.
+
+    Results are kept as chunks of (K, M) and (K, M - 1) arrays, exactly as returned by the
+    batch solvers: appending a chunk or concatenating containers only stores references,
+    and copies are made once, when a column or the record array is exported.
+    """
+
+    __slots__ = ("M", "_chunks", "_size")
+
+    def __init__(self, chunks: Iterable[Dict[str, np.ndarray]] = ()):
+        self.M = None
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._size = 0
+        for chunk in chunks:
+            self._add(chunk)
+
+    def _add(self, chunk: Dict[str, np.ndarray]) -> None:
+        K, M = chunk["p"].shape
+        if self.M is None:
+            self.M = M
+        elif M != self.M:
+            raise ValueError(f"All lines of a LineResultBatch must have {self.M} machines, got {M}")
+        self._chunks.append(chunk)
+        self._size += K
+
+    def append(self, p, pf, pb, N, ST, BL, WIP, t=1.0) -> None:
+        """Add the results of K lines, given as (K, M) and (K, M - 1) arrays; t is a scalar or (K,)"""
+        p = np.asarray(p, dtype=float)
+        if p.ndim != 2:
+            raise ValueError(f"Parameter 'p' must be a (K, M) array, got shape {p.shape}")
+        K, M = p.shape
+        chunk = {"p": p, "t": np.broadcast_to(np.asarray(t, dtype=float), (K,))}
+        for name, value, width in (("pf", pf, M), ("pb", pb, M), ("ST", ST, M), ("BL", BL, M),
+                                   ("N", N, M - 1), ("WIP", WIP, M - 1)):
+            value = np.asarray(value, dtype=float)
+            if value.shape != (K, width):
+                raise ValueError(f"Parameter '{name}' must have shape {(K, width)}, got {value.shape}")
+            chunk[name] = value
+        self._add(chunk)
+
+    def extend(self, other: "LineResultBatch") -> None:
+        """Add the chunks of another container, without copying them"""
+        # a snapshot, so that a container can extend itself
+        for chunk in list(other._chunks):
+            self._add(chunk)
+
+    @classmethod
+    def concatenate(cls, batches: Iterable["LineResultBatch"]) -> "LineResultBatch":
+        result = cls()
+        for batch in batches:
+            result.extend(batch)
+        return result
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _locate(self, k: int):
+        if k < 0:
+            k += self._size
+        if not 0 <= k < self._size:
+            raise IndexError("LineResultBatch index out of range")
+        for chunk in self._chunks:
+            K = chunk["p"].shape[0]
+            if k < K:
+                return chunk, k
+            k -= K
+
+    def __getitem__(self, k: int) -> LineResult:
+        """Result of line k; its arrays are views into the container"""
+        chunk, row = self._locate(k)
+        return LineResult(*(chunk[name][row] for name in LINE_FIELDS))
+
+    def __iter__(self) -> Iterator[LineResult]:
+        for chunk in self._chunks:
+            for row in range(chunk["p"].shape[0]):
+                yield LineResult(*(chunk[name][row] for name in LINE_FIELDS))
+
+    @staticmethod
+    def _chunk_column(chunk: Dict[str, np.ndarray], name: str) -> np.ndarray:
+        if name == "PR":
+            return chunk["pb"][:, 0]
+        if name == "TotalWIP":
+            return chunk["WIP"].sum(axis=1)
+        if name == "TP":
+            return chunk["pb"][:, 0]/chunk["t"]
+        return chunk[name]
+
+    def column(self, name: str, rounded: bool = False) -> np.ndarray:
+        """Measure `name` of all lines, as a new (K, ...) array"""
+        if name not in LINE_FIELDS and name not in DERIVED_FIELDS:
+            raise KeyError(name)
+        if not self._chunks:
+            return np.empty(0)
+        value = np.concatenate([self._chunk_column(chunk, name) for chunk in self._chunks])
+        return _round(name, value, rounded)
+
+    def dtype(self) -> np.dtype:
+        M = self.M or 1
+        fields = [(name, float, (M,)) for name in ("p", "pf", "pb", "ST", "BL")]
+        fields += [("N", np.int64, (M - 1,)), ("WIP", float, (M - 1,))]
+        fields += [(name, float) for name in ("PR", "TotalWIP", "TP", "t")]
+        return np.dtype(fields)
+
+    def to_records(self, rounded: bool = False) -> np.recarray:
+        """All results as a NumPy record array with one record per line"""
+        records = np.recarray(self._size, dtype=self.dtype())
+        start = 0
+        for chunk in self._chunks:
+            stop = start + chunk["p"].shape[0]
+            for name in records.dtype.names:
+                records[name][start:stop] = _round(name, self._chunk_column(chunk, name), rounded)
+            start = stop
+        return records
+
+    def __repr__(self):
+        return f"LineResultBatch(lines={self._size}, M={self.M}, chunks={len(self._chunks)})"
@@ -0,0 +1,242 @@
+"""
+The scalar two-machine formulas in pure Python: importing this module does not import
+NumPy, so that callers that only need one formula start quickly.
+"""
+import math
+from numbers import Integral
+from typing import Iterator, Union
+from .cache import LRUCache, resolve_cache
+
+# largest buffer whose distribution P_function_two_machine_bernoulli computes in pure
+# Python; longer buffers are computed with NumPy, which is imported on first use
+SCALAR_MAX_N = 64
+
+
+def _log_geom_sum(t: float, n: int) -> float:
+    """log(1 + e^t + e^2t + ... + e^(n-1)t), without overflow for any t and n"""
+    if t == 0:
+        return math.log(n)
+    if t > 0:
+        return (n - 1)*t + _log_geom_sum(-t, n)
+    return math.log(-math.expm1(n*t)) - math.log(-math.expm1(t))
+
+
+def _logaddexp(a: float, b: float) -> float:
+    """log(e^a + e^b)"""
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def _h(x: float) -> float:
+    """x/(1 - e^-x), continuous at 0"""
+    if x == 0:
+        return 1.0
+    if x > 0:
+        return x/-math.expm1(-x)
+    return -x*math.exp(x)/-math.expm1(x)
+
+
+class _LogDistribution:
+    """
+    Buffer distribution of a two-machine Bernoulli line in log space.
+
+    With t = log(alpha), the unnormalized weights are 1 - p2 for state 0 and e^(it) for
+    state i = 1..N; log_Z is the log of their sum, evaluated with the geometric series
+    formula, so that nothing is materialized and nothing overflows for alpha > 1. For
+    alpha > 1 the logs are kept relative to the largest weight e^(Nt), so that the
+    exponents stay small for large N.
+    """
+
+    def __init__(self, p1: float, p2: float, N: int):
+        if not 0 <= p1 <= 1:
+            raise ValueError(f"Parameter 'p1' must be between 0 and 1, got {p1}")
+        if not 0 <= p2 <= 1:
+            raise ValueError(f"Parameter 'p2' must be between 0 and 1, got {p2}")
+        if not isinstance(N, Integral) or N <= 0:
+            raise ValueError(f"Parameter 'N' must be a positive integer, got {N}")
+        self.N = int(N)
+        self.empty = p1 == 0 and p2 != 0
+        if self.empty:
+            # machine 1 never produces, the buffer stays empty
+            return
+        if p1 == p2:
+            self.t = 0.0
+        elif 0 < p1 < 1 and 0 < p2 < 1:
+            # each difference is exact when the probabilities coincide
+            self.t = (math.log(p1) - math.log(p2)) + (math.log1p(-p2) - math.log1p(-p1))
+        else:
+            raise ValueError(f"The buffer distribution is undefined for p1={p1}, p2={p2}")
+        log_w0 = math.log1p(-p2) if p2 < 1 else -math.inf
+        if self.t > 0:
+            # weights relative to e^(Nt): e^((i - N)t)
+            self.top = self.N
+            log_tail = _log_geom_sum(-self.t, self.N)
+        else:
+            self.top = 0
+            log_tail = self.t + _log_geom_sum(self.t, self.N)
+        self.log_w0 = log_w0 - self.top*self.t
+        self.log_Z = _logaddexp(self.log_w0, log_tail)
+
+    def log_P(self, i: int) -> float:
+        if i == 0:
+            return self.log_w0 - self.log_Z
+        return (i - self.top)*self.t - self.log_Z
+
+    def P0(self) -> float:
+        return 1.0 if self.empty else math.exp(self.log_P(0))
+
+    def stream(self) -> Iterator[float]:
+        if self.empty:
+            yield 1.0
+            for _ in range(self.N):
+                yield 0.0
+            return
+        for i in range(self.N + 1):
+            yield math.exp(self.log_P(i))
+
+    def tail(self, k: int) -> float:
+        """P(n >= k)"""
+        if k <= 0:
+            return 1.0
+        if k > self.N:
+            return 0.0
+        if self.empty:
+            return 0.0
+        return min(math.exp((k - self.top)*self.t + _log_geom_sum(self.t, self.N - k + 1) - self.log_Z), 1.0)
+
+    def mean(self) -> float:
+        if self.empty:
+            return 0.0
+        t, N = self.t, self.N
+        # mean of the states 1..N given n >= 1, d/dt log(e^t + ... + e^Nt)
+        if abs(N*t) < 1e-2:
+            conditional = (N + 1)/2 + t*(N*N - 1)/12 - t**3*(N**4 - 1)/720
+        else:
+            conditional = 1 + (_h(N*t) - _h(t))/t
+        return (1 - self.P0())*conditional
+
+
+def P_function_two_machine_bernoulli(p1:float,p2:float,N:int,cache:Union[LRUCache,bool,None]=None)->list:
+    """
+    This function takes in two machine whose  p1 and p2 are the probability of the machine to be working at any given time. 
+    N is the maximum capacity of the buffer between the two machines
+    The function then returns a list contains the probability of the buffer being 0-N at any given time.
+
+    When p1 \neq p2:
+    P_0 = \frac{1 - p_2}{1 - p_2 + \alpha + \alpha^2 + \ldots + \alpha^N}
+    P_i=\frac{\alpha^i}{1 - p_2}P_0, i = 1, 2, \ldots, N
+    where \alpha = \frac{p_1(1 - P_2)}{P_1(1 - p_2)}
+
+    When p1 = p2 = p:
+    P_0 = \frac{1 - p}{N + 1 - p}
+    P_i = \frac{1}{N + 1 - p}, i = 1, 2, \ldots, N
+    Parameters:
+    p1 (float): The probability of machine 1 working at any given time
+    p2 (float): The probability of machine 2 working at any given time
+    N (int): The maximum capacity of the buffer between the two machines
+    cache (LRUCache, optional): Cache to memoize the result in. None uses the process-wide cache
+    if it is enabled, True enables and uses it, False disables caching for this call.
+
+    Returns:
+    list: The probability of the buffer being 0-N at any given time
+    """
+    cache = resolve_cache(cache)
+    if cache is not None:
+        return cache.lookup("P", P_function_two_machine_bernoulli, p1, p2, N)
+    if p1 == p2:
+        P_0 = (1 - p1)/(N + 1 - p1)
+        P = [P_0] + [1/(N + 1 - p1)]*N
+    elif N <= SCALAR_MAX_N:
+        # log-space closed form, see buffer_distribution
+        P = list(_LogDistribution(p1, p2, N).stream())
+    else:
+        from .distribution import buffer_distribution  # NumPy is faster for long buffers
+        P = buffer_distribution(p1, p2, N)
+    return P
+
+
+def Q_function_bernoulli(p1:float,p2:float,N:int,cache:Union[LRUCache,bool,None]=None)->float:
+
+    """
+    This function takes in two machine whose  p1 and p2 are the probability of the machine to be working at any given time. 
+    N is the maximum capacity of the buffer between the two machines
+    This function is used to calculate the probability of the buffer is empty.
+    
+    When p1 \neq p2:
+    Q(p_1, p_2, N)= \frac{(1 - p_1)(1 - \alpha(p_1, p_2))}{1 - \frac{p_1}{p_2}alpha^N(p_1, p_2)}
+    where \alpha(p_1, p_2) = \frac{p_1(1 - p_2)}{p_2(1 - p_1)}
+
+    When p1 = p2 = p:
+    Q(p, p, N) = \frac{1 - p}{N + 1 - p}
+
+    Parameters:
+    p1 (float): The probability of machine 1 working at any given time
+    p2 (float): The probability of machine 2 working at any given time
+    N (int): The maximum capacity of the buffer between the two machines
+    cache (LRUCache, optional): Cache to memoize the result in. None uses the process-wide cache
+    if it is enabled, True enables and uses it, False disables caching for this call.
+
+    Returns:
+    float: The probability of the buffer being empty
+    """
+    if cache is not False:
+        cache = resolve_cache(cache)
+        if cache is not None:
+            return cache.lookup("Q", Q_function_bernoulli, p1, p2, N)
+    return _Q(p1, p2, N)
+
+
+def _Q(p1: float, p2: float, N: int) -> float:
+    """Q_function_bernoulli without the cache, for the inner loop of the aggregation"""
+    if p1 == p2:
+        return (1 - p1)/(N + 1 - p1)
+    alpha = p1*(1 - p2)/(p2*(1 - p1))
+    return (1 - p1)*(1 - alpha)/(1 - p1*alpha**N/p2)
+
+    
+def performance_measure_two_machine(p1:float,p2:float,N:int,cache:Union[LRUCache,bool,None]=None)->dict:
+    """
+    This function takes in two machine whose  p1 and p2 are the probability of the machine to be working at any given time. 
+    N is the maximum capacity of the buffer between the two machines
+    The function then returns a dictionary containing the performance measures of the system, 
+    which contains the production rate(PR), work-in-process(WIP), blockages of machine 1(BL_1) and starvations of machine 2(ST_2).
+
+    PR = p_2(1 - Q(p_1, p_2, N))
+
+    WIP = \sum_{i=0}^{N}iP_i
+    when p_1 \neq p_2:
+    WIP=\frac{p_i}{p_2 - p_1\alpha^N(p_1, p_2)}*(\frac{1-\alpha^N(p_1, p_2)}{1-\alpha(p_1, p_2)} - N\alpha^N(p_1, p_2))
+    when p_1 = p_2 = p:
+    WIP=\frac{N(N + 1)}{2(N + 1 - p)}
+
+    BL_1 = p_1Q(p_2, p_1, N)
+
+    ST_2 = p_2Q(p_1, p_2, N)
+
+    Parameters:
+    p1 (float): The probability of machine 1 working at any given time
+    p2 (float): The probability of machine 2 working at any given time
+    N (int): The maximum capacity of the buffer between the two machines
+    cache (LRUCache, optional): Cache to memoize the result in. None uses the process-wide cache
+    if it is enabled, True enables and uses it, False disables caching for this call.
+
+    Returns:
+    dict: The performance measures of the system, 
+    which contains the production rate(PR), work-in-process(WIP), blockages of machine 1(BL_1) and starvations of machine 2(ST_2). 
+    And PR, BL, and ST are round to four significant digits, WIP is round to two decimal places.
+    """
+    cache = resolve_cache(cache)
+    if cache is not None:
+        return cache.lookup("performance", performance_measure_two_machine, p1, p2, N)
+    PR = round(p2*(1 - Q_function_bernoulli(p1, p2, N, False)), 4)
+    if p1 == p2:
+        WIP = round(N*(N + 1)/(2*(N + 1 - p1)), 2)
+    else:
+        alpha = p1*(1 - p2)/(p2*(1 - p1))
+        WIP = round(p1/(p2 - p1*alpha**N)*((1 - alpha**N)/(1 - alpha) - N*alpha**N) , 2)
+    BL_1 = round(p1*Q_function_bernoulli(p2, p1, N, False), 4)
+    ST_2 = round(p2*Q_function_bernoulli(p1, p2, N, False), 4)
+    return {"PR": PR, "WIP": WIP, "BL_1": BL_1, "ST_2": ST_2}
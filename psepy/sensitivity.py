@@ -0,0 +1,108 @@
+from typing import Iterable, List, NamedTuple
+import numpy as np
+from .batch import _aggregate_lines, _line_metrics
+from .constants import MAX_ITERATIONS
+from .validators import InputValidator
+
+
+class BottleneckAnalysis(NamedTuple):
+    PR: float
+    dPR_dp: np.ndarray
+    dPR_dN: np.ndarray
+    BL: np.ndarray
+    ST: np.ndarray
+    arrows: List[str]
+    bottlenecks: List[int]
+    severity: List[float]
+    primary: int
+    solves: int
+
+
+def _arrows(BL: np.ndarray, ST: np.ndarray) -> List[str]:
+    """'>' between machines i and i + 1 if BL_i > ST_{i+1}, i.e. the arrow points downstream, else '<'"""
+    return ['>' if BL[i] > ST[i + 1] else '<' for i in range(BL.size - 1)]
+
+
+def bottleneck_analysis(
+    p: Iterable[float],
+    N: Iterable[int],
+    delta: float = 1e-4,
+    tol: float = 1e-10,
+    max_iter: int = MAX_ITERATIONS
+) -> BottleneckAnalysis:
+    """
+    Sensitivities of the production rate of a Bernoulli line and its bottlenecks.
+
+    The line is aggregated once; then every perturbed line, p_i +/- delta for each machine
+    and N_i + 1 for each buffer, is aggregated in a single batch warm-started from the
+    p^f and p^b of the base line. dPR/dp_i is a central difference (one-sided at p_i = 0
+    or 1) and dPR/dN_i the gain of one more unit of capacity.
+
+    The bottleneck indicator is the arrow-based rule: the arrow between machines i and
+    i + 1 points downstream if BL_i > ST_{i+1} and upstream otherwise. Machines with no
+    arrow leaving them are bottlenecks, with severity
+    S_i = |ST_{i+1} - BL_i| + |BL_{i-1} - ST_i| (one term for the first and the last
+    machine), and the one with the largest severity is the primary bottleneck.
+
+    Parameters:
+        p (Iterable[float]): The probability of each machine working at any time
+        N (Iterable[int]): The maximum capacity of the buffer between each machine
+        delta (float, optional): Perturbation of the probabilities. Defaults to 1e-4.
+        tol (float, optional): Convergence threshold, well below delta times the derivatives. Defaults to 1e-10.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+
+    Returns:
+        BottleneckAnalysis: PR, dPR_dp (M,), dPR_dN (M - 1,), BL and ST (M,), the arrows,
+        the bottleneck machines (0-based) with their severities, the primary bottleneck and
+        the number of lines aggregated
+    """
+    p = list(p)
+    N = list(N)
+    if len(p) < 2:
+        raise ValueError("A line must have at least two machines")
+    if len(N) != len(p) - 1:
+        raise ValueError(f"Parameter 'N' must have length of {len(p) - 1}")
+    InputValidator.validate_probability_array(p, "p", (None,))
+    InputValidator.validate_positive_int_array(N, "N", (None,))
+    if not 0 < delta < 0.5:
+        raise ValueError(f"Parameter 'delta' must be in (0, 0.5), got {delta}")
+    p = np.array(p, dtype=float)[None, :]
+    N = np.array(N, dtype=float)[None, :]
+    M = p.shape[1]
+
+    p_f, p_b, _ = _aggregate_lines(p, N, tol, None, None, max_iter)
+    _, BL, ST = _line_metrics(p, p_f, p_b, N)
+
+    # rows 0..M-1: p_i + delta, M..2M-1: p_i - delta, 2M..3M-2: N_i + 1
+    eye = np.eye(M)
+    up = np.minimum(p + delta*eye, 1.0)
+    down = np.maximum(p - delta*eye, 0.0)
+    p_perturbed = np.vstack([up, down, np.repeat(p, M - 1, axis=0)])
+    N_perturbed = np.vstack([np.repeat(N, 2*M, axis=0), N + np.eye(M - 1)])
+    K = p_perturbed.shape[0]
+    _, p_b_perturbed, _ = _aggregate_lines(
+        p_perturbed, N_perturbed, tol, np.repeat(p_f, K, axis=0), np.repeat(p_b, K, axis=0), max_iter
+    )
+    PR = p_b[0, 0]
+    PR_perturbed = p_b_perturbed[:, 0]
+    step = up.diagonal() - down.diagonal()
+    dPR_dp = (PR_perturbed[:M] - PR_perturbed[M:2*M])/step
+    dPR_dN = PR_perturbed[2*M:] - PR
+
+    BL, ST = BL[0], ST[0]
+    arrows = _arrows(BL, ST)
+    bottlenecks, severity = [], []
+    for i in range(M):
+        # no arrow leaves machine i
+        if (i == 0 or arrows[i - 1] == '>') and (i == M - 1 or arrows[i] == '<'):
+            bottlenecks.append(i)
+            value = 0.0
+            if i < M - 1:
+                value += abs(ST[i + 1] - BL[i])
+            if i > 0:
+                value += abs(BL[i - 1] - ST[i])
+            severity.append(float(value))
+    primary = bottlenecks[int(np.argmax(severity))]
+    return BottleneckAnalysis(
+        float(PR), dPR_dp, dPR_dN, BL, ST, arrows, bottlenecks, severity, primary, K + 1
+    )
@@ -0,0 +1,249 @@
+"""
+Asyncio service over performance_measure_multiply_machine_bernoulli and agg_machines.
+
+Every request goes through three steps:
+
+- validation, on the event loop, with the array validators, so that an invalid request
+  fails on its own and never reaches a batch;
+- coalescing: a request identical to one in flight waits for the result of that one
+  instead of being solved again;
+- micro-batching: requests of the same group (lines of the same length M, or cells of
+  the same S, mode and units) are queued and solved together by the batch solvers, as
+  soon as max_batch requests are queued or max_delay seconds after the first one.
+
+The batches are solved on an executor, a thread pool by default, so the event loop never
+blocks on a solve; a ProcessPoolExecutor may be passed instead. When a batch fails, e.g.
+because one of its lines does not converge, its requests are solved one by one so that
+only the failing ones get the error. LocalClient runs a service on an event loop in a
+background thread, for callers and tests without an event loop of their own.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from .batch import agg_machines_batch, performance_measure_multiply_machine_bernoulli_batch
+from .constants import CONVERGENCE_THRESHOLD, MAX_ITERATIONS
+from .core import _check_agg_machines
+from .validators import InputValidator
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY = 0.002
+
+
+def _solve_lines(p: np.ndarray, N: np.ndarray, t: np.ndarray, rounded: List[bool], tol: float,
+                 max_iter: int) -> List[dict]:
+    result = performance_measure_multiply_machine_bernoulli_batch(p, N, t, tol=tol, max_iter=max_iter, as_result=True)
+    return [line.to_dict(r) for line, r in zip(result, rounded)]
+
+
+def _solve_cells(c: np.ndarray, T_up: np.ndarray, T_down: np.ndarray, mode: str, c_unit: str,
+                 T_up_unit: str, T_down_unit: str) -> List[Tuple[float, float, float]]:
+    rows = agg_machines_batch(c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit, validate=False)
+    return list(zip(*(row.tolist() for row in rows)))
+
+
+class SolverService:
+    """
+    Coalescing, micro-batching asyncio facade of the solvers; see the module docstring.
+
+    Parameters:
+        max_batch (int, optional): Largest number of requests solved in one batch. Defaults to 256.
+        max_delay (float, optional): Seconds a request waits for others to join its batch. Defaults to 0.002.
+        executor (Executor, optional): Executor of the solves. Defaults to a thread pool owned by
+            the service and shut down by close().
+        workers (int, optional): Number of threads of the default executor.
+        tol, max_iter (optional): Convergence options of the line solves.
+
+    stats counts the requests, the coalesced requests, the batches and the lines or cells solved.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        executor: Optional[Executor] = None,
+        workers: Optional[int] = None,
+        tol: float = CONVERGENCE_THRESHOLD,
+        max_iter: int = MAX_ITERATIONS
+    ):
+        InputValidator.validate_positive_int(max_batch, "max_batch")
+        if not max_delay >= 0:
+            raise ValueError(f"Parameter 'max_delay' must be non-negative, got {max_delay}")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.tol = tol
+        self.max_iter = max_iter
+        self._owns_executor = executor is None
+        self._executor = ThreadPoolExecutor(max_workers=workers) if executor is None else executor
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._queues: Dict[Hashable, list] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks = set()
+        self._closed = False
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "solved": 0}
+
+    async def performance_measure_multiply_machine_bernoulli(
+        self,
+        p: Iterable[float],
+        M: int,
+        N: Iterable[int],
+        t: float = 1.0,
+        rounded: bool = True
+    ) -> dict:
+        """The measures of performance_measure_multiply_machine_bernoulli, solved with the batch solver"""
+        if not isinstance(M, int) or M < 2:
+            raise ValueError("A line must have at least two machines")
+        p = InputValidator.validate_probability_array(p, "p", (M,))
+        N = InputValidator.validate_positive_int_array(N, "N", (M - 1,))
+        if not isinstance(t, (int, float)) or not t > 0:
+            raise ValueError(f"Parameter 't' must be positive, got {t}")
+        p, N, t = tuple(p.tolist()), tuple(N.tolist()), float(t)
+        result = await self._submit(("line", p, N, t, rounded), ("line", M), (p, N, t, rounded))
+        # coalesced requests share the result: every caller gets its own lists
+        return {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
+
+    async def agg_machines(
+        self,
+        S: int,
+        c: Iterable[Union[float, int]],
+        T_up: Iterable[Union[float, int]],
+        T_down: Iterable[Union[float, int]],
+        mode: str = 'parallel',
+        c_unit: str = 'parts/sec',
+        T_up_unit: str = 'seconds',
+        T_down_unit: str = 'seconds'
+    ) -> Tuple[float, float, float]:
+        """The aggregated machine of agg_machines, solved with agg_machines_batch"""
+        c, T_up, T_down = _check_agg_machines(S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit)
+        group = ("agg", S, mode, c_unit, T_up_unit, T_down_unit)
+        cell = (tuple(c.tolist()), tuple(T_up.tolist()), tuple(T_down.tolist()))
+        return await self._submit(group + cell, group, cell)
+
+    async def _submit(self, key: Hashable, group: Hashable, args: tuple):
+        if self._closed:
+            raise RuntimeError("The service is closed")
+        self.stats["requests"] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = self._inflight[key] = loop.create_future()
+        queue = self._queues.setdefault(group, [])
+        queue.append((key, args))
+        if len(queue) >= self.max_batch:
+            self._flush(group)
+        elif len(queue) == 1:
+            self._timers[group] = loop.call_later(self.max_delay, self._flush, group)
+        # a cancelled caller must not cancel the solve that coalesced callers wait for
+        return await asyncio.shield(future)
+
+    def _flush(self, group: Hashable) -> None:
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._queues.pop(group, [])
+        if requests:
+            task = asyncio.get_running_loop().create_task(self._run(group, requests))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _solver(self, group: Hashable, args: List[tuple]):
+        if group[0] == "line":
+            p, N, t, rounded = zip(*args)
+            return partial(_solve_lines, np.array(p), np.array(N), np.array(t), list(rounded), self.tol, self.max_iter)
+        c, T_up, T_down = zip(*args)
+        return partial(_solve_cells, np.array(c), np.array(T_up), np.array(T_down), *group[2:])
+
+    async def _run(self, group: Hashable, requests: list) -> None:
+        loop = asyncio.get_running_loop()
+        keys = [key for key, _ in requests]
+        args = [arg for _, arg in requests]
+        try:
+            self.stats["batches"] += 1
+            try:
+                results = await loop.run_in_executor(self._executor, self._solver(group, args))
+            except Exception as error:
+                if len(args) == 1:
+                    results = [error]
+                else:
+                    results = []
+                    for arg in args:
+                        try:
+                            results.append((await loop.run_in_executor(self._executor, self._solver(group, [arg])))[0])
+                        except Exception as single_error:
+                            results.append(single_error)
+            for key, result in zip(keys, results):
+                future = self._inflight.pop(key)
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    self.stats["solved"] += 1
+                    future.set_result(result)
+        finally:
+            # e.g. cancelled by close(): no request may wait forever
+            for key in keys:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(RuntimeError("The service is closed"))
+
+    async def close(self) -> None:
+        """Solve the queued requests, wait for the running batches and shut down the owned executor"""
+        self._closed = True
+        for group in list(self._queues):
+            self._flush(group)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class LocalClient:
+    """
+    In-process client of a SolverService running on an event loop in a background thread.
+
+    The methods block until the result is available and may be called from any number of
+    threads; concurrent calls are coalesced and batched like concurrent requests of the
+    service. submit() returns a concurrent.futures.Future instead of waiting.
+    Keyword arguments are passed to SolverService.
+    """
+
+    def __init__(self, **service_options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="psepy-service", daemon=True)
+        self._thread.start()
+        self.service = SolverService(**service_options)
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        coroutine = getattr(self.service, method)(*args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def performance_measure_multiply_machine_bernoulli(self, p: Iterable[float], M: int, N: Iterable[int],
+                                                       t: float = 1.0, rounded: bool = True) -> dict:
+        return self.submit("performance_measure_multiply_machine_bernoulli", p, M, N, t, rounded).result()
+
+    def agg_machines(self, S: int, c, T_up, T_down, mode: str = 'parallel', c_unit: str = 'parts/sec',
+                     T_up_unit: str = 'seconds', T_down_unit: str = 'seconds') -> Tuple[float, float, float]:
+        return self.submit("agg_machines", S, c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit).result()
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.service.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,186 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, Iterable, Optional, Tuple, Union
+import numpy as np
+from .sweep import _chunks
+from .validators import InputValidator
+
+# random draws generated at once, slots x replications x machines
+_DRAW_BLOCK = 1 << 22
+
+
+class _LineState:
+    """
+    Buffer levels of R replications of a Bernoulli line and the step of one time slot.
+
+    Within a slot the machines are up or down independently, with probability p_i. Machine
+    i is starved if it is up and buffer i - 1 is empty at the start of the slot, and blocked
+    if it is up, buffer i is full and machine i + 1 does not take a part in the slot
+    (blocked before service); the first machine is never starved and the last never
+    blocked. A machine that is up, not starved and not blocked produces one part. These are
+    the conventions of the two-machine formulas, so the simulation converges to the exact
+    measures of two-machine lines and checks the aggregation of longer lines.
+    """
+
+    def __init__(self, N: np.ndarray, replications: int):
+        self.N = N
+        self.level = np.zeros((replications, N.size), dtype=np.int64)
+        M = N.size + 1
+        self.produced = np.empty((replications, M), dtype=bool)
+        self.starved = np.zeros((replications, M), dtype=bool)
+        self.blocked = np.zeros((replications, M), dtype=bool)
+
+    def step(self, up: np.ndarray) -> None:
+        """Advance every replication by one slot, given the (R, M) machine states"""
+        level, produced, starved, blocked = self.level, self.produced, self.starved, self.blocked
+        M = up.shape[1]
+        empty = level == 0
+        np.logical_and(up[:, 1:], empty, out=starved[:, 1:])
+        np.logical_and(up[:, -1], ~empty[:, -1], out=produced[:, -1])
+        # downstream first: whether machine i + 1 takes a part decides if machine i is blocked
+        for i in range(M - 2, -1, -1):
+            np.logical_and(up[:, i], level[:, i] >= self.N[i], out=blocked[:, i])
+            blocked[:, i] &= ~produced[:, i + 1]
+            np.logical_and(up[:, i], ~blocked[:, i], out=produced[:, i])
+            if i:
+                produced[:, i] &= ~starved[:, i]
+        level += produced[:, :-1]
+        level -= produced[:, 1:]
+
+
+def _simulate_chunk(p: np.ndarray, N: np.ndarray, slots: int, warmup: int, replications: int,
+                    seed: np.random.SeedSequence) -> Tuple[np.ndarray, ...]:
+    """
+    Simulate `replications` independent replications with the generator of `seed`.
+
+    Returns:
+        tuple[np.ndarray, ...]: per replication, the parts produced per slot (R,), the mean
+        buffer levels (R, M - 1) and the fractions of blocked (R, M) and starved (R, M) slots
+    """
+    rng = np.random.default_rng(seed)
+    M = p.size
+    state = _LineState(N, replications)
+    produced = np.zeros(replications, dtype=np.int64)
+    level = np.zeros((replications, M - 1), dtype=np.int64)
+    blocked = np.zeros((replications, M), dtype=np.int64)
+    starved = np.zeros((replications, M), dtype=np.int64)
+    block = max(_DRAW_BLOCK//(replications*M), 1)
+    total = warmup + slots
+    for start in range(0, total, block):
+        # machine states of a block of slots at once
+        up = rng.random((min(block, total - start), replications, M)) < p
+        for offset, states in enumerate(up):
+            state.step(states)
+            if start + offset >= warmup:
+                produced += state.produced[:, -1]
+                level += state.level
+                blocked += state.blocked
+                starved += state.starved
+    return produced/slots, level/slots, blocked/slots, starved/slots
+
+
+def _interval(samples: np.ndarray, z: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean over the replications (axis 0) and the half-width of its normal confidence interval"""
+    mean = samples.mean(axis=0)
+    if samples.shape[0] < 2:
+        return mean, np.full_like(mean, np.nan)
+    return mean, z*samples.std(axis=0, ddof=1)/np.sqrt(samples.shape[0])
+
+
+def simulate_bernoulli_line(
+    p: Iterable[float],
+    N: Iterable[int],
+    slots: int = 10000,
+    replications: int = 100,
+    warmup: Optional[int] = None,
+    t: float = 1.0,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    confidence: float = 0.95,
+    chunk_size: int = 64,
+    workers: Optional[int] = 1,
+    rounded: bool = True
+) -> Dict[str, Union[float, list, dict]]:
+    """
+    Monte Carlo simulation of a Bernoulli line, to validate the analytic measures of
+    performance_measure_multiply_machine_bernoulli.
+
+    All replications are advanced together, one NumPy operation per machine and slot, and
+    the machine states of many slots are drawn at once. The replications are split into
+    chunks of chunk_size, and chunk j uses a generator seeded with the j-th child of
+    SeedSequence(seed), so the results depend on seed and chunk_size only and not on the
+    number of workers the chunks are spread over.
+
+    Parameters:
+        p (Iterable[float]): The probability of each machine working at any time
+        N (Iterable[int]): The maximum capacity of the buffer between each machine
+        slots (int, optional): Number of measured time slots per replication. Defaults to 10000.
+        replications (int, optional): Number of independent replications. Defaults to 100.
+        warmup (int, optional): Number of slots simulated before measuring, starting from empty
+            buffers. Defaults to slots//10.
+        t (float, optional): The time period of the system. Defaults to 1.0.
+        seed (int or SeedSequence, optional): Seed of the random streams. Defaults to fresh entropy.
+        confidence (float, optional): Level of the confidence intervals. Defaults to 0.95.
+        chunk_size (int, optional): Number of replications per chunk. Defaults to 64.
+        workers (int, optional): Number of worker processes; None uses os.cpu_count(). Defaults to 1.
+        rounded (bool, optional): Round like performance_measure_multiply_machine_bernoulli. Defaults to True.
+
+    Returns:
+        dict: p, ST, BL, N, WIP, PR, TotalWIP and TP in the format of
+        performance_measure_multiply_machine_bernoulli, the means over the replications; CI,
+        the half-widths of their confidence intervals with the same keys; replications, slots
+        and confidence
+    """
+    p = list(p)
+    N = list(N)
+    if len(p) < 2:
+        raise ValueError("A line must have at least two machines")
+    if len(N) != len(p) - 1:
+        raise ValueError(f"Parameter 'N' must have length of {len(p) - 1}")
+    InputValidator.validate_probability_array(p, "p", (None,))
+    InputValidator.validate_positive_int_array(N, "N", (None,))
+    InputValidator.validate_positive_int(slots, "slots")
+    InputValidator.validate_positive_int(replications, "replications")
+    if warmup is None:
+        warmup = slots//10
+    if not isinstance(warmup, int) or warmup < 0:
+        raise ValueError(f"Parameter 'warmup' must be a non-negative integer, got {warmup}")
+    if not 0 < confidence < 1:
+        raise ValueError(f"Parameter 'confidence' must be between 0 and 1, got {confidence}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError(f"Parameter 'workers' must be a positive integer, got {workers}")
+
+    p_array = np.array(p, dtype=float)
+    N_array = np.array(N, dtype=np.int64)
+    chunks = _chunks(replications, chunk_size)
+    seeds = (seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(len(chunks))
+    arguments = [(p_array, N_array, slots, warmup, stop - start, child) for (start, stop), child in zip(chunks, seeds)]
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        parts = [_simulate_chunk(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = [future.result() for future in [executor.submit(_simulate_chunk, *args) for args in arguments]]
+    PR_samples, WIP_samples, BL_samples, ST_samples = (np.concatenate(column) for column in zip(*parts))
+
+    z = NormalDist().inv_cdf((1 + confidence)/2)
+    measures, CI = {}, {}
+    for name, samples in (("PR", PR_samples), ("WIP", WIP_samples), ("BL", BL_samples), ("ST", ST_samples),
+                          ("TotalWIP", WIP_samples.sum(axis=1)), ("TP", PR_samples/t)):
+        measures[name], CI[name] = _interval(samples, z)
+
+    def export(name: str, value: np.ndarray):
+        if rounded:
+            value = np.round(value, 2 if name in ("WIP", "TotalWIP") else 4)
+        return float(value) if value.ndim == 0 else value.tolist()
+
+    result = {"p": p, "ST": export("ST", measures["ST"]), "BL": export("BL", measures["BL"]), "N": N,
+              "WIP": export("WIP", measures["WIP"]), "PR": export("PR", measures["PR"]),
+              "TotalWIP": export("TotalWIP", measures["TotalWIP"]), "TP": export("TP", measures["TP"])}
+    result["CI"] = {name: export(name, value) for name, value in CI.items()}
+    result["replications"] = replications
+    result["slots"] = slots
+    result["confidence"] = confidence
+    return result
@@ -0,0 +1,225 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+from .batch import performance_measure_multiply_machine_bernoulli_batch
+from .constants import CONVERGENCE_THRESHOLD
+from .results import LINE_FIELDS, LineResultBatch
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+
+def line_columns(M: int) -> Dict[str, Tuple[str, tuple]]:
+    """Columns of a store of line definitions with M machines"""
+    return {"p": ("<f8", (M,)), "N": ("<i8", (M - 1,)), "t": ("<f8", ())}
+
+
+def result_columns(M: int) -> Dict[str, Tuple[str, tuple]]:
+    """Columns of a store of solver outputs for lines with M machines, as kept by LineResultBatch"""
+    widths = {"p": (M,), "pf": (M,), "pb": (M,), "N": (M - 1,), "ST": (M,), "BL": (M,), "WIP": (M - 1,), "t": ()}
+    return {name: ("<f8", widths[name]) for name in LINE_FIELDS}
+
+
+class ColumnStore:
+    """
+    Directory of raw little-endian column files plus a meta.json schema.
+
+    Column `name` is stored in `name.bin` as a row-major (rows, *shape) array, so any
+    column can be opened with numpy.memmap without reading the file, and rows are
+    appended by writing to the end of every file. meta.json holds the schema and the
+    number of complete rows; it is replaced atomically after each append, so readers
+    never see a partially written row.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.isfile(meta_path):
+            raise FileNotFoundError(f"No column store at {self.path}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported column store version {meta.get('version')}")
+        self.columns = {name: (spec["dtype"], tuple(spec["shape"])) for name, spec in meta["columns"].items()}
+        self.attrs = meta.get("attrs", {})
+        self.rows = meta["rows"]
+
+    @classmethod
+    def create(
+        cls,
+        path: Union[str, os.PathLike],
+        columns: Dict[str, Tuple[str, tuple]],
+        attrs: Optional[dict] = None,
+        overwrite: bool = False
+    ) -> "ColumnStore":
+        """Create an empty store with the given {name: (dtype, row shape)} schema"""
+        path = os.fspath(path)
+        if os.path.exists(os.path.join(path, META_FILE)) and not overwrite:
+            raise FileExistsError(f"A column store already exists at {path}")
+        os.makedirs(path, exist_ok=True)
+        for name, (dtype, _) in columns.items():
+            if not name.isidentifier():
+                raise ValueError(f"Invalid column name {name!r}")
+            np.dtype(dtype)
+            open(os.path.join(path, f"{name}.bin"), "wb").close()
+        meta = {
+            "version": FORMAT_VERSION,
+            "rows": 0,
+            "columns": {name: {"dtype": np.dtype(dtype).str, "shape": list(shape)} for name, (dtype, shape) in columns.items()},
+            "attrs": attrs or {}
+        }
+        cls._write_meta(path, meta)
+        return cls(path)
+
+    @staticmethod
+    def _write_meta(path: str, meta: dict) -> None:
+        temporary = os.path.join(path, META_FILE + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary, os.path.join(path, META_FILE))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _row_bytes(self, name: str) -> int:
+        dtype, shape = self.columns[name]
+        return np.dtype(dtype).itemsize*int(np.prod(shape, dtype=int))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def append(self, **arrays) -> None:
+        """Append K rows; every column must be given as a (K, *shape) array"""
+        if set(arrays) != set(self.columns):
+            raise ValueError(f"Columns {sorted(self.columns)} are required, got {sorted(arrays)}")
+        arrays = {name: np.asarray(value) for name, value in arrays.items()}
+        # number of rows: leading dimension of the first column given with one
+        K = next((arrays[name].shape[0] for name, (_, shape) in self.columns.items()
+                  if arrays[name].ndim > len(shape)), 1)
+        converted = {}
+        for name, (dtype, shape) in self.columns.items():
+            value = arrays[name]
+            try:
+                converted[name] = np.ascontiguousarray(np.broadcast_to(value, (K,) + shape), dtype=np.dtype(dtype))
+            except ValueError:
+                raise ValueError(f"Column '{name}' must have shape {(K,) + shape}, got {value.shape}")
+        if K == 0:
+            return
+        for name, value in converted.items():
+            with open(self._file(name), "r+b") as f:
+                # overwrite anything left behind by an interrupted append
+                f.seek(self.rows*self._row_bytes(name))
+                f.write(value.tobytes())
+                f.truncate()
+        self.rows += K
+        self._write_meta(self.path, {
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "columns": {name: {"dtype": dtype, "shape": list(shape)} for name, (dtype, shape) in self.columns.items()},
+            "attrs": self.attrs
+        })
+
+    def read(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Rows start..stop of a column as a read-only memory map"""
+        if name not in self.columns:
+            raise KeyError(name)
+        dtype, shape = self.columns[name]
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        rows = max(stop - start, 0)
+        if rows == 0:
+            return np.empty((0,) + shape, dtype=np.dtype(dtype))
+        return np.memmap(self._file(name), dtype=np.dtype(dtype), mode="r",
+                         offset=start*self._row_bytes(name), shape=(rows,) + shape)
+
+    def iter_chunks(self, chunk_size: int, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield consecutive chunks of chunk_size rows as {name: memmap} mappings"""
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError(f"Parameter 'chunk_size' must be a positive integer, got {chunk_size}")
+        names = list(self.columns if columns is None else columns)
+        for start in range(0, self.rows, chunk_size):
+            yield {name: self.read(name, start, start + chunk_size) for name in names}
+
+    def __repr__(self):
+        return f"ColumnStore({self.path!r}, rows={self.rows}, columns={list(self.columns)})"
+
+
+def write_lines(
+    path: Union[str, os.PathLike],
+    p: Iterable,
+    N: Iterable,
+    t: Iterable = 1.0,
+    append: bool = False
+) -> ColumnStore:
+    """
+    Write K line definitions of M machines to a column store with columns p (M,), N (M - 1,)
+    and t. With append=True the lines are added to an existing store.
+    """
+    p = np.atleast_2d(np.asarray(p, dtype=float))
+    K, M = p.shape
+    if append and os.path.exists(os.path.join(os.fspath(path), META_FILE)):
+        store = ColumnStore(path)
+        if store.attrs.get("kind") != "lines" or store.attrs.get("M") != M:
+            raise ValueError(f"The store at {store.path} does not hold lines of {M} machines")
+    else:
+        store = ColumnStore.create(path, line_columns(M), {"kind": "lines", "M": M}, overwrite=True)
+    store.append(p=p, N=np.broadcast_to(np.asarray(N), (K, M - 1)), t=np.broadcast_to(np.asarray(t, dtype=float), (K,)))
+    return store
+
+
+def read_lines(path: Union[str, os.PathLike]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """p (K, M), N (K, M - 1) and t (K,) of a line store, as read-only memory maps"""
+    store = ColumnStore(path)
+    return store.read("p"), store.read("N"), store.read("t")
+
+
+def append_results(path: Union[str, os.PathLike], results: LineResultBatch) -> ColumnStore:
+    """Append solver outputs to a result store, creating the store if there is none"""
+    if not isinstance(results, LineResultBatch):
+        raise TypeError(f"Parameter 'results' must be a LineResultBatch, got {type(results).__name__}")
+    if not len(results):
+        raise ValueError("Parameter 'results' holds no lines")
+    M = results.M
+    if os.path.exists(os.path.join(os.fspath(path), META_FILE)):
+        store = ColumnStore(path)
+        if store.attrs.get("kind") != "results" or store.attrs.get("M") != M:
+            raise ValueError(f"The store at {store.path} does not hold results of lines of {M} machines")
+    else:
+        store = ColumnStore.create(path, result_columns(M), {"kind": "results", "M": M})
+    for chunk in results._chunks:
+        store.append(**chunk)
+    return store
+
+
+def read_results(path: Union[str, os.PathLike], chunk_size: Optional[int] = None) -> LineResultBatch:
+    """
+    Results of a result store as a LineResultBatch whose chunks are read-only memory maps,
+    so nothing is loaded until a column or a line is accessed.
+    """
+    store = ColumnStore(path)
+    if store.attrs.get("kind") != "results":
+        raise ValueError(f"The store at {store.path} does not hold results")
+    return LineResultBatch(store.iter_chunks(chunk_size or max(store.rows, 1)))
+
+
+def solve_line_store(
+    lines_path: Union[str, os.PathLike],
+    results_path: Union[str, os.PathLike],
+    chunk_size: int = 4096,
+    tol: float = CONVERGENCE_THRESHOLD
+) -> ColumnStore:
+    """
+    Solve every line of a line store with performance_measure_multiply_machine_bernoulli_batch,
+    streaming chunk_size lines at a time from disk and appending the unrounded results to
+    a result store.
+    """
+    lines = ColumnStore(lines_path)
+    store = None
+    for chunk in lines.iter_chunks(chunk_size):
+        result = performance_measure_multiply_machine_bernoulli_batch(
+            chunk["p"], chunk["N"], chunk["t"], tol=tol, as_result=True
+        )
+        store = append_results(results_path, result)
+    return store if store is not None else ColumnStore.create(
+        results_path, result_columns(lines.attrs["M"]), {"kind": "results", "M": lines.attrs["M"]}
+    )
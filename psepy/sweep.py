@@ -0,0 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from .batch import (
+    agg_machines_batch,
+    performance_measure_multiply_machine_bernoulli_batch,
+    _agg_batch_inputs,
+    _line_batch_inputs
+)
+from .constants import CONVERGENCE_THRESHOLD
+
+LINE_OUTPUTS = {"pf": "M", "pb": "M", "ST": "M", "BL": "M", "WIP": "M-1", "PR": "", "TotalWIP": "", "TP": ""}
+
+
+class _SharedArrays:
+    """
+    A set of named NumPy arrays backed by shared memory blocks.
+
+    The parent process creates the blocks; workers attach to them by name through
+    the spec returned by `spec()`, so that no array data is pickled.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self.arrays = {}
+
+    def create(self, name: str, shape: tuple, dtype=float, data: Optional[np.ndarray] = None) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        if data is not None:
+            array[...] = data
+        self._blocks[name] = block
+        self.arrays[name] = array
+        return array
+
+    def spec(self) -> Dict[str, Tuple[str, tuple, str]]:
+        return {name: (self._blocks[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()}
+
+    def close(self) -> None:
+        self.arrays.clear()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(spec: Dict[str, Tuple[str, tuple, str]]) -> Tuple[list, Dict[str, np.ndarray]]:
+    """Attach to the shared memory blocks of a _SharedArrays spec inside a worker"""
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _chunks(K: int, chunk_size: int) -> list:
+    """Split range(K) into consecutive [start, stop) chunks; independent of the worker count"""
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError(f"Parameter 'chunk_size' must be a positive integer, got {chunk_size}")
+    return [(start, min(start + chunk_size, K)) for start in range(0, K, chunk_size)]
+
+
+def _run(worker, spec: dict, chunks: list, workers: Optional[int], **kwargs) -> None:
+    """Run worker(spec, start, stop, **kwargs) for every chunk, inline or on a process pool"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError(f"Parameter 'workers' must be a positive integer, got {workers}")
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        for start, stop in chunks:
+            worker(spec, start, stop, **kwargs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker, spec, start, stop, **kwargs) for start, stop in chunks]
+        for future in futures:
+            future.result()
+
+
+def _detach(blocks: list, arrays: Dict[str, np.ndarray]) -> None:
+    arrays.clear()
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # a traceback still references one of the arrays; the block is released with it
+            pass
+
+
+def _solve_lines(arrays: Dict[str, np.ndarray], start: int, stop: int, rounded: bool, tol: float) -> None:
+    result = performance_measure_multiply_machine_bernoulli_batch(
+        arrays["p"][start:stop], arrays["N"][start:stop], arrays["t"][start:stop], rounded, tol
+    )
+    for name in LINE_OUTPUTS:
+        arrays[name][start:stop] = result[name]
+
+
+def _line_worker(spec: dict, start: int, stop: int, rounded: bool, tol: float) -> None:
+    blocks, arrays = _attach(spec)
+    try:
+        _solve_lines(arrays, start, stop, rounded, tol)
+    finally:
+        _detach(blocks, arrays)
+
+
+def _aggregate_cells(arrays: Dict[str, np.ndarray], start: int, stop: int, mode: str,
+                     c_unit: str, T_up_unit: str, T_down_unit: str) -> None:
+    result = agg_machines_batch(
+        arrays["c"][start:stop], arrays["T_up"][start:stop], arrays["T_down"][start:stop],
+        mode, c_unit, T_up_unit, T_down_unit, validate=False
+    )
+    for column, value in enumerate(result):
+        arrays["out"][start:stop, column] = value
+
+
+def _agg_worker(spec: dict, start: int, stop: int, **kwargs) -> None:
+    blocks, arrays = _attach(spec)
+    try:
+        _aggregate_cells(arrays, start, stop, **kwargs)
+    finally:
+        _detach(blocks, arrays)
+
+
+def sweep_multiply_machine_bernoulli(
+    p: Iterable,
+    N: Iterable,
+    t: Iterable = 1.0,
+    workers: Optional[int] = None,
+    chunk_size: int = 1024,
+    rounded: bool = True,
+    tol: float = CONVERGENCE_THRESHOLD
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate performance_measure_multiply_machine_bernoulli over a grid of K lines of length M
+    on a process pool.
+
+    The grid is split into chunks of chunk_size lines, each solved with
+    performance_measure_multiply_machine_bernoulli_batch. Inputs and outputs live in
+    shared memory, so workers only receive block names and row ranges. Every line is
+    solved independently of the others, hence the results are identical and in grid
+    order for any number of workers and any chunk size.
+
+    Parameters:
+        p (Iterable): (K, M) array, the probability of each machine working at any time
+        N (Iterable): (K, M - 1) array, or anything broadcastable to it, of buffer capacities
+        t (Iterable, optional): The time period of the system, scalar or (K,). Defaults to 1.0.
+        workers (int, optional): Number of worker processes, 1 runs inline. Defaults to the CPU count.
+        chunk_size (int, optional): Number of lines per task. Defaults to 1024.
+        rounded (bool, optional): Round the measures like the scalar solver. Defaults to True.
+        tol (float, optional): Convergence threshold. Defaults to CONVERGENCE_THRESHOLD.
+
+    Returns:
+        dict: Same keys and shapes as performance_measure_multiply_machine_bernoulli_batch
+    """
+    p, N = _line_batch_inputs(p, N)
+    K, M = p.shape
+    t = np.broadcast_to(np.asarray(t, dtype=float), (K,))
+    shapes = {"M": (K, M), "M-1": (K, M - 1), "": (K,)}
+    with _SharedArrays() as shared:
+        shared.create("p", p.shape, data=p)
+        shared.create("N", N.shape, data=N)
+        shared.create("t", t.shape, data=t)
+        for name, shape in LINE_OUTPUTS.items():
+            shared.create(name, shapes[shape])
+        _run(_line_worker, shared.spec(), _chunks(K, chunk_size), workers, rounded=rounded, tol=tol)
+        result = {name: shared.arrays[name].copy() for name in LINE_OUTPUTS}
+    result.update({"p": p, "N": N})
+    return result
+
+
+def sweep_agg_machines(
+    c: Iterable,
+    T_up: Iterable,
+    T_down: Iterable,
+    mode: str = 'parallel',
+    c_unit: str = 'parts/sec',
+    T_up_unit: str = 'seconds',
+    T_down_unit: str = 'seconds',
+    workers: Optional[int] = None,
+    chunk_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluate agg_machines over a grid of K cells of S machines each on a process pool.
+    The grid is validated once, then every chunk is aggregated with agg_machines_batch
+    without validation.
+
+    Parameters:
+        c, T_up, T_down (Iterable): (K, S) arrays of capacities, up times and down times
+        mode, c_unit, T_up_unit, T_down_unit (str, optional): As in agg_machines
+        workers (int, optional): Number of worker processes, 1 runs inline. Defaults to the CPU count.
+        chunk_size (int, optional): Number of cells per task. Defaults to 1024.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (K,) arrays c_agg, T_up_agg and T_down_agg, in grid order
+    """
+    c, T_up, T_down = _agg_batch_inputs(c, T_up, T_down, mode, c_unit, T_up_unit, T_down_unit)
+    K = c.shape[0]
+    with _SharedArrays() as shared:
+        shared.create("c", c.shape, data=c)
+        shared.create("T_up", T_up.shape, data=T_up)
+        shared.create("T_down", T_down.shape, data=T_down)
+        out = shared.create("out", (K, 3))
+        _run(_agg_worker, shared.spec(), _chunks(K, chunk_size), workers,
+             mode=mode, c_unit=c_unit, T_up_unit=T_up_unit, T_down_unit=T_down_unit)
+        out = out.copy()
+    return out[:, 0], out[:, 1], out[:, 2]
@@ -0,0 +1,216 @@
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from .simulation import _LineState
+from .validators import InputValidator
+
+# largest number of (state, machine states) transitions of a transient chain
+MAX_TRANSITIONS = 1 << 24
+TRANSIENT_INITIAL_STATES = ['empty', 'full']
+
+
+class TransientResult(NamedTuple):
+    PR: np.ndarray
+    WIP: np.ndarray
+    BL: np.ndarray
+    ST: np.ndarray
+    distribution: np.ndarray
+
+
+class TransientLine:
+    """
+    Finite-horizon analysis of Bernoulli lines with buffer capacities N.
+
+    The states of the Markov chain are the buffer levels (h_1, ..., h_{M-1}), S = prod(N_i + 1)
+    of them. From every state each of the 2^M up/down combinations of the machines leads to
+    one next state, found with the slot step of the simulator, so the transitions share its
+    blocked-before-service conventions. Which state leads where under which combination
+    does not depend on p: it is built once, as a sparse matrix in coordinate form whose
+    entries are sorted by (target, source), with duplicate pairs merged. For a given p only
+    the probabilities of the 2^M combinations are computed and summed into the entries, and
+    the distribution is propagated with sparse vector-matrix products (np.add.reduceat over
+    the entries of each target), for B parameter sets at once.
+    """
+
+    def __init__(self, N: Iterable[int]):
+        N = list(N)
+        if not N:
+            raise ValueError("A line must have at least two machines")
+        self.N = InputValidator.validate_positive_int_array(N, "N", (None,))
+        self.M = self.N.size + 1
+        shape = tuple(self.N + 1)
+        self.S = int(np.prod(shape))
+        C = 1 << self.M
+        if self.S*C > MAX_TRANSITIONS:
+            raise ValueError(f"The chain has {self.S} states and {self.S*C} transitions, more than {MAX_TRANSITIONS}")
+        # levels of every state, and the machine states of every combination
+        self.levels = np.stack(np.unravel_index(np.arange(self.S), shape), axis=1).astype(np.int64)
+        self.combinations = ((np.arange(C)[:, None] >> np.arange(self.M)) & 1).astype(bool)
+
+        # one slot from every (state, combination)
+        step = _LineState(self.N, self.S*C)
+        step.level[:] = np.repeat(self.levels, C, axis=0)
+        step.step(np.tile(self.combinations, (self.S, 1)))
+        source = np.repeat(np.arange(self.S), C)
+        target = np.ravel_multi_index(tuple(step.level.T), shape)
+        # expected production, blocking and starvation per state: weights of the combinations
+        self._produced = step.produced.reshape(self.S, C, self.M).astype(float)
+        self._blocked = step.blocked.reshape(self.S, C, self.M).astype(float)
+        self._starved = step.starved.reshape(self.S, C, self.M).astype(float)
+
+        # coordinate form sorted by (target, source); _entry_starts delimit the merged pairs
+        order = np.argsort(target*self.S + source, kind='stable')
+        key = (target*self.S + source)[order]
+        self._entry_combination = np.tile(np.arange(C), self.S)[order]
+        self._entry_starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        self.source = source[order][self._entry_starts]
+        self.target = target[order][self._entry_starts]
+        self._target_starts = np.flatnonzero(np.r_[True, self.target[1:] != self.target[:-1]])
+        self._targets = self.target[self._target_starts]
+
+    @property
+    def nnz(self) -> int:
+        return self.source.size
+
+    def _check_p(self, p: Union[Iterable[float], np.ndarray]) -> np.ndarray:
+        p = np.atleast_2d(np.asarray(p, dtype=float))
+        if p.ndim != 2 or p.shape[1] != self.M:
+            raise ValueError(f"Parameter 'p' must be a (B, {self.M}) array, got shape {p.shape}")
+        if not np.all((p >= 0) & (p <= 1)):
+            raise ValueError("Parameter 'p' must be between 0 and 1")
+        return p
+
+    def _combination_probabilities(self, p: np.ndarray) -> np.ndarray:
+        """(B, 2^M) probabilities of the machine state combinations"""
+        return np.where(self.combinations, p[:, None, :], 1 - p[:, None, :]).prod(axis=2)
+
+    def values(self, p: Union[Iterable[float], np.ndarray]) -> np.ndarray:
+        """(B, nnz) transition probabilities of the entries (source, target) for B parameter sets"""
+        weights = self._combination_probabilities(self._check_p(p))
+        return np.add.reduceat(weights[:, self._entry_combination], self._entry_starts, axis=1)
+
+    def matrix(self, p: Iterable[float]) -> np.ndarray:
+        """Dense S x S transition matrix of one parameter set, for inspection of small chains"""
+        P = np.zeros((self.S, self.S))
+        P[self.source, self.target] = self.values(p)[0]
+        return P
+
+    def initial(self, state: Union[str, Iterable[int], np.ndarray] = 'empty') -> np.ndarray:
+        """
+        Initial distribution: 'empty', 'full', the buffer levels of one state, or a
+        distribution over the S states
+        """
+        pi = np.zeros(self.S)
+        if isinstance(state, str):
+            if state not in TRANSIENT_INITIAL_STATES:
+                raise ValueError(f"Parameter 'initial' must be in {TRANSIENT_INITIAL_STATES}, levels or a distribution")
+            pi[0 if state == 'empty' else self.S - 1] = 1.0
+            return pi
+        state = np.asarray(state)
+        if state.shape == (self.S,) and state.dtype.kind == 'f':
+            if np.any(state < 0) or not np.isclose(state.sum(), 1.0):
+                raise ValueError("An initial distribution must be non-negative and sum to 1")
+            return state.astype(float)
+        if state.shape != (self.M - 1,) or np.any(state < 0) or np.any(state > self.N):
+            raise ValueError(f"Initial levels must be {self.M - 1} integers between 0 and N")
+        pi[np.ravel_multi_index(tuple(state.astype(np.int64)), tuple(self.N + 1))] = 1.0
+        return pi
+
+    def step(self, pi: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """(B, S) distributions after one slot, pi P, for (B, nnz) transition values"""
+        flow = pi[:, self.source]*values
+        pi_next = np.zeros_like(pi)
+        pi_next[:, self._targets] = np.add.reduceat(flow, self._target_starts, axis=1)
+        return pi_next
+
+    def run(
+        self,
+        p: Union[Iterable[float], np.ndarray],
+        horizon: int,
+        initial: Union[str, Iterable[int], np.ndarray] = 'empty'
+    ) -> TransientResult:
+        """
+        Propagate the distribution of the buffer levels over `horizon` slots.
+
+        Parameters:
+            p (Iterable[float] or np.ndarray): (M,) probabilities of the machines working, or
+                (B, M) for B parameter sets propagated together
+            horizon (int): Number of slots
+            initial (str, Iterable[int] or np.ndarray, optional): Initial state, see initial().
+                Defaults to 'empty'.
+
+        Returns:
+            TransientResult: PR (horizon,), the expected parts produced by the last machine in
+            each slot; WIP (horizon + 1, M - 1), the expected buffer levels at the start of
+            each slot and after the last one; BL and ST (horizon, M), the probabilities of
+            blocking and starvation in each slot; and the final distribution (S,). For (B, M)
+            p every array has a leading axis B.
+        """
+        InputValidator.validate_positive_int(horizon, "horizon")
+        single = np.asarray(p).ndim == 1
+        p = self._check_p(p)
+        B = p.shape[0]
+        values = self.values(p)
+        weights = self._combination_probabilities(p)
+        # expected measures of one slot from each state
+        produced = np.einsum('bc,sc->bs', weights, self._produced[:, :, -1])
+        blocked = np.einsum('bc,sci->bsi', weights, self._blocked)
+        starved = np.einsum('bc,sci->bsi', weights, self._starved)
+
+        pi = np.repeat(self.initial(initial)[None, :], B, axis=0)
+        PR = np.empty((B, horizon))
+        BL = np.empty((B, horizon, self.M))
+        ST = np.empty((B, horizon, self.M))
+        WIP = np.empty((B, horizon + 1, self.M - 1))
+        for k in range(horizon):
+            WIP[:, k] = pi @ self.levels
+            PR[:, k] = np.einsum('bs,bs->b', pi, produced)
+            BL[:, k] = np.einsum('bs,bsi->bi', pi, blocked)
+            ST[:, k] = np.einsum('bs,bsi->bi', pi, starved)
+            pi = self.step(pi, values)
+        WIP[:, horizon] = pi @ self.levels
+        if single:
+            return TransientResult(PR[0], WIP[0], BL[0], ST[0], pi[0])
+        return TransientResult(PR, WIP, BL, ST, pi)
+
+    def __repr__(self):
+        return f"TransientLine(N={self.N.tolist()}, states={self.S}, nnz={self.nnz})"
+
+
+@lru_cache(maxsize=32)
+def _transient_line(N: Tuple[int, ...]) -> TransientLine:
+    return TransientLine(N)
+
+
+def transient_analysis(
+    p: Union[Iterable[float], np.ndarray],
+    N: Iterable[int],
+    horizon: int,
+    initial: Union[str, Iterable[int], np.ndarray] = 'empty',
+    line: Optional[TransientLine] = None
+) -> TransientResult:
+    """
+    PR, WIP, BL and ST of a Bernoulli line over the first `horizon` slots, starting from an
+    empty or full line or any given state, see TransientLine.run.
+
+    The transition structure of each N is built once and kept (for the 32 most recently
+    used N), so analyses with other p, other initial states or longer horizons only
+    recompute the transition probabilities.
+
+    Parameters:
+        p (Iterable[float] or np.ndarray): (M,) or (B, M) probabilities of the machines working
+        N (Iterable[int]): The maximum capacity of the buffer between each machine
+        horizon (int): Number of slots
+        initial (str, Iterable[int] or np.ndarray, optional): 'empty', 'full', buffer levels or a
+            distribution over the states. Defaults to 'empty'.
+        line (TransientLine, optional): Structure to use instead of the cached one
+
+    Returns:
+        TransientResult: see TransientLine.run
+    """
+    N = tuple(int(n) for n in N)
+    if line is None:
+        line = _transient_line(N)
+    elif tuple(line.N.tolist()) != N:
+        raise ValueError(f"Parameter 'line' was built for N={line.N.tolist()}, got {list(N)}")
+    return line.run(p, horizon, initial)
@@ -1,14 +1,18 @@
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+
+Shape = Union[int, Tuple[Optional[int], ...]]
+
 
 class InputValidator:
     @staticmethod
     def validate_numeric_iterable(value: Any, length: int, param_name: str) -> None:
         if not isinstance(value, Iterable) or isinstance(value, str):
             raise TypeError(f"Parameter '{param_name}' must be an iterable")
-        
+
         if len(value) != length:
             raise ValueError(f"Parameter '{param_name}' must have length of {length}")
-            
+
         if not all(isinstance(item, (float, int)) and item > 0 for item in value):
             raise TypeError(f"Parameter '{param_name}' must contain positive numeric values")
 
@@ -20,4 +24,65 @@ class InputValidator:
     @staticmethod
     def validate_probability(value: float, param_name: str) -> None:
         if not isinstance(value, (float, int)) or not 0 <= value <= 1:
-            raise ValueError(f"Parameter '{param_name}' must be a probability between 0 and 1") 
\ No newline at end of file
+            raise ValueError(f"Parameter '{param_name}' must be a probability between 0 and 1")
+
+    # Array validators: each checks a whole array in one NumPy pass and returns it converted,
+    # raising the same exceptions as the element-wise validator above it would for the first
+    # invalid element. A shape entry None accepts any size along that axis.
+
+    @staticmethod
+    def _array(value: Any, shape: Optional[Shape], param_name: str, kinds: str, error: type,
+               message: str) -> np.ndarray:
+        if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+            raise error(message)
+        if isinstance(value, Iterator):
+            value = list(value)
+        try:
+            array = np.asarray(value)
+        except ValueError:
+            # ragged nested sequences
+            raise error(message)
+        if array.dtype.kind not in kinds:
+            raise error(message)
+        if shape is not None:
+            shape = (shape,) if isinstance(shape, int) else tuple(shape)
+            if array.ndim != len(shape):
+                raise error(message)
+            if any(expected is not None and size != expected for size, expected in zip(array.shape, shape)):
+                raise ValueError(f"Parameter '{param_name}' must have shape {shape}, got {array.shape}")
+        return array
+
+    @staticmethod
+    def _first_invalid(ok: np.ndarray, param_name: str) -> str:
+        index = np.argwhere(~ok)[0]
+        return f"{param_name}[{', '.join(str(i) for i in index)}]"
+
+    @staticmethod
+    def validate_numeric_array(value: Any, shape: Shape, param_name: str) -> np.ndarray:
+        """Array version of validate_numeric_iterable: finite positive numbers, as a float array"""
+        message = f"Parameter '{param_name}' must contain positive numeric values"
+        array = InputValidator._array(value, shape, param_name, 'biuf', TypeError, message).astype(float)
+        ok = np.isfinite(array) & (array > 0)
+        if not ok.all():
+            raise TypeError(f"Parameter '{InputValidator._first_invalid(ok, param_name)}' must be a positive number")
+        return array
+
+    @staticmethod
+    def validate_probability_array(value: Any, param_name: str, shape: Optional[Shape] = None) -> np.ndarray:
+        """Array version of validate_probability: numbers between 0 and 1, as a float array"""
+        message = f"Parameter '{param_name}' must contain probabilities between 0 and 1"
+        array = InputValidator._array(value, shape, param_name, 'biuf', ValueError, message).astype(float)
+        ok = (array >= 0) & (array <= 1)
+        if not ok.all():
+            raise ValueError(f"Parameter '{InputValidator._first_invalid(ok, param_name)}' must be a probability between 0 and 1")
+        return array
+
+    @staticmethod
+    def validate_positive_int_array(value: Any, param_name: str, shape: Optional[Shape] = None) -> np.ndarray:
+        """Array version of validate_positive_int: positive integers, as an int64 array"""
+        message = f"Parameter '{param_name}' must contain positive integers"
+        array = InputValidator._array(value, shape, param_name, 'biu', ValueError, message).astype(np.int64)
+        ok = array > 0
+        if not ok.all():
+            raise ValueError(f"Parameter '{InputValidator._first_invalid(ok, param_name)}' must be a positive integer")
+        return array
@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+from psepy.core import Q_function_bernoulli, aggregation_of_bernoulli_lines
+from psepy.aggregation import BernoulliAggregationEngine
+
+
+def reference_aggregation(p, M, N):
+    """List-based recursion the engine replaces"""
+    p_f = list(p)
+    p_b = list(p)
+    while True:
+        p_f_new = p_f.copy()
+        p_b_new = p_b.copy()
+        for i in range(M - 2, -1, -1):
+            p_b_new[i] = p[i]*(1 - Q_function_bernoulli(p_b_new[i+1], p_f_new[i], N[i]))
+        for i in range(1, M):
+            p_f_new[i] = p[i]*(1 - Q_function_bernoulli(p_f_new[i - 1], p_b_new[i], N[i - 1]))
+        if max(abs(a - b) for a, b in zip(p_f_new + p_b_new, p_f + p_b)) < 1e-6:
+            return p_f_new, p_b_new
+        p_f = p_f_new
+        p_b = p_b_new
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_engine_matches_list_recursion(seed):
+    rng = np.random.default_rng(seed)
+    M = 12
+    p = rng.uniform(0.7, 0.98, M).tolist()
+    N = rng.integers(1, 8, M - 1).tolist()
+    p_f, p_b = BernoulliAggregationEngine(M).run(p, N)
+    ref_f, ref_b = reference_aggregation(p, M, N)
+    assert p_f == pytest.approx(ref_f, abs=1e-12)
+    assert p_b == pytest.approx(ref_b, abs=1e-12)
+
+
+def test_aggregation_of_bernoulli_lines():
+    p = [0.8, 0.85, 0.9, 0.85]
+    N = [2, 3, 2]
+    p_f, p_b = aggregation_of_bernoulli_lines(p, 4, N)
+    assert isinstance(p_f, list) and isinstance(p_b, list)
+    assert p_f[0] == p[0] and p_b[-1] == p[-1]
+    # the production rate is the same seen from both ends of the line
+    assert p_f[-1] == pytest.approx(p_b[0], abs=1e-4)
+    # M given as a NumPy integer, e.g. the size of an array
+    assert aggregation_of_bernoulli_lines(p, np.int64(4), N) == (p_f, p_b)
+
+
+def test_engine_reuse_and_warm_start():
+    engine = BernoulliAggregationEngine(5)
+    p = [0.9, 0.8, 0.85, 0.9, 0.75]
+    N = [3, 3, 3, 3]
+    p_f, p_b = engine.run(p, N)
+    p_f, p_b = p_f.copy(), p_b.copy()
+    cold_iterations = engine.iterations
+
+    warm_f, warm_b = engine.run(p, N, p_f0=p_f, p_b0=p_b)
+    assert engine.iterations < cold_iterations
+    assert warm_f == pytest.approx(p_f, abs=1e-5)
+    assert warm_b == pytest.approx(p_b, abs=1e-5)
+
+
+def test_engine_invalid_inputs():
+    with pytest.raises(ValueError):
+        BernoulliAggregationEngine(1)
+    with pytest.raises(ValueError):
+        BernoulliAggregationEngine(3.0)
+    with pytest.raises(ValueError):
+        BernoulliAggregationEngine(3).run([0.9, 0.9], [2, 2])
+    with pytest.raises(ValueError):
+        BernoulliAggregationEngine(3).run([0.9, 0.9, 0.9], [2])
+
+
+@pytest.mark.parametrize("method", ['gauss-seidel', 'sor', 'aitken', 'anderson'])
+def test_accelerated_methods_reach_the_same_fixed_point(method):
+    p = [0.9, 0.8]*10
+    N = [5]*19
+    engine = BernoulliAggregationEngine(20)
+    reference = engine.solve(p, N, tol=1e-10)
+    result = engine.solve(p, N, tol=1e-10, method=method)
+    assert result.converged
+    assert result.method == method
+    assert result.residual < 1e-10
+    assert result.p_f == pytest.approx(reference.p_f, abs=1e-7)
+    assert result.p_b == pytest.approx(reference.p_b, abs=1e-7)
+
+
+def test_anderson_needs_fewer_sweeps_on_long_balanced_lines():
+    p = [0.95]*100
+    N = [50]*99
+    engine = BernoulliAggregationEngine(100)
+    plain = engine.solve(p, N)
+    accelerated = engine.solve(p, N, method='anderson')
+    assert accelerated.converged
+    assert accelerated.iterations < plain.iterations/2
+
+
+def test_max_iter():
+    p = [0.9, 0.8, 0.85, 0.9]
+    N = [2, 2, 2]
+    result = BernoulliAggregationEngine(4).solve(p, N, max_iter=2)
+    assert not result.converged
+    assert result.iterations == 2
+    assert result.residual > 1e-6
+    with pytest.raises(RuntimeError):
+        aggregation_of_bernoulli_lines(p, 4, N, max_iter=2)
+    with pytest.raises(ValueError):
+        BernoulliAggregationEngine(4).solve(p, N, method='newton')
@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+from psepy.core import Q_function_bernoulli, performance_measure_two_machine
+from psepy.batch import (
+    Q_function_bernoulli_batch,
+    performance_measure_two_machine_batch,
+    aggregation_of_bernoulli_lines_batch,
+    performance_measure_multiply_machine_bernoulli_batch,
+    agg_machines_batch
+)
+
+
+def test_Q_function_bernoulli_batch_matches_scalar():
+    p1 = np.array([0.8, 0.7, 0.9, 0.6, 0.75])
+    p2 = np.array([0.7, 0.7, 0.85, 0.95, 0.75])
+    N = np.array([5, 3, 10, 2, 1])
+    result = Q_function_bernoulli_batch(p1, p2, N)
+    expected = [Q_function_bernoulli(a, b, n) for a, b, n in zip(p1, p2, N)]
+    assert result == pytest.approx(expected, rel=1e-10)
+
+
+def test_performance_measure_two_machine_batch_matches_scalar():
+    p1 = np.array([0.8, 0.7, 0.9, 0.6])
+    p2 = np.array([0.7, 0.7, 0.85, 0.95])
+    N = np.array([5, 3, 10, 2])
+    result = performance_measure_two_machine_batch(p1, p2, N)
+    for k in range(len(p1)):
+        expected = performance_measure_two_machine(p1[k], p2[k], int(N[k]))
+        for key, value in expected.items():
+            assert result[key][k] == pytest.approx(value, abs=1e-12)
+
+
+def test_performance_measure_two_machine_batch_broadcasting():
+    p1 = np.linspace(0.5, 0.95, 4)[:, None, None]
+    p2 = np.linspace(0.5, 0.95, 3)[None, :, None]
+    N = np.arange(1, 6)[None, None, :]
+    result = performance_measure_two_machine_batch(p1, p2, N, rounded=False)
+    for value in result.values():
+        assert value.shape == (4, 3, 5)
+    # PR is the output of machine 2 and must equal the output of machine 1
+    assert np.allclose(result["PR"], p1*np.ones((4, 3, 5)) - result["BL_1"])
+
+
+def test_performance_measure_two_machine_batch_large_buffers():
+    result = performance_measure_two_machine_batch([0.9, 0.6], [0.6, 0.9], 10**6, rounded=False)
+    assert np.all(np.isfinite(result["WIP"]))
+    assert result["PR"] == pytest.approx([0.6, 0.6])
+    assert result["WIP"][0] == pytest.approx(10**6, rel=1e-3)
+
+
+def test_fused_two_machine_terms_match_both_directions():
+    from psepy.batch import _Q_kernel, _two_machine_terms
+    rng = np.random.default_rng(5)
+    p1 = np.r_[rng.uniform(0.05, 0.99, 200), 0.7, 0.3]
+    p2 = np.r_[rng.uniform(0.05, 0.99, 200), 0.7, 0.9]
+    N = np.r_[rng.integers(1, 10**4, 200), 4, 10**6].astype(float)
+    Q_starve, Q_block, WIP = _two_machine_terms(p1, p2, N)
+    assert Q_starve == pytest.approx(_Q_kernel(p1, p2, N), rel=1e-9)
+    assert Q_block == pytest.approx(_Q_kernel(p2, p1, N), rel=1e-9)
+    # the line conserves flow: p_2(1 - Q(p_1, p_2, N)) = p_1(1 - Q(p_2, p_1, N))
+    assert p2*(1 - Q_starve) == pytest.approx(p1*(1 - Q_block), rel=1e-9)
+    assert np.all(np.isfinite(WIP))
+
+
+def test_aggregation_of_bernoulli_lines_batch_matches_engine():
+    from psepy.aggregation import BernoulliAggregationEngine
+    rng = np.random.default_rng(3)
+    K, M = 20, 6
+    p = rng.uniform(0.6, 0.98, (K, M))
+    N = rng.integers(1, 10, (K, M - 1))
+    p_f, p_b = aggregation_of_bernoulli_lines_batch(p, N)
+    engine = BernoulliAggregationEngine(M)
+    for k in range(K):
+        ref_f, ref_b = engine.run(p[k], N[k])
+        assert p_f[k] == pytest.approx(ref_f, abs=1e-6)
+        assert p_b[k] == pytest.approx(ref_b, abs=1e-6)
+
+
+def test_performance_measure_multiply_machine_bernoulli_batch():
+    from psepy.core import performance_measure_multiply_machine_bernoulli
+    p = np.array([[0.8, 0.85, 0.9, 0.85], [0.9, 0.9, 0.7, 0.95]])
+    N = np.array([[2, 3, 2], [4, 1, 6]])
+    result = performance_measure_multiply_machine_bernoulli_batch(p, N, t=2.0, rounded=False)
+    assert result["WIP"].shape == (2, 3)
+    assert result["BL"].shape == result["ST"].shape == (2, 4)
+    for k in range(2):
+        expected = performance_measure_multiply_machine_bernoulli(p[k].tolist(), 4, N[k].tolist(), 2.0)
+        assert result["PR"][k] == pytest.approx(expected["PR"], abs=1e-3)
+        assert result["BL"][k] == pytest.approx(expected["BL"], abs=1e-3)
+        assert result["ST"][k] == pytest.approx(expected["ST"], abs=1e-3)
+        assert result["WIP"][k] == pytest.approx(expected["WIP"], abs=1e-2)
+    assert result["TP"] == pytest.approx(result["PR"]/2.0)
+    # conservation of flow: the last machine produces what the first machine produces
+    assert result["PR"] == pytest.approx(p[:, 0] - result["BL"][:, 0], abs=1e-5)
+
+
+def test_performance_measure_multiply_machine_bernoulli_batch_shapes():
+    with pytest.raises(ValueError):
+        performance_measure_multiply_machine_bernoulli_batch(np.full((2, 4), 0.9), np.ones((2, 4)))
+    result = performance_measure_multiply_machine_bernoulli_batch(np.full((3, 4), 0.9), 3)
+    assert result["N"].shape == (3, 3)
+    assert np.all(result["PR"] == result["PR"][0])
+    # a machine that never works makes the aggregation degenerate instead of returning NaN
+    with pytest.raises(ValueError, match=r"lines \[1\]"):
+        performance_measure_multiply_machine_bernoulli_batch([[0.9, 0.8, 0.8], [0.9, 0.0, 0.8]], [[3, 3]])
+
+
+def test_agg_machines_batch_matches_scalar():
+    from psepy.core import agg_machines
+    rng = np.random.default_rng(11)
+    c = rng.uniform(0.5, 3, (8, 4))
+    T_up = rng.uniform(5, 100, (8, 4))
+    T_down = rng.uniform(5, 100, (8, 4))
+    for mode in ['parallel', 'consecutive dependent']:
+        result = agg_machines_batch(c, T_up, T_down, mode, 'parts/min', 'minutes', 'hours')
+        for k in range(8):
+            expected = agg_machines(4, c[k].tolist(), T_up[k].tolist(), T_down[k].tolist(), mode,
+                                    'parts/min', 'minutes', 'hours')
+            assert tuple(x[k] for x in result) == pytest.approx(expected, abs=1e-12)
+
+
+def test_agg_machines_batch_large_parallel_cells():
+    S = 10**4
+    c_agg, T_up_agg, T_down_agg = agg_machines_batch(np.ones((2, S)), np.full((2, S), 10.0), np.full((2, S), 90.0))
+    # identical machines in parallel aggregate to the same up and down times
+    assert c_agg == pytest.approx([S, S])
+    assert T_up_agg == pytest.approx([10.0, 10.0])
+    assert T_down_agg == pytest.approx([90.0, 90.0])
+
+
+def test_agg_machines_batch_invalid_inputs():
+    with pytest.raises(ValueError):
+        agg_machines_batch(np.ones((2, 3)), np.ones((2, 2)), np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        agg_machines_batch(np.zeros((2, 3)), np.ones((2, 3)), np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        agg_machines_batch(np.ones((2, 3)), np.ones((2, 3)), np.ones((2, 3)), mode='serial')
+
+
+def test_multiply_machine_measures_use_unrounded_aggregation():
+    from psepy.core import performance_measure_multiply_machine_bernoulli
+    p, N = [0.72, 0.76, 0.9, 0.81], [7, 5, 2]
+    exact = performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0, cache=False, rounded=False)
+    batch = performance_measure_multiply_machine_bernoulli_batch([p], [N], t=2.0, rounded=False)
+    for key in ("pf", "pb", "ST", "BL", "WIP"):
+        assert exact[key] == pytest.approx(batch[key][0].tolist(), abs=1e-6)
+    assert exact["TP"] == pytest.approx(exact["PR"]/2.0)
+    rounded = performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0, cache=False)
+    assert rounded["ST"] == [round(x, 4) for x in exact["ST"]]
+    assert rounded["WIP"] == [round(x, 2) for x in exact["WIP"]]
+    assert rounded["TotalWIP"] == round(sum(exact["WIP"]), 2)
@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+import pytest
+from benchmarks.cases import CASES, PROFILES
+from benchmarks.runner import compare, load_baseline, report, run_benchmarks, save_baseline
+
+
+def test_profiles_and_recorded_baseline_cover_every_case():
+    baseline = load_baseline(str(Path(__file__).parents[1] / "benchmarks" / "baseline.json"))
+    for case in CASES:
+        quick, full = case.ids('quick'), case.ids('full')
+        assert set(quick) <= set(full)
+        assert {name for name, _ in full} <= set(baseline)
+    assert len({name for case in CASES for name, _ in case.ids('full')}) == sum(len(case.sizes['full']) for case in CASES)
+
+
+def test_run_and_save_baseline(tmp_path):
+    results = run_benchmarks('quick', pattern=r"^agg_machines_parallel\[10\]$", repeat=2)
+    assert list(results) == ["agg_machines_parallel[10]"]
+    result = results["agg_machines_parallel[10]"]
+    assert 0 < result["best"] <= result["median"] and result["loops"] >= 1 and result["repeat"] == 2
+    path = tmp_path / "baseline.json"
+    save_baseline(str(path), results, 'quick')
+    assert json.loads(path.read_text())["profile"] == 'quick'
+    assert load_baseline(str(path)) == results
+    with pytest.raises(ValueError):
+        run_benchmarks('huge')
+
+
+def test_compare_flags_regressions():
+    baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}, "c": {"best": 1.0}}
+    results = {"a": {"best": 1.3}, "b": {"best": 0.7}, "c": {"best": 1.1}, "d": {"best": 2.0}}
+    rows = compare(results, baseline, threshold=1.25)
+    assert [row["status"] for row in rows] == ["regression", "improved", "ok", "new"]
+    assert rows[0]["ratio"] == pytest.approx(1.3)
+    text = report(rows)
+    assert text.endswith("1 regression(s): a")
+    assert "new" in text.splitlines()[4]
+    with pytest.raises(ValueError):
+        compare(results, baseline, threshold=1.0)
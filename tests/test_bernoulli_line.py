@@ -36,4 +36,49 @@ class TestBernoulliLine:
 
     def test_invalid_buffer_size(self):
         with pytest.raises(ValueError):
-            self.line.calculate_buffer_probabilities(0.7, 0.7, 0) 
\ No newline at end of file
+            self.line.calculate_buffer_probabilities(0.7, 0.7, 0) 
+
+
+class TestBernoulliLineModel:
+    def setup_method(self):
+        self.p = [0.9, 0.85, 0.88, 0.8, 0.92, 0.87]
+        self.N = [3, 2, 4, 3, 2]
+        self.line = BernoulliLine(self.p, self.N, t=2.0)
+
+    def test_performance_matches_solver(self):
+        from psepy.core import performance_measure_multiply_machine_bernoulli
+        result = self.line.performance()
+        expected = performance_measure_multiply_machine_bernoulli(self.p, 6, self.N, 2.0)
+        assert set(result) == set(expected)
+        assert result["PR"] == pytest.approx(expected["PR"], abs=2e-4)
+        assert result["BL"] == pytest.approx(expected["BL"], abs=2e-4)
+        assert result["ST"] == pytest.approx(expected["ST"], abs=2e-4)
+        assert result["TotalWIP"] == pytest.approx(expected["TotalWIP"], abs=2e-2)
+
+    def test_warm_start_after_change(self):
+        self.line.solve()
+        cold_iterations = self.line.iterations
+        self.line.set_p(3, 0.81)
+        self.line.solve()
+        assert self.line.iterations < cold_iterations
+
+        reference = BernoulliLine(self.line.p, self.N)
+        assert self.line.p_f == pytest.approx(reference.p_f, abs=1e-5)
+        assert self.line.p_b == pytest.approx(reference.p_b, abs=1e-5)
+
+    def test_update(self):
+        self.line.update(p={0: 0.95}, N={1: 5})
+        assert self.line.p[0] == 0.95
+        assert self.line.N[1] == 5
+        reference = BernoulliLine(self.line.p, self.line.N)
+        assert self.line.performance()["PR"] == pytest.approx(reference.performance()["PR"], abs=1e-4)
+
+    def test_invalid_updates(self):
+        with pytest.raises(ValueError):
+            self.line.set_p(0, 1.5)
+        with pytest.raises(ValueError):
+            self.line.set_N(0, 0)
+        with pytest.raises(ValueError):
+            BernoulliLine([0.9, 0.9], [1, 1])
+        with pytest.raises(ValueError):
+            BernoulliLine().performance()
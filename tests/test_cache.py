@@ -0,0 +1,85 @@
+import pytest
+from psepy.cache import LRUCache, enable_cache, disable_cache, get_cache
+from psepy.core import (
+    Q_function_bernoulli,
+    P_function_two_machine_bernoulli,
+    performance_measure_two_machine,
+    performance_measure_multiply_machine_bernoulli
+)
+
+
+@pytest.fixture(autouse=True)
+def no_process_cache():
+    disable_cache()
+    yield
+    disable_cache()
+
+
+def test_per_call_cache_hits_and_misses():
+    cache = LRUCache(maxsize=16)
+    first = Q_function_bernoulli(0.8, 0.7, 5, cache=cache)
+    second = Q_function_bernoulli(0.8, 0.7, 5, cache=cache)
+    assert first == second == Q_function_bernoulli(0.8, 0.7, 5)
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_cached_results_are_copies():
+    cache = LRUCache()
+    P = P_function_two_machine_bernoulli(0.8, 0.7, 3, cache=cache)
+    P.append(1.0)
+    assert len(P_function_two_machine_bernoulli(0.8, 0.7, 3, cache=cache)) == 4
+    result = performance_measure_two_machine(0.8, 0.7, 3, cache=cache)
+    result["PR"] = None
+    assert performance_measure_two_machine(0.8, 0.7, 3, cache=cache)["PR"] is not None
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    Q_function_bernoulli(0.8, 0.7, 1, cache=cache)
+    Q_function_bernoulli(0.8, 0.7, 2, cache=cache)
+    Q_function_bernoulli(0.8, 0.7, 1, cache=cache)  # refreshes N=1
+    Q_function_bernoulli(0.8, 0.7, 3, cache=cache)  # evicts N=2
+    assert cache.stats.evictions == 1
+    assert len(cache) == 2
+    Q_function_bernoulli(0.8, 0.7, 1, cache=cache)
+    assert cache.stats.hits == 2
+
+
+def test_quantized_keys():
+    cache = LRUCache(decimals=6)
+    Q_function_bernoulli(0.8, 0.7, 5, cache=cache)
+    Q_function_bernoulli(0.8 + 1e-9, 0.7, 5, cache=cache)
+    assert cache.stats.hits == 1
+
+
+def test_process_wide_cache():
+    assert get_cache() is None
+    cache = enable_cache(maxsize=1024)
+    expected = performance_measure_multiply_machine_bernoulli([0.8, 0.85, 0.9], 3, [2, 3], 1.0, cache=False)
+    result = performance_measure_multiply_machine_bernoulli([0.8, 0.85, 0.9], 3, [2, 3], 1.0)
+    assert result == expected
+    assert cache.stats.misses > 0
+    hits = cache.stats.hits
+    performance_measure_multiply_machine_bernoulli([0.8, 0.85, 0.9], 3, [2, 3], 1.0)
+    assert cache.stats.hits > hits
+    # False bypasses the process-wide cache
+    misses = cache.stats.misses
+    Q_function_bernoulli(0.5, 0.6, 7, cache=False)
+    assert cache.stats.misses == misses
+
+
+def test_invalid_cache_arguments():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+    with pytest.raises(TypeError):
+        Q_function_bernoulli(0.8, 0.7, 5, cache={})
+
+
+def test_true_selects_process_wide_cache():
+    Q_function_bernoulli(0.8, 0.7, 5, cache=True)
+    cache = get_cache()
+    assert cache is not None and cache.stats.misses == 1
+    Q_function_bernoulli(0.8, 0.7, 5, cache=True)
+    assert get_cache() is cache and cache.stats.hits == 1
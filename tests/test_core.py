@@ -15,6 +15,7 @@ def test_agg_machines_type_error_handling():
     pytest.raises(TypeError, agg_machines, 3, {1:2, 3:4, 5:6}, [10, 8, 9], [90, 79, 85])
     pytest.raises(TypeError, agg_machines, 3, [[0], [0], [0]], [10, 8, 9], [90, 79, 85])
     pytest.raises(TypeError, agg_machines, 2.5, [0, 0, 0], [10, 8, 9], [90, 79, 85])
+    assert agg_machines(np.int64(3), [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85]) == agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85])
 
 def test_agg_machines_1():
     S = 3
@@ -47,4 +48,20 @@ def test_agg_machines_1():
 
     # assert c_agg == pytest.approx(5.2, rel=1e-3), f"Expected c_agg=5.2, but got {c_agg}"
     # assert T_up_agg == pytest.approx(8.9175, rel=1e-3), f"Expected T_up_agg=8.9175, but got {T_up_agg}"
-    # assert T_down_agg == pytest.approx(84.4457, rel=1e-3), f"Expected T_down_agg=84.4457, but got {T_down_agg}"
\ No newline at end of file
+    # assert T_down_agg == pytest.approx(84.4457, rel=1e-3), f"Expected T_down_agg=84.4457, but got {T_down_agg}"
+
+
+def test_agg_machines_trusted_inputs():
+    from psepy.batch import agg_machines_batch
+    from psepy.bernoulli_line import BernoulliLine
+    from psepy.machine_aggregator import MachineAggregator
+    c, T_up, T_down = np.array([[1.5, 2, 1.7], [1.2, 1.1, 1.9]]), np.array([[10, 8, 9], [7, 9, 6]]), np.array([[90, 79, 85], [60, 70, 80]])
+    rows = agg_machines_batch(c, T_up, T_down, 'consecutive dependent', validate=False)
+    for k in range(2):
+        expected = agg_machines(3, c[k].tolist(), T_up[k].tolist(), T_down[k].tolist(), 'consecutive dependent')
+        assert agg_machines(3, c[k], T_up[k], T_down[k], 'consecutive dependent', validate=False) == expected
+        assert MachineAggregator().aggregate_machines(3, c[k], T_up[k], T_down[k], 'consecutive dependent', validate=False) == expected
+        assert tuple(row[k] for row in rows) == pytest.approx(expected)
+    line = BernoulliLine(np.array([0.9, 0.8, 0.85]), np.array([3, 2]), validate=False)
+    assert line.p == [0.9, 0.8, 0.85] and line.N == [3, 2]
+    assert line.performance() == BernoulliLine([0.9, 0.8, 0.85], [3, 2]).performance()
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+from psepy.batch import aggregation_of_bernoulli_lines_batch
+from psepy.core import performance_measure_multiply_machine_bernoulli
+from psepy.decomposition import (
+    aggregation_of_bernoulli_lines_decomposed,
+    performance_measure_multiply_machine_bernoulli_decomposed
+)
+
+
+def _line(M: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.7, 0.95, M), rng.integers(2, 10, M - 1)
+
+
+def test_decomposition_agrees_with_sequential():
+    p, N = _line(60)
+    p_f, p_b = aggregation_of_bernoulli_lines_batch(p[None, :], N[None, :])
+    # one segment is the sequential recursion itself
+    single = aggregation_of_bernoulli_lines_decomposed(p, N, segments=1)
+    np.testing.assert_array_equal(single[0], p_f[0])
+    np.testing.assert_array_equal(single[1], p_b[0])
+    for segments, overlap in [(2, 0), (7, 0), (7, 3), (60, 0)]:
+        d_f, d_b = aggregation_of_bernoulli_lines_decomposed(p, N, segments, overlap)
+        np.testing.assert_allclose(d_f, p_f[0], atol=1e-4)
+        np.testing.assert_allclose(d_b, p_b[0], atol=1e-4)
+    result = performance_measure_multiply_machine_bernoulli_decomposed(p, N, 2.0, segments=5)
+    expected = performance_measure_multiply_machine_bernoulli(p, 60, N, 2.0, cache=False)
+    assert result.keys() == expected.keys()
+    for key in expected:
+        np.testing.assert_allclose(result[key], expected[key], atol=2e-4)
+
+
+def test_decomposition_independent_of_workers():
+    p, N = _line(80, seed=1)
+    serial = aggregation_of_bernoulli_lines_decomposed(p, N, segments=6, overlap=1)
+    parallel = aggregation_of_bernoulli_lines_decomposed(p, N, segments=6, overlap=1, workers=3)
+    np.testing.assert_array_equal(serial[0], parallel[0])
+    np.testing.assert_array_equal(serial[1], parallel[1])
+
+
+def test_decomposition_invalid_inputs():
+    p, N = _line(10)
+    with pytest.raises(ValueError, match="segments"):
+        aggregation_of_bernoulli_lines_decomposed(p, N, segments=11)
+    with pytest.raises(ValueError, match="overlap"):
+        aggregation_of_bernoulli_lines_decomposed(p, N, segments=2, overlap=-1)
+    with pytest.raises(ValueError, match="shape"):
+        aggregation_of_bernoulli_lines_decomposed(p, N[:-1])
+    with pytest.raises(ValueError, match="non-finite"):
+        aggregation_of_bernoulli_lines_decomposed([0.9, 0.0, 0.8, 0.9], [3, 3, 3], segments=2, workers=2)
+    with pytest.raises(RuntimeError, match="did not converge"):
+        aggregation_of_bernoulli_lines_decomposed(p, N, segments=2, workers=2, max_iter=2)
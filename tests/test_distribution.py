@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+from psepy.distribution import buffer_distribution, buffer_distribution_summary
+
+
+def reference(p1, p2, N):
+    alpha = p1*(1 - p2)/(p2*(1 - p1))
+    P_0 = (1 - p2)/(1 - p2 + sum([alpha**i for i in range(1, N + 1)]))
+    return [P_0] + [alpha**i/(1 - p2)*P_0 for i in range(1, N + 1)]
+
+
+@pytest.mark.parametrize("p1, p2, N", [(0.8, 0.7, 5), (0.7, 0.8, 5), (0.9, 0.3, 40), (0.5, 0.50001, 100)])
+def test_buffer_distribution_matches_reference(p1, p2, N):
+    expected = reference(p1, p2, N)
+    assert buffer_distribution(p1, p2, N) == pytest.approx(expected, rel=1e-10, abs=1e-15)
+    assert buffer_distribution(p1, p2, N, output='array') == pytest.approx(expected, rel=1e-10, abs=1e-15)
+    assert list(buffer_distribution(p1, p2, N, output='stream')) == pytest.approx(expected, rel=1e-10, abs=1e-15)
+    summary = buffer_distribution_summary(p1, p2, N, tail=[2, N])
+    assert summary["P0"] == pytest.approx(expected[0], rel=1e-10)
+    assert summary["PN"] == pytest.approx(expected[-1], rel=1e-10)
+    assert summary["mean"] == pytest.approx(float(np.dot(expected, np.arange(N + 1))), rel=1e-10)
+    assert summary["tail"][2] == pytest.approx(sum(expected[2:]), rel=1e-10)
+
+
+def test_buffer_distribution_large_buffer():
+    # alpha > 1: the reference overflows long before N = 10^6
+    P = buffer_distribution(0.9, 0.8, 10**6, output='array')
+    assert np.all(np.isfinite(P))
+    assert P.sum() == pytest.approx(1.0, abs=1e-12)
+    summary = buffer_distribution_summary(0.9, 0.8, 10**6, tail=[10**6 - 1])
+    assert summary["PN"] == pytest.approx(P[-1], rel=1e-12)
+    assert summary["mean"] == pytest.approx(float(np.dot(P, np.arange(P.size))), rel=1e-12)
+    assert summary["tail"][10**6 - 1] == pytest.approx(P[-2:].sum(), rel=1e-12)
+
+
+def test_buffer_distribution_equal_probabilities_and_errors():
+    P = buffer_distribution(0.7, 0.7, 4)
+    assert P == pytest.approx([0.3/4.3] + [1/4.3]*4)
+    assert buffer_distribution_summary(0.7, 0.7, 4)["mean"] == pytest.approx(10/4.3)
+    with pytest.raises(ValueError):
+        buffer_distribution(0.7, 0.8, 5, output='dict')
+    with pytest.raises(ValueError):
+        buffer_distribution(1.2, 0.8, 5)
+    with pytest.raises(ValueError):
+        buffer_distribution(0.7, 0.8, 0)
@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.cache import LRUCache
+from psepy.core import performance_measure_multiply_machine_bernoulli
+from psepy.instrumentation import (
+    instrument,
+    enable_instrumentation,
+    disable_instrumentation,
+    get_instrumentation
+)
+
+
+def test_instrument_records_one_solve_per_call():
+    p, N = [0.9, 0.8, 0.85, 0.9], [3, 2, 4]
+    cache = LRUCache()
+    with instrument() as collector:
+        expected = performance_measure_multiply_machine_bernoulli(p, 4, N, 1.0, cache=cache)
+        performance_measure_multiply_machine_bernoulli(p, 4, N, 1.0, cache=cache)
+    # nested solvers add to the record of the outer call
+    assert len(collector.records) == 2
+    first, second = collector.records
+    assert first.solver == "performance_measure_multiply_machine_bernoulli"
+    assert set(first.stages) == {"validation", "aggregation", "metrics"}
+    assert first.converged is True
+    assert first.iterations == len(first.residuals) > 1
+    assert first.residuals[-1] < 1e-6 <= first.residuals[-2]
+    assert first.cache_misses > 0 and second.cache_hits > 0 and second.cache_misses == 0
+    assert first.duration >= sum(first.stages.values()) - 1e-9
+    # the solves after the block are not recorded
+    assert performance_measure_multiply_machine_bernoulli(p, 4, N, 1.0) == expected
+    assert len(collector.records) == 2 and get_instrumentation() is None
+
+
+def test_counters_callbacks_and_export():
+    collector = enable_instrumentation(trace_residuals=False)
+    try:
+        seen = []
+        collector.add_callback(seen.append)
+        p = np.array([[0.9, 0.8, 0.85], [0.7, 0.9, 0.8]])
+        performance_measure_multiply_machine_bernoulli_batch(p, 3)
+        performance_measure_multiply_machine_bernoulli_batch(p, 3)
+        counters = collector.counters()["performance_measure_multiply_machine_bernoulli_batch"]
+        assert counters["solves"] == 2 and counters["unconverged"] == 0
+        assert counters["iterations"] == sum(record.iterations for record in seen) > 0
+        assert seen[0].residuals == []
+        assert counters["seconds_aggregation"] > 0
+        text = collector.export()
+        assert 'psepy_solves_total{solver="performance_measure_multiply_machine_bernoulli_batch"} 2' in text
+        assert 'stage="metrics"' in text
+        collector.reset()
+        assert collector.counters() == {} and collector.export() == ""
+    finally:
+        disable_instrumentation()
+    assert get_instrumentation() is None
+
+
+def test_failed_solve_is_recorded():
+    with instrument() as collector:
+        with pytest.raises(RuntimeError):
+            performance_measure_multiply_machine_bernoulli_batch([[0.9, 0.8, 0.85]], 3, max_iter=2)
+    record, = collector.records
+    assert record.converged is False
+    assert record.iterations == 2
+    assert collector.counters()["performance_measure_multiply_machine_bernoulli_batch"]["unconverged"] == 1
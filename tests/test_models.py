@@ -0,0 +1,100 @@
+import math
+import pytest
+import numpy as np
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.core import agg_machines
+from psepy.models import (
+    performance_measure_two_machine_model,
+    performance_measure_lines_batch,
+    performance_measure_geometric_line,
+    performance_measure_exponential_line
+)
+
+
+def geometric_chain(P1, R1, P2, R2, N):
+    """PR and WIP of the dense Markov chain of a two-machine geometric line"""
+    m1 = np.array([[1 - R1, R1], [P1, 1 - P1]])
+    m2 = np.array([[1 - R2, R2], [P2, 1 - P2]])
+    states = [(h, a, b) for h in range(N + 1) for a in (0, 1) for b in (0, 1)]
+    index = {state: i for i, state in enumerate(states)}
+    T = np.zeros((len(states), len(states)))
+    for h, a, b in states:
+        for a2 in (0, 1):
+            for b2 in (0, 1):
+                take = b2 == 1 and h > 0
+                put = a2 == 1 and not (h == N and not take)
+                T[index[(h, a, b)], index[(h + put - take, a2, b2)]] += m1[a, a2]*m2[b, b2]
+    values, vectors = np.linalg.eig(T.T)
+    pi = np.real(vectors[:, np.argmin(np.abs(values - 1))])
+    pi /= pi.sum()
+    PR = sum(pi[index[s]]*m2[s[2], 1] for s in states if s[0] > 0)
+    WIP = sum(pi[index[s]]*s[0] for s in states)
+    return PR, WIP
+
+
+@pytest.mark.parametrize("P1, R1, P2, R2, N", [(0.1, 0.3, 0.05, 0.4, 3), (0.05, 0.4, 0.1, 0.3, 5), (0.2, 0.2, 0.2, 0.2, 1)])
+def test_geometric_two_machine_matches_markov_chain(P1, R1, P2, R2, N):
+    PR, WIP = geometric_chain(P1, R1, P2, R2, N)
+    result = performance_measure_two_machine_model('geometric', [P1, R1], [P2, R2], N, rounded=False)
+    assert result["PR"] == pytest.approx(PR, abs=1e-12)
+    assert result["WIP"] == pytest.approx(WIP, abs=1e-10)
+    assert result["BL_1"] == pytest.approx(R1/(P1 + R1) - PR, abs=1e-12)
+    assert result["ST_2"] == pytest.approx(R2/(P2 + R2) - PR, abs=1e-12)
+
+
+def test_geometric_line_with_memoryless_machines_is_bernoulli_line():
+    # P + R = 1: the state of each cycle is independent of the last, a Bernoulli machine with p = R
+    p = np.array([[0.8, 0.7, 0.9, 0.75], [0.9, 0.85, 0.6, 0.95]])
+    N = np.array([2, 3, 1])
+    geometric = performance_measure_geometric_line(1 - p, p, N, rounded=False)
+    bernoulli = performance_measure_multiply_machine_bernoulli_batch(p, N, rounded=False)
+    for name in ("PR", "WIP", "BL", "ST"):
+        np.testing.assert_allclose(geometric[name], bernoulli[name], atol=1e-6)
+    shared = performance_measure_lines_batch('bernoulli', p[:, :, None], N, rounded=False)
+    np.testing.assert_allclose(shared["PR"], bernoulli["PR"], atol=1e-12)
+
+
+@pytest.mark.parametrize("lam1, mu1, lam2, mu2, N", [(0.1, 0.5, 0.05, 0.3, 4.0), (0.05, 0.3, 0.1, 0.5, 4.0),
+                                                     (0.02, 0.2, 0.03, 0.25, 3000.0), (0.1, 0.5, 0.1, 0.5, 3.0)])
+def test_exponential_two_machine_closed_form(lam1, mu1, lam2, mu2, N):
+    e1, e2 = mu1/(lam1 + mu1), mu2/(lam2 + mu2)
+    phi = e1*(1 - e2)/(e2*(1 - e1))
+    L, U = lam1 + lam2, mu1 + mu2
+    beta = (L + U)*(lam1*mu2 - lam2*mu1)/(L*U)
+    if phi == 1:
+        Q = (1 - e1)/(1 + (L + U)*lam1*mu2/(L*U)*N)
+    else:
+        Q = (1 - e1)*(1 - phi)/(1 - phi*math.exp(-beta*N))
+    result = performance_measure_two_machine_model('exponential', [lam1, mu1], [lam2, mu2], N, rounded=False)
+    assert result["PR"] == pytest.approx(e2*(1 - Q), rel=1e-10)
+    assert result["BL_1"] == pytest.approx(e1 - result["PR"], abs=1e-10)
+    assert 0 < result["WIP"] < N
+    # a geometric line with small steps approaches the exponential line
+    dt = 0.01
+    geometric = performance_measure_two_machine_model(
+        'geometric', [lam1*dt, mu1*dt], [lam2*dt, mu2*dt], min(N, 10.0)/dt, rounded=False
+    )
+    exponential = performance_measure_two_machine_model('exponential', [lam1, mu1], [lam2, mu2], min(N, 10.0), rounded=False)
+    assert geometric["PR"] == pytest.approx(exponential["PR"], abs=1e-4)
+    assert geometric["WIP"]*dt == pytest.approx(exponential["WIP"], rel=1e-2)
+
+
+def test_exponential_line_from_agg_machines():
+    cells = [agg_machines(2, [1, 1], [100, 80], [10, 12]),
+             agg_machines(1, [2], [50], [8]),
+             agg_machines(2, [1, 1], [60, 90], [6, 9])]
+    c, T_up, T_down = zip(*cells)
+    result = performance_measure_exponential_line(c, T_up, T_down, [10, 10], rounded=False)
+    e = result["e"][0]
+    assert result["PR"][0] < e.min()
+    assert result["TP"][0] == pytest.approx(2*result["PR"][0])
+    # the first machine is never starved and the last never blocked
+    assert e[0] - result["BL"][0, 0] == pytest.approx(result["PR"][0], abs=1e-5)
+    assert e[-1] - result["ST"][0, -1] == pytest.approx(result["PR"][0], abs=1e-5)
+    # larger buffers, in parts, increase the production rate
+    larger = performance_measure_exponential_line(c, T_up, T_down, [100, 100], rounded=False)
+    assert result["PR"][0] < larger["PR"][0] < e.min()
+    with pytest.raises(ValueError):
+        performance_measure_exponential_line([1, 2, 2], T_up, T_down, [10, 10])
+    with pytest.raises(ValueError):
+        performance_measure_geometric_line([0.6, 0.1], [0.5, 0.2], [3])
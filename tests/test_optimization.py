@@ -0,0 +1,55 @@
+import itertools
+import pytest
+import numpy as np
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.optimization import allocate_buffers, buffers_for_target
+
+P = [0.9, 0.8, 0.85, 0.88, 0.83]
+
+
+def brute_force(p, allocations):
+    allocations = np.array(allocations)
+    result = performance_measure_multiply_machine_bernoulli_batch(
+        np.tile(p, (len(allocations), 1)), allocations, rounded=False
+    )
+    return allocations, result["PR"], result["TotalWIP"]
+
+
+def test_allocate_buffers_finds_best_allocation():
+    allocations, PR, _ = brute_force(P, [N for N in itertools.product(range(1, 12), repeat=4) if sum(N) == 14])
+    best = int(np.argmax(PR))
+    exact = allocate_buffers(P, 14, method='exact')
+    greedy = allocate_buffers(P, 14)
+    assert exact.N == allocations[best].tolist()
+    assert exact.PR == pytest.approx(PR[best], abs=1e-5)
+    assert sum(greedy.N) == 14
+    assert greedy.PR == pytest.approx(exact.PR, abs=1e-3)
+    # the greedy search aggregates far fewer lines than there are allocations
+    assert greedy.solves < len(allocations)/4
+
+
+def test_buffers_for_target():
+    allocations, PR, WIP = brute_force(P, list(itertools.product(range(1, 7), repeat=4)))
+    feasible = PR >= 0.75
+    best = np.flatnonzero(feasible)[np.argmin(WIP[feasible])]
+    exact = buffers_for_target(P, 0.75, method='exact', N_max=6)
+    greedy = buffers_for_target(P, 0.75)
+    assert exact.N == allocations[best].tolist()
+    assert exact.TotalWIP == pytest.approx(WIP[best], abs=1e-4)
+    assert greedy.PR >= 0.75
+    assert greedy.TotalWIP <= exact.TotalWIP*1.05
+
+
+def test_optimizer_errors():
+    with pytest.raises(ValueError):
+        allocate_buffers(P, 3)
+    with pytest.raises(ValueError):
+        allocate_buffers(P, 14, method='random')
+    with pytest.raises(ValueError):
+        allocate_buffers(P, 40, method='exact', max_candidates=100)
+    with pytest.raises(ValueError):
+        buffers_for_target(P, 0.85)
+    with pytest.raises(ValueError):
+        buffers_for_target(P, 0.75, method='exact')
+    with pytest.raises(ValueError):
+        buffers_for_target(P, 0.78, N_max=2)
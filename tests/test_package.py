@@ -0,0 +1,40 @@
+import subprocess
+import sys
+import pytest
+import psepy
+from psepy import scalar
+from psepy.distribution import buffer_distribution
+
+
+def test_import_does_not_load_numpy():
+    code = (
+        "import sys, psepy\n"
+        "assert 'numpy' not in sys.modules\n"
+        "psepy.performance_measure_two_machine(0.9, 0.8, 3)\n"
+        "psepy.P_function_two_machine_bernoulli(0.9, 0.8, 3)\n"
+        "assert 'numpy' not in sys.modules\n"
+        "psepy.agg_machines\n"
+        "assert 'numpy' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_lazy_attributes():
+    import importlib
+    for name in psepy.__all__:
+        module = importlib.import_module(f"psepy.{psepy._LAZY_IMPORTS[name]}")
+        assert getattr(psepy, name) is getattr(module, name)
+    assert psepy.Q_function_bernoulli is psepy.core.Q_function_bernoulli
+    assert psepy.batch is sys.modules["psepy.batch"]
+    assert set(psepy.__all__) <= set(dir(psepy))
+    with pytest.raises(AttributeError):
+        psepy.no_such_function
+
+
+@pytest.mark.parametrize("p1, p2, N", [(0.9, 0.8, 3), (0.7, 0.95, 64), (0.95, 0.7, 65), (0.0, 0.5, 4), (0.6, 0.6, 5)])
+def test_scalar_distribution_matches_numpy(p1, p2, N):
+    P = scalar.P_function_two_machine_bernoulli(p1, p2, N, cache=False)
+    assert len(P) == N + 1
+    assert sum(P) == pytest.approx(1.0)
+    if p1 != p2:
+        assert P == pytest.approx(buffer_distribution(p1, p2, N), rel=1e-12, abs=1e-300)
@@ -0,0 +1,67 @@
+import pytest
+from psepy.core import agg_machines
+from psepy.plant import Machine, MachineGroup, ParallelGroup, SerialGroup
+
+
+def build_plant():
+    cells = [
+        ParallelGroup([Machine(1.0, 50, 5), Machine(1.2, 40, 8)], name="cell1"),
+        ParallelGroup([Machine(0.8, 60, 6), Machine(0.9, 30, 3), Machine(1.1, 45, 9)], name="cell2"),
+        ParallelGroup([Machine(2.0, 100, 10)], name="cell3"),
+    ]
+    line = SerialGroup(cells, name="line")
+    other = SerialGroup([Machine(1.5, 80, 4), Machine(1.7, 70, 7)], name="other")
+    return ParallelGroup([line, other], name="plant"), cells, line, other
+
+
+def aggregate(machines, mode):
+    return agg_machines(len(machines), *[list(x) for x in zip(*machines)], mode=mode)
+
+
+def manual(cells, other_machines):
+    line = aggregate([aggregate(machines, 'parallel') for machines in cells], 'consecutive dependent')
+    other = aggregate(other_machines, 'consecutive dependent')
+    return aggregate([line, other], 'parallel')
+
+
+def test_plant_matches_manual_aggregation():
+    plant, cells, line, other = build_plant()
+    expected = manual(
+        [[(1.0, 50, 5), (1.2, 40, 8)], [(0.8, 60, 6), (0.9, 30, 3), (1.1, 45, 9)], [(2.0, 100, 10)]],
+        [(1.5, 80, 4), (1.7, 70, 7)]
+    )
+    # manual stitching rounds at every level, the plant does not
+    assert plant.evaluate() == pytest.approx(expected, rel=1e-3)
+
+
+def test_plant_edit_recomputes_path_only():
+    plant, cells, line, other = build_plant()
+    plant.evaluate()
+    counts = [group.evaluations for group in (plant, line, other, *cells)]
+    assert counts == [1]*6
+    cells[1].children[0].set(T_down=12)
+    result = plant.evaluate()
+    counts = [group.evaluations for group in (plant, line, other, *cells)]
+    assert counts == [2, 2, 1, 1, 2, 1]
+    fresh, *_ = build_plant()
+    fresh_cells = fresh.children[0].children
+    fresh_cells[1].children[0].set(T_down=12)
+    assert result == pytest.approx(fresh.evaluate(), rel=1e-12)
+
+
+def test_plant_units_and_structure_errors():
+    machine = Machine(60, 1, 0.1, c_unit='parts/min', T_up_unit='minutes', T_down_unit='minutes')
+    assert machine.evaluate() == pytest.approx((1.0, 60.0, 6.0))
+    assert machine.evaluate('parts/min', 'minutes', 'minutes') == pytest.approx((60.0, 1.0, 0.1))
+    group = ParallelGroup([machine])
+    with pytest.raises(ValueError):
+        SerialGroup([machine])
+    with pytest.raises(ValueError):
+        machine.set(c=-1)
+    with pytest.raises(ValueError):
+        ParallelGroup().evaluate()
+    with pytest.raises(ValueError):
+        group.evaluate(c_unit='parts/week')
+    # the base group has no aggregation mode
+    with pytest.raises(TypeError):
+        MachineGroup([Machine(1, 10, 1)])
@@ -0,0 +1,63 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+import numpy as np
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.core import agg_machines, performance_measure_multiply_machine_bernoulli
+from psepy.result_cache import ResultCache
+
+
+def test_result_cache_persists_results(tmp_path):
+    path = tmp_path / "results.sqlite"
+    p, N = [0.9, 0.8, 0.85, 0.9], [3, 2, 4]
+    expected = performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0, cache=False)
+    with ResultCache(path) as cache:
+        assert cache.performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0) == expected
+        assert cache.agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85]) == agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85])
+        assert cache.stats.misses == 2 and len(cache) == 2
+    # a new process would open the same file; equal inputs in other containers and dtypes hit
+    with ResultCache(path) as cache:
+        assert cache.performance_measure_multiply_machine_bernoulli(np.array(p), 4, np.array(N, dtype=np.int32), 2) == expected
+        result = cache.performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0, as_result=True, rounded=False)
+        assert result.to_dict(False) == performance_measure_multiply_machine_bernoulli(p, 4, N, 2.0, cache=False, rounded=False)
+        assert cache.agg_machines(3, (1.5, 2.0, 1.7), [10, 8, 9], [90, 79, 85]) == agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85])
+        # the options that change the results are part of the key
+        cache.performance_measure_multiply_machine_bernoulli(p, 4, N, 1.0)
+        cache.agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85], 'consecutive dependent')
+        assert cache.stats.hits == 3 and cache.stats.misses == 2 and len(cache) == 4
+
+
+def test_result_cache_batch_and_eviction(tmp_path):
+    rng = np.random.default_rng(0)
+    p, N = rng.uniform(0.7, 0.95, (6, 4)), rng.integers(1, 6, (6, 3))
+    cache = ResultCache(tmp_path / "results.sqlite", maxsize=5)
+    first = cache.performance_measure_multiply_machine_bernoulli_batch(p[:3], N[:3])
+    mixed = cache.performance_measure_multiply_machine_bernoulli_batch(p, N)
+    expected = performance_measure_multiply_machine_bernoulli_batch(p, N)
+    for name, value in expected.items():
+        np.testing.assert_array_equal(mixed[name], value)
+        np.testing.assert_array_equal(first[name], value[:3])
+    assert cache.stats.hits == 3 and cache.stats.misses == 6
+    # 6 lines in a cache of 5: the least recently used one, line 0, was evicted
+    assert len(cache) == 5 and cache.stats.evictions == 1
+    cache.performance_measure_multiply_machine_bernoulli_batch(p[1:], N[1:])
+    assert cache.stats.hits == 8
+    cache.clear()
+    assert len(cache) == 0 and cache.stats.hits == 0
+
+
+def _solve_chunk(cache: ResultCache, seed: int) -> float:
+    rng = np.random.default_rng(seed % 2)
+    result = cache.performance_measure_multiply_machine_bernoulli_batch(rng.uniform(0.7, 0.95, (50, 5)), 3)
+    return float(result["PR"].sum())
+
+
+def test_result_cache_shared_by_processes(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite")
+    assert pickle.loads(pickle.dumps(cache)).path == cache.path
+    # four workers write the same 100 lines concurrently
+    with ProcessPoolExecutor(4) as pool:
+        totals = list(pool.map(_solve_chunk, [cache]*8, range(8)))
+    assert totals[0::2] == [totals[0]]*4 and totals[1::2] == [totals[1]]*4
+    assert len(cache) == 100
+    assert _solve_chunk(cache, 0) == totals[0] and cache.stats.hits == 50
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from psepy.core import performance_measure_multiply_machine_bernoulli
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.results import LineResult, LineResultBatch
+
+
+def test_line_result_rounds_on_export():
+    p, N = [0.9, 0.8, 0.85], [3, 4]
+    result = performance_measure_multiply_machine_bernoulli(p, 3, N, 2.0, as_result=True)
+    assert isinstance(result, LineResult)
+    assert not hasattr(result, "__dict__")
+    exported = result.to_dict()
+    assert exported["PR"] == round(result.PR, 4)
+    assert exported["TP"] == round(result.PR/2.0, 4)
+    assert exported["TotalWIP"] == round(result.TotalWIP, 2)
+    assert exported["N"] == N
+    assert result["pf"] == [round(x, 4) for x in result.pf.tolist()]
+    assert result.to_dict(rounded=False)["PR"] == result.PR
+
+
+def test_dict_result_does_not_alias_inputs():
+    p, N = [0.9, 0.8, 0.85], [3, 4]
+    result = performance_measure_multiply_machine_bernoulli(p, 3, N, 1.0)
+    result["p"].append(0.5)
+    result["N"][0] = 10
+    assert p == [0.9, 0.8, 0.85]
+    assert N == [3, 4]
+
+
+def test_line_result_batch_concatenation_and_records():
+    rng = np.random.default_rng(3)
+    p = rng.uniform(0.7, 0.95, size=(6, 4))
+    N = rng.integers(1, 6, size=(6, 3))
+    first = performance_measure_multiply_machine_bernoulli_batch(p[:4], N[:4], t=2.0, as_result=True)
+    second = performance_measure_multiply_machine_bernoulli_batch(p[4:], N[4:], t=2.0, as_result=True)
+    batch = LineResultBatch.concatenate([first, second])
+    assert len(batch) == 6
+    # the lines are views into the solver output
+    assert np.shares_memory(batch[5].pb, second[1].pb)
+
+    expected = performance_measure_multiply_machine_bernoulli_batch(p, N, t=2.0)
+    records = batch.to_records(rounded=True)
+    for name in ("pf", "pb", "ST", "BL", "WIP", "PR", "TotalWIP", "TP"):
+        assert records[name] == pytest.approx(expected[name])
+        assert batch.column(name, rounded=True) == pytest.approx(expected[name])
+    assert records["N"].tolist() == N.tolist()
+    assert [line.PR for line in batch] == pytest.approx(batch.column("PR").tolist())
+
+    with pytest.raises(ValueError):
+        batch.extend(performance_measure_multiply_machine_bernoulli_batch(p[:, :3], N[:, :2], as_result=True))
+    with pytest.raises(IndexError):
+        batch[6]
+
+
+def test_line_result_batch_extends_itself():
+    p = np.array([[0.9, 0.8, 0.85], [0.7, 0.95, 0.8]])
+    N = np.array([[3, 4], [2, 5]])
+    batch = performance_measure_multiply_machine_bernoulli_batch(p, N, as_result=True)
+    batch.extend(batch)
+    assert len(batch) == 4
+    assert batch.column("PR")[2:].tolist() == batch.column("PR")[:2].tolist()
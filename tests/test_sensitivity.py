@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from psepy.batch import aggregation_of_bernoulli_lines_batch
+from psepy.sensitivity import bottleneck_analysis
+
+
+def production_rate(p, N):
+    _, p_b = aggregation_of_bernoulli_lines_batch(np.array([p]), np.array([N]), tol=1e-12)
+    return p_b[0, 0]
+
+
+def test_bottleneck_analysis_derivatives():
+    p = [0.9, 0.85, 0.8, 0.88]
+    N = [3, 2, 4]
+    result = bottleneck_analysis(p, N)
+    assert result.PR == pytest.approx(production_rate(p, N), abs=1e-9)
+    for i in range(len(p)):
+        up, down = list(p), list(p)
+        up[i] += 1e-4
+        down[i] -= 1e-4
+        expected = (production_rate(up, N) - production_rate(down, N))/2e-4
+        assert result.dPR_dp[i] == pytest.approx(expected, abs=1e-5)
+    for i in range(len(N)):
+        larger = list(N)
+        larger[i] += 1
+        assert result.dPR_dN[i] == pytest.approx(production_rate(p, larger) - result.PR, abs=1e-8)
+    assert result.solves == 3*len(p)
+
+
+def test_bottleneck_analysis_identifies_slowest_machine():
+    result = bottleneck_analysis([0.92, 0.9, 0.7, 0.9, 0.93], [3, 3, 3, 3])
+    assert result.arrows == ['>', '>', '<', '<']
+    assert result.bottlenecks == [2]
+    assert result.primary == 2
+    assert int(np.argmax(result.dPR_dp)) == 2
+
+
+def test_bottleneck_analysis_errors():
+    with pytest.raises(ValueError):
+        bottleneck_analysis([0.9, 0.8], [3, 3])
+    with pytest.raises(ValueError):
+        bottleneck_analysis([0.9, 0.8], [3], delta=0)
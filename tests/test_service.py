@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import pytest
+from psepy.core import agg_machines, performance_measure_multiply_machine_bernoulli
+from psepy.service import LocalClient, SolverService
+
+
+def test_service_coalesces_and_batches():
+    lines = [([0.9, 0.8, 0.85], [3, 2]), ([0.7, 0.9, 0.8], [4, 4]), ([0.9, 0.8, 0.85], [3, 2])]
+
+    async def main():
+        async with SolverService(max_delay=0.05) as service:
+            results = await asyncio.gather(
+                *(service.performance_measure_multiply_machine_bernoulli(p, 3, N, 2.0) for p, N in lines),
+                service.performance_measure_multiply_machine_bernoulli([0.9, 0.8], 2, [5]),
+                service.agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85], 'consecutive dependent'),
+                service.agg_machines(3, [1.2, 1.1, 1.9], [7, 9, 6], [60, 70, 80], 'consecutive dependent')
+            )
+            return results, dict(service.stats)
+
+    results, stats = asyncio.run(main())
+    for (p, N), result in zip(lines, results):
+        expected = performance_measure_multiply_machine_bernoulli(p, 3, N, 2.0, cache=False)
+        assert result.keys() == expected.keys()
+        for key in expected:
+            assert result[key] == pytest.approx(expected[key], abs=2e-4)
+    assert results[0] == results[2] and results[0]["pf"] is not results[2]["pf"]
+    assert results[3]["PR"] == pytest.approx(performance_measure_multiply_machine_bernoulli([0.9, 0.8], 2, [5], 1.0)["PR"], abs=1e-4)
+    assert results[4] == pytest.approx(agg_machines(3, [1.5, 2, 1.7], [10, 8, 9], [90, 79, 85], 'consecutive dependent'))
+    assert results[5] == pytest.approx(agg_machines(3, [1.2, 1.1, 1.9], [7, 9, 6], [60, 70, 80], 'consecutive dependent'))
+    # one batch per group: lines of 3 machines, lines of 2 machines and the cells
+    assert stats == {"requests": 6, "coalesced": 1, "batches": 3, "solved": 5}
+
+
+def test_service_isolates_failures():
+    async def main():
+        async with SolverService(max_delay=0.05, max_iter=5) as service:
+            with pytest.raises(ValueError, match=r"'p\[1\]'"):
+                await service.performance_measure_multiply_machine_bernoulli([0.9, 1.5, 0.8], 3, [3, 2])
+            with pytest.raises(TypeError):
+                await service.agg_machines(3, [1.5, 0, 1.7], [10, 8, 9], [90, 79, 85])
+            # the second line does not converge in 5 iterations: the batch is split
+            return await asyncio.gather(
+                service.performance_measure_multiply_machine_bernoulli([0.9, 0.8, 0.85], 3, [3, 3]),
+                service.performance_measure_multiply_machine_bernoulli([0.9, 0.9, 0.9], 3, [10, 10]),
+                return_exceptions=True
+            )
+
+    converged, failed = asyncio.run(main())
+    assert converged["PR"] == pytest.approx(performance_measure_multiply_machine_bernoulli([0.9, 0.8, 0.85], 3, [3, 3], 1.0)["PR"], abs=1e-4)
+    assert isinstance(failed, RuntimeError)
+
+
+def test_local_client_from_threads():
+    results = [None]*8
+    with LocalClient(max_delay=0.05) as client:
+        def request(i):
+            results[i] = client.performance_measure_multiply_machine_bernoulli([0.9, 0.8, 0.85], 3, [3, 1 + i % 2])
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert client.agg_machines(2, [1.0, 2.0], [10, 10], [1, 1]) == pytest.approx(agg_machines(2, [1.0, 2.0], [10, 10], [1, 1]))
+        stats = client.service.stats
+    assert results[0] == results[2] != results[1] == results[3]
+    assert stats["requests"] == 9 and stats["solved"] + stats["coalesced"] == 9 and stats["solved"] >= 3
@@ -0,0 +1,37 @@
+import pytest
+from psepy.core import performance_measure_two_machine
+from psepy.simulation import simulate_bernoulli_line
+
+
+@pytest.mark.parametrize("p1, p2, N", [(0.8, 0.7, 3), (0.7, 0.9, 2)])
+def test_simulation_matches_two_machine_formulas(p1, p2, N):
+    exact = performance_measure_two_machine(p1, p2, N)
+    result = simulate_bernoulli_line([p1, p2], [N], slots=5000, replications=64, seed=7, rounded=False)
+    CI = result["CI"]
+    assert result["PR"] == pytest.approx(exact["PR"], abs=4*CI["PR"] + 1e-3)
+    assert result["WIP"][0] == pytest.approx(exact["WIP"], abs=4*CI["WIP"][0] + 1e-2)
+    assert result["BL"][0] == pytest.approx(exact["BL_1"], abs=4*CI["BL"][0] + 1e-3)
+    assert result["ST"][1] == pytest.approx(exact["ST_2"], abs=4*CI["ST"][1] + 1e-3)
+    assert result["ST"][0] == 0 and result["BL"][1] == 0
+    assert result["TotalWIP"] == pytest.approx(result["WIP"][0])
+
+
+def test_simulation_is_reproducible_across_workers():
+    p, N = [0.9, 0.8, 0.85], [2, 3]
+    serial = simulate_bernoulli_line(p, N, slots=500, replications=20, seed=3, chunk_size=8)
+    assert simulate_bernoulli_line(p, N, slots=500, replications=20, seed=3, chunk_size=8) == serial
+    parallel = simulate_bernoulli_line(p, N, slots=500, replications=20, seed=3, chunk_size=8, workers=2)
+    assert parallel == serial
+    assert set(serial) == {"p", "ST", "BL", "N", "WIP", "PR", "TotalWIP", "TP", "CI", "replications", "slots", "confidence"}
+    assert simulate_bernoulli_line(p, N, slots=500, replications=20, seed=4, chunk_size=8) != serial
+
+
+def test_simulation_errors():
+    with pytest.raises(ValueError):
+        simulate_bernoulli_line([0.9, 0.8], [3, 3])
+    with pytest.raises(ValueError):
+        simulate_bernoulli_line([0.9, 1.2], [3])
+    with pytest.raises(ValueError):
+        simulate_bernoulli_line([0.9, 0.8], [3], warmup=-1)
+    with pytest.raises(ValueError):
+        simulate_bernoulli_line([0.9, 0.8], [3], confidence=1.0)
@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.storage import (
+    ColumnStore,
+    write_lines,
+    read_lines,
+    append_results,
+    read_results,
+    solve_line_store
+)
+
+
+@pytest.fixture
+def lines():
+    rng = np.random.default_rng(11)
+    return rng.uniform(0.7, 0.95, size=(10, 4)), rng.integers(1, 6, size=(10, 3)), rng.uniform(1, 2, size=10)
+
+
+def test_write_and_read_lines(tmp_path, lines):
+    p, N, t = lines
+    write_lines(tmp_path / "lines", p[:6], N[:6], t[:6])
+    write_lines(tmp_path / "lines", p[6:], N[6:], t[6:], append=True)
+    p_read, N_read, t_read = read_lines(tmp_path / "lines")
+    assert isinstance(p_read, np.memmap)
+    assert np.array_equal(p_read, p)
+    assert np.array_equal(N_read, N)
+    assert np.array_equal(t_read, t)
+    chunks = list(ColumnStore(tmp_path / "lines").iter_chunks(4, columns=["p"]))
+    assert [len(chunk["p"]) for chunk in chunks] == [4, 4, 2]
+    with pytest.raises(ValueError):
+        write_lines(tmp_path / "lines", p[:, :3], N[:, :2], append=True)
+
+
+def test_solve_line_store_streams_results(tmp_path, lines):
+    p, N, t = lines
+    write_lines(tmp_path / "lines", p, N, t)
+    solve_line_store(tmp_path / "lines", tmp_path / "results", chunk_size=3)
+    results = read_results(tmp_path / "results")
+    assert len(results) == 10
+    expected = performance_measure_multiply_machine_bernoulli_batch(p, N, t, rounded=False)
+    for name in ("pf", "pb", "ST", "BL", "WIP", "PR", "TotalWIP", "TP"):
+        assert results.column(name) == pytest.approx(expected[name])
+    assert results[7].PR == pytest.approx(expected["PR"][7])
+
+    more = performance_measure_multiply_machine_bernoulli_batch(p[:2], N[:2], t[:2], as_result=True)
+    store = append_results(tmp_path / "results", more)
+    assert len(store) == 12
+    assert read_results(tmp_path / "results", chunk_size=5).to_records()["PR"][10:] == pytest.approx(expected["PR"][:2])
+
+
+def test_column_store_errors(tmp_path):
+    store = ColumnStore.create(tmp_path / "store", {"x": ("<f8", (2,))})
+    with pytest.raises(FileExistsError):
+        ColumnStore.create(tmp_path / "store", {"x": ("<f8", (2,))})
+    with pytest.raises(ValueError):
+        store.append(x=np.zeros((3, 3)))
+    with pytest.raises(ValueError):
+        store.append(y=np.zeros((3, 2)))
+    assert store.read("x").shape == (0, 2)
+    with pytest.raises(FileNotFoundError):
+        ColumnStore(tmp_path / "missing")
+
+
+def test_append_no_rows_keeps_store(tmp_path, lines):
+    p, N, t = lines
+    write_lines(tmp_path / "lines", p[:5], N[:5], t[:5])
+    store = write_lines(tmp_path / "lines", np.empty((0, 4)), np.empty((0, 3), dtype=int), append=True)
+    assert len(store) == 5
+    p_read, N_read, _ = read_lines(tmp_path / "lines")
+    assert np.array_equal(p_read, p[:5]) and np.array_equal(N_read, N[:5])
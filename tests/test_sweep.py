@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+from psepy.core import agg_machines
+from psepy.batch import performance_measure_multiply_machine_bernoulli_batch
+from psepy.sweep import sweep_multiply_machine_bernoulli, sweep_agg_machines
+
+
+@pytest.fixture
+def line_grid():
+    rng = np.random.default_rng(7)
+    return rng.uniform(0.7, 0.95, (60, 5)), rng.integers(1, 6, (60, 4))
+
+
+def test_sweep_multiply_machine_bernoulli_matches_batch(line_grid):
+    p, N = line_grid
+    result = sweep_multiply_machine_bernoulli(p, N, t=2.0, workers=1, chunk_size=16)
+    expected = performance_measure_multiply_machine_bernoulli_batch(p, N, t=2.0)
+    for key, value in expected.items():
+        assert np.array_equal(result[key], value), key
+
+
+def test_sweep_multiply_machine_bernoulli_deterministic_across_workers(line_grid):
+    p, N = line_grid
+    serial = sweep_multiply_machine_bernoulli(p, N, workers=1, chunk_size=7)
+    parallel = sweep_multiply_machine_bernoulli(p, N, workers=3, chunk_size=7)
+    for key in serial:
+        assert np.array_equal(serial[key], parallel[key]), key
+
+
+def test_sweep_agg_machines():
+    rng = np.random.default_rng(1)
+    c = rng.uniform(1, 3, (10, 3))
+    T_up = rng.uniform(5, 10, (10, 3))
+    T_down = rng.uniform(50, 90, (10, 3))
+    for mode in ['parallel', 'consecutive dependent']:
+        c_agg, T_up_agg, T_down_agg = sweep_agg_machines(c, T_up, T_down, mode, workers=2, chunk_size=3)
+        for k in range(10):
+            expected = agg_machines(3, c[k].tolist(), T_up[k].tolist(), T_down[k].tolist(), mode)
+            assert (c_agg[k], T_up_agg[k], T_down_agg[k]) == expected
+
+
+def test_sweep_invalid_arguments(line_grid):
+    p, N = line_grid
+    with pytest.raises(ValueError):
+        sweep_multiply_machine_bernoulli(p, N, workers=0)
+    with pytest.raises(ValueError):
+        sweep_multiply_machine_bernoulli(p, N, chunk_size=0)
+    with pytest.raises(ValueError):
+        sweep_agg_machines(np.ones((2, 3)), np.ones((2, 2)), np.ones((2, 3)))
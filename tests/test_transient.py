@@ -0,0 +1,52 @@
+import pytest
+import numpy as np
+from psepy.core import performance_measure_two_machine
+from psepy.transient import TransientLine, transient_analysis
+
+
+def test_transient_two_machine_reaches_steady_state():
+    exact = performance_measure_two_machine(0.8, 0.7, 3)
+    result = transient_analysis([0.8, 0.7], [3], 400)
+    # machine 2 is starved in the first slot of an empty line, never blocked
+    assert result.PR[0] == 0.0
+    assert result.WIP[0, 0] == 0.0
+    assert np.all(result.BL[:, 1] == 0)
+    assert result.PR[-1] == pytest.approx(exact["PR"], abs=1e-4)
+    assert result.WIP[-1, 0] == pytest.approx(exact["WIP"], abs=1e-2)
+    assert result.BL[-1, 0] == pytest.approx(exact["BL_1"], abs=1e-4)
+    assert result.ST[-1, 1] == pytest.approx(exact["ST_2"], abs=1e-4)
+    full = transient_analysis([0.8, 0.7], [3], 1, initial='full')
+    assert full.PR[0] == pytest.approx(0.7)
+    assert full.distribution.sum() == pytest.approx(1.0)
+
+
+def test_transient_batch_matches_dense_propagation():
+    line = TransientLine([2, 3])
+    p = np.array([[0.9, 0.8, 0.85], [0.7, 0.95, 0.8]])
+    result = line.run(p, 20, initial=[1, 2])
+    for b in range(p.shape[0]):
+        P = line.matrix(p[b])
+        np.testing.assert_allclose(P.sum(axis=1), 1.0)
+        pi = line.initial([1, 2])
+        for _ in range(20):
+            pi = pi @ P
+        np.testing.assert_allclose(result.distribution[b], pi, atol=1e-14)
+        single = line.run(p[b], 20, initial=[1, 2])
+        np.testing.assert_allclose(result.PR[b], single.PR)
+        np.testing.assert_allclose(result.WIP[b, -1], pi @ line.levels)
+    # the structure of each N is built once
+    assert transient_analysis(p[0], [2, 3], 5).PR.shape == (5,)
+    assert transient_analysis(p[1], [2, 3], 5, initial='full').WIP.shape == (6, 2)
+
+
+def test_transient_errors():
+    with pytest.raises(ValueError):
+        TransientLine([])
+    with pytest.raises(ValueError):
+        transient_analysis([0.9, 0.8, 0.7], [3], 10)
+    with pytest.raises(ValueError):
+        transient_analysis([0.9, 0.8], [3], 10, initial='half')
+    with pytest.raises(ValueError):
+        transient_analysis([0.9, 0.8], [3], 10, initial=[4])
+    with pytest.raises(ValueError):
+        transient_analysis([0.9, 0.8], [3], 10, line=TransientLine([2]))
@@ -45,4 +45,26 @@ class TestInputValidator:
             self.validator.validate_probability(-0.1, "test")
         
         with pytest.raises(ValueError):
-            self.validator.validate_probability(1.1, "test") 
\ No newline at end of file
+            self.validator.validate_probability(1.1, "test") 
+
+    def test_array_validators(self):
+        c = self.validator.validate_numeric_array([1, 2.5, 3], 3, "c")
+        assert c.dtype == float and c.tolist() == [1.0, 2.5, 3.0]
+        assert self.validator.validate_probability_array(np.array([[0, 0.5], [1, 0.2]]), "p", (None, 2)).shape == (2, 2)
+        N = self.validator.validate_positive_int_array((n for n in [3, 1]), "N")
+        assert N.dtype == np.int64 and N.tolist() == [3, 1]
+
+        # the same exceptions as the element-wise validators, naming the first invalid element
+        with pytest.raises(TypeError, match=r"'c\[1\]'"):
+            self.validator.validate_numeric_array([1.0, 0.0, -1.0], 3, "c")
+        for value in ("abc", 1.0, [1.0, "a", 2.0], [[1.0], [2.0], [3.0]], [1.0, [2.0, 3.0], 4.0]):
+            with pytest.raises(TypeError):
+                self.validator.validate_numeric_array(value, 3, "c")
+        with pytest.raises(ValueError, match="shape"):
+            self.validator.validate_numeric_array([1.0, 2.0], 3, "c")
+        with pytest.raises(ValueError, match=r"'p\[1, 0\]'"):
+            self.validator.validate_probability_array([[0.5, 0.5], [1.5, np.nan]], "p")
+        with pytest.raises(ValueError, match=r"'N\[0\]'"):
+            self.validator.validate_positive_int_array([0, 2], "N")
+        with pytest.raises(ValueError):
+            self.validator.validate_positive_int_array([1.0, 2.0], "N")